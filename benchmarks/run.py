@@ -0,0 +1,236 @@
+"""
+Parse-throughput benchmarks on synthetic payslips.
+
+    python -m benchmarks.run --files 20 --pages 3 --output results.json
+    python -m benchmarks.run --compare results.json
+
+Results are written as JSON; --compare prints each throughput against an
+earlier results file.
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timezone
+from importlib import metadata
+from unittest.mock import MagicMock
+from benchmarks.synthetic import generate_payslip
+from payslip2budget.formatters import FORMATTERS
+from payslip2budget.parsers.adp import PayslipParser
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of values."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def latency_stats(latencies):
+    return {"p50_ms": percentile(latencies, 0.50) * 1000, "p95_ms": percentile(latencies, 0.95) * 1000}
+
+def peak_rss_bytes():
+    """Peak resident set size of this process so far."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def bench_parse(workdir, args):
+    """Time PayslipParser.parse_payslip on freshly generated payslips."""
+    parser = PayslipParser(extractor=args.extractor)
+    latencies = []
+    pages = lines = 0
+    results = []
+
+    for index in range(args.files):
+        path = f"{workdir}/payslip-{index}.pdf"
+        spec = generate_payslip(path, args.pages, args.lines, args.density,
+                                check_date=date(2024, 1 + index % 12, 15), seed=index)
+        start = time.perf_counter()
+        transactions = parser.parse_payslip(path)
+        latencies.append(time.perf_counter() - start)
+
+        pages += spec["pages"]
+        lines += spec["lines"]
+        results.append(transactions)
+
+    elapsed = sum(latencies)
+    return results, {
+        "files": args.files,
+        "pages_per_sec": pages / elapsed,
+        "lines_per_sec": lines / elapsed,
+        **latency_stats(latencies),
+        "peak_rss_bytes": peak_rss_bytes(),
+    }
+
+
+def bench_formatters(transactions, rows):
+    """Time each formatter writing rows transactions to an in-memory stream."""
+    # Repeat the parsed transactions up to the requested row count
+    rows = [transactions[i % len(transactions)] for i in range(rows)]
+    stats = {}
+
+    for name, formatter in FORMATTERS.items():
+        start = time.perf_counter()
+        formatter.write(rows, io.StringIO())
+        elapsed = time.perf_counter() - start
+        stats[name] = {"rows": len(rows), "rows_per_sec": len(rows) / elapsed}
+
+    stats["peak_rss_bytes"] = peak_rss_bytes()
+    return stats
+
+
+def _response(status_code, data):
+    response = MagicMock()
+    response.status_code = status_code
+    response.json.return_value = {"data": data}
+    return response
+
+class FakeYNABSession:
+    """Stands in for requests.Session, answering the YNAB endpoints the handler calls."""
+
+    def __init__(self, categories, payee):
+        groups = {}
+        for category in categories:
+            group, _, name = category.partition(":")
+            groups.setdefault(group, []).append({"id": f"category-{category}", "name": name or group})
+        self.categories = {
+            "server_knowledge": 1,
+            "category_groups": [
+                {"id": f"group-{group}", "name": group, "categories": entries} for group, entries in groups.items()
+            ],
+        }
+        self.payees = {"server_knowledge": 1, "payees": [{"id": "payee-1", "name": payee}]}
+
+    def get(self, url, **kwargs):
+        if url.endswith("/categories"):
+            return _response(200, self.categories)
+        if url.endswith("/payees"):
+            return _response(200, self.payees)
+        return _response(200, {"account": {"id": url.rsplit("/", 1)[-1]}})
+
+    def post(self, url, json=None, **kwargs):
+        ids = [txn["import_id"] for txn in json["transactions"]]
+        return _response(201, {"transaction_ids": ids, "server_knowledge": 1})
+
+    def close(self):
+        pass
+
+def cli_import_us():
+    """Cumulative microseconds `python -X importtime` reports for importing payslip2budget.cli."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import payslip2budget.cli"],
+        capture_output=True, text=True, check=True
+    )
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and line.rstrip().endswith("| payslip2budget.cli"):
+            return int(line.split("|")[1])
+    raise RuntimeError("payslip2budget.cli missing from -X importtime output")
+
+def bench_startup(runs=5):
+    """Time a cold import of the CLI in fresh interpreters."""
+    times = [cli_import_us() for _ in range(runs)]
+    # The best run keeps scheduler noise out of the figure
+    return {"cli_import_ms": min(times) / 1000, "runs": runs}
+
+def bench_ynab(results, workdir):
+    """Time YNABAPIHandler.send_transactions per payslip against a fake transport."""
+    from payslip2budget.exporters.apihandlers.ynab import YNABAPIHandler
+
+    handler = YNABAPIHandler({
+        "api_key": "benchmark",
+        "budget_id": "budget",
+        "account_id": "account",
+        "catalog_dir": f"{workdir}/catalog",
+        # Never let the limiter sleep
+        "rate_limit": 10 ** 9,
+    })
+    categories = {txn["Category"] for transactions in results for txn in transactions if txn["Category"]}
+    handler.session = FakeYNABSession(categories, "Employer")
+
+    latencies = []
+    count = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        for transactions in results:
+            start = time.perf_counter()
+            handler.send_transactions(transactions)
+            latencies.append(time.perf_counter() - start)
+            count += len(transactions)
+
+    return {
+        "transactions_per_sec": count / sum(latencies),
+        **latency_stats(latencies),
+        "peak_rss_bytes": peak_rss_bytes(),
+    }
+
+
+def compare(results, baseline):
+    """Print each throughput in results as a ratio of the same one in baseline."""
+    def throughputs(section, prefix=""):
+        for key, value in section.items():
+            if isinstance(value, dict):
+                yield from throughputs(value, f"{prefix}{key}.")
+            elif key.endswith("_per_sec"):
+                yield f"{prefix}{key}", value
+
+    old = dict(throughputs(baseline["results"]))
+    for name, value in throughputs(results["results"]):
+        if name in old:
+            print(f"{name}: {value:,.1f} ({value / old[name]:.2f}x baseline)", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark payslip parsing, formatting and YNAB export.")
+    parser.add_argument("--files", type=int, default=20, help="Number of synthetic payslips to parse")
+    parser.add_argument("--pages", type=int, default=2, help="Pages per payslip")
+    parser.add_argument("--lines", type=int, default=50, help="Text lines per page")
+    parser.add_argument("--density", type=float, default=0.4, help="Fraction of lines that are deduction items")
+    parser.add_argument("--extractor", default="pdfplumber", help="PDF text extraction backend to benchmark")
+    parser.add_argument("--rows", type=int, default=100_000, help="Transactions written per formatter")
+    parser.add_argument("--output", default="-", help="Path for the JSON results, '-' for stdout")
+    parser.add_argument("--compare", default=None, help="Earlier results JSON to compare throughput against")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="payslip2budget-bench-")
+    try:
+        parsed, parse_stats = bench_parse(workdir, args)
+        transactions = [txn for transactions in parsed for txn in transactions]
+        results = {
+            "parse": parse_stats,
+            "formatters": bench_formatters(transactions, args.rows),
+            "ynab": bench_ynab(parsed, workdir),
+            "startup": bench_startup(),
+        }
+    finally:
+        shutil.rmtree(workdir)
+
+    try:
+        version = metadata.version("payslip2budget")
+    except metadata.PackageNotFoundError:
+        version = None
+    report = {
+        "version": version,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": vars(args),
+        "results": results,
+    }
+
+    if args.output == "-":
+        print(json.dumps(report, indent=2))
+    else:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import random
+from datetime import date
+
+# Item names that the default category mappings pick up, and lines they ignore
+ITEM_NAMES = [
+    "Social Security Tax", "Medicare Tax", "Withholding Tax", "401(k)", "Roth 401(k)",
+    "Dental", "Medical", "Vision", "Life Insurance", "Accident Insurance",
+    "Hospital Indemnity", "HSA", "MetLifeLegal",
+]
+FILLER_LINES = [
+    "Regular 10.00 32.00 320.00 16,640.00",
+    "Overtime 15.00 1.00 15.00 780.00",
+    "Vac Hrs 40.00",
+    "Sick Hrs 16.00",
+    "EFFECTIVE THIS PAY PERIOD YOUR REGULAR HOURLY RATE HAS CHANGED",
+    "ACME SUPPLIES CORP. 475 KNAPP AVENUE ANYTOWN, USA 10101",
+    "Net Pay $ 291.90",
+]
+
+PAGE_WIDTH = 612
+PAGE_HEIGHT = 792
+FONT_SIZE = 9
+LEADING = 12
+
+def payslip_lines(pages=1, lines_per_page=40, keyword_density=0.5, check_date=None, seed=0):
+    """
+    Build the text of an ADP-style payslip.
+
+    Args:
+        pages: Number of pages
+        lines_per_page: Text lines on each page, including the header on the first page
+        keyword_density: Fraction of body lines that are deduction items
+        check_date: Check date printed on the first page (default: today)
+        seed: Seed for the item, amount and layout choices
+
+    Returns:
+        (pages of lines, number of item lines)
+    """
+    rng = random.Random(seed)
+    check_date = check_date or date.today()
+    header = [
+        "Earnings Statement",
+        f"Check Date: {check_date:%m/%d/%Y}",
+        "Deductions Statutory",
+    ]
+
+    result = []
+    items = 0
+    for page in range(pages):
+        lines = list(header) if page == 0 else []
+        while len(lines) < lines_per_page:
+            if rng.random() < keyword_density:
+                amount = rng.randint(1, 50_000) / 100
+                ytd = amount * rng.randint(2, 26)
+                lines.append(f"{rng.choice(ITEM_NAMES)} {amount:,.2f} {ytd:,.2f}")
+                items += 1
+            else:
+                lines.append(rng.choice(FILLER_LINES))
+        result.append(lines)
+    return result, items
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def write_pdf(path, pages):
+    """Write pages of text lines as a minimal PDF, one Helvetica text line per row."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # The page tree, filled in once the page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    page_ids = []
+    for lines in pages:
+        commands = [f"BT /F1 {FONT_SIZE} Tf {LEADING} TL 36 {PAGE_HEIGHT - 36} Td"]
+        commands += [f"({_escape(line)}) Tj T*" for line in lines]
+        commands.append("ET")
+        stream = "\n".join(commands).encode("latin-1")
+
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        objects.append((
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>"
+        ).encode("latin-1"))
+        page_ids.append(len(objects))
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode("latin-1")
+
+    offsets = []
+    output = bytearray(b"%PDF-1.4\n")
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+
+    with open(path, "wb") as f:
+        f.write(output)
+
+def generate_payslip(path, pages=1, lines_per_page=40, keyword_density=0.5, check_date=None, seed=0):
+    """
+    Write a synthetic payslip PDF to path.
+
+    Returns:
+        Dict with the number of pages, text lines and deduction item lines written
+    """
+    text, items = payslip_lines(pages, lines_per_page, keyword_density, check_date, seed)
+    write_pdf(path, text)
+    return {"pages": pages, "lines": sum(len(lines) for lines in text), "items": items}
@@ -0,0 +1,136 @@
+import glob
+import os
+from dataclasses import dataclass, field
+from typing import Optional
+from payslip2budget.cache import ParseCache
+from payslip2budget.instrumentation import StageProfile, add_hook
+from payslip2budget.parsers.registry import ParserDispatcher
+
+GLOB_CHARS = "*?["
+
+@dataclass
+class PayslipResult:
+    path: str
+    transactions: list = field(default_factory=list)
+    error: Optional[str] = None
+    cache_hit: Optional[bool] = None  # None when caching is disabled
+    pages_total: Optional[int] = None  # Page counts are only known when pages were pruned
+    pages_skipped: Optional[int] = None
+    profile: Optional[dict] = None  # StageProfile snapshot, when profiling in a worker process
+    pages: Optional[list] = None  # 0-based pages parsed, when the payslip is one stub of a register
+
+    @property
+    def name(self) -> str:
+        if self.pages is None:
+            return self.path
+        return f"{self.path} (pages {self.pages[0] + 1}-{self.pages[-1] + 1})"
+
+    @property
+    def check_date(self) -> str:
+        # The offset rows come last and always carry the final check date
+        return self.transactions[-1]["Date"] if self.transactions else ""
+
+    def sort_key(self):
+        return (self.check_date, self.path)
+
+
+def is_batch_input(spec: str) -> bool:
+    """Return True when the input names a directory or a glob rather than a single PDF."""
+    # An existing file is taken literally, even when its name has glob characters ("pay[1].pdf")
+    if os.path.isfile(spec):
+        return False
+    return os.path.isdir(spec) or any(char in spec for char in GLOB_CHARS)
+
+
+def collect_inputs(spec: str) -> list[str]:
+    """
+    Expand a directory or glob pattern into a sorted list of PDF paths.
+
+    Args:
+        spec: Directory containing payslips, a glob pattern, or a single file path
+    """
+    if os.path.isfile(spec):
+        paths = [spec]
+    elif os.path.isdir(spec):
+        paths = [
+            os.path.join(spec, name) for name in os.listdir(spec)
+            if name.lower().endswith(".pdf")
+        ]
+    elif any(char in spec for char in GLOB_CHARS):
+        paths = glob.glob(spec, recursive=True)
+    else:
+        paths = [spec]
+
+    return sorted(path for path in paths if os.path.isfile(path))
+
+
+# Each worker process builds its parsers once and reuses them for every file it is handed
+_worker_parsers = None
+_worker_profile = None
+
+def _init_worker(category_config, payee, cache_dir=None, parser_options=None, profile=False):
+    global _worker_parsers, _worker_profile
+    cache = ParseCache(cache_dir) if cache_dir else None
+    _worker_parsers = ParserDispatcher(category_config, payee, cache, **(parser_options or {}))
+    if profile:
+        # Spans in a worker never reach the parent's hooks, so each result carries its own
+        _worker_profile = StageProfile()
+        add_hook(_worker_profile)
+
+def _parse_one(path: str, pages=None) -> PayslipResult:
+    # path may also be a PdfSource, for a register parsed in this process; results carry its name
+    cache = _worker_parsers.cache
+    try:
+        hits = cache.hits if cache else 0
+        parser = _worker_parsers.parser_for(path)
+        transactions = parser.parse_payslip(path, pages=pages)
+        return PayslipResult(str(path), transactions, cache_hit=cache.hits > hits if cache else None,
+                             pages_total=parser.pages_total,
+                             pages_skipped=parser.pages_skipped,
+                             profile=_take_profile(), pages=pages)
+    except Exception as e:
+        # Report the failure and let the rest of the batch carry on
+        return PayslipResult(str(path), error=f"{type(e).__name__}: {e}", profile=_take_profile(), pages=pages)
+
+def _take_profile():
+    if _worker_profile is None:
+        return None
+    snapshot = _worker_profile.to_dict()
+    _worker_profile.reset()
+    return snapshot
+
+
+def parse_batch(paths, category_config=None, payee="Employer", workers=None, cache_dir=None,
+                profile=False, **parser_options) -> list[PayslipResult]:
+    """
+    Parse many payslips, fanning the work out across a process pool.
+
+    Args:
+        paths: Iterable of PDF paths
+        category_config: Category configuration passed to each parser
+        payee: Payee name passed to each parser
+        workers: Number of worker processes (default: CPU count). With one worker,
+                 or a single file, parsing runs in this process.
+        cache_dir: Directory of the parse cache shared by the workers (default: no cache)
+        profile: Have worker processes return their stage timings on each PayslipResult.
+                 Parsing in this process reports to this process's hooks instead.
+        parser_options: Further parser options (parser, extractor, prune, page_spec)
+
+    Returns:
+        List of PayslipResult ordered by check date, then path
+    """
+    paths = list(paths)
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(paths) <= 1:
+        _init_worker(category_config, payee, cache_dir, parser_options)
+        results = [_parse_one(path) for path in paths]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        workers = min(workers, len(paths))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(category_config, payee, cache_dir, parser_options, profile)) as executor:
+            results = list(executor.map(_parse_one, paths))
+
+    return sorted(results, key=PayslipResult.sort_key)
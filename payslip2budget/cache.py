@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+import tempfile
+from payslip2budget.source import as_source
+
+# Bump this whenever a parser change would alter the transactions produced for the same PDF
+CACHE_VERSION = 3
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "payslip2budget"
+)
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+def file_digest(path):
+    """Return the SHA-256 hex digest of a file's content; path may also be a PdfSource, bytes or a stream."""
+    return as_source(path).digest()
+
+
+class ParseCache:
+    """
+    On-disk cache of parse results keyed by PDF content and parser settings.
+
+    Each entry is a JSON file named after its key. Reading an entry refreshes its
+    modification time, and once the directory grows past max_bytes the least
+    recently used entries are removed first.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def fingerprint(*settings):
+        """Hash the settings that change what the parser produces for a given PDF."""
+        settings = json.dumps([CACHE_VERSION, *settings], sort_keys=True)
+        return hashlib.sha256(settings.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def key(pdf_path, fingerprint):
+        """Combine the SHA-256 of the PDF's content with a settings fingerprint."""
+        return f"{file_digest(pdf_path)}-{fingerprint[:16]}"
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, *keys):
+        """Return the cached transactions of the first of keys with an entry, or None on a miss."""
+        for key in keys:
+            path = self._entry_path(key)
+            try:
+                with open(path, "r") as f:
+                    transactions = json.load(f)
+            except (IOError, ValueError):
+                continue
+
+            try:
+                # Mark the entry as recently used
+                os.utime(path)
+            except OSError:
+                pass
+
+            self.hits += 1
+            return transactions
+
+        self.misses += 1
+        return None
+
+    def put(self, key, transactions):
+        """Store transactions under key, then evict old entries if over the size limit."""
+        # Write to a temporary file first so concurrent readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(transactions, f)
+            os.replace(tmp_path, self._entry_path(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        total = 0
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                # Another process evicted it first
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
@@ -1,49 +1,329 @@
 import argparse
+import json
+import os
 import sys
-from payslip2budget.parsers.adp import PayslipParser
-from payslip2budget.formatters import ynab, mint, everydollar, monarch
-from payslip2budget.exporters.exporter import TransactionExporter
-
-FORMATTERS = {
-    "ynab": ynab.format,
-    "mint": mint.format,
-    "everydollar": everydollar.format,
-    "monarch": monarch.format,
-}
-
-def main():
-    parser = argparse.ArgumentParser(description="Convert payslip PDF to budget transactions.")
-    parser.add_argument("input", help="Path to the input PDF payslip")
+import time
+from collections import Counter
+from payslip2budget.parsers.registry import PARSERS, ParserDispatcher
+from payslip2budget.parsers.extractors import EXTRACTORS
+from payslip2budget.parsers.templates import DEFAULT_TEMPLATE_DIR
+from payslip2budget.cache import ParseCache, DEFAULT_CACHE_DIR
+from payslip2budget.batch import PayslipResult, is_batch_input, collect_inputs, parse_batch
+from payslip2budget.formatters import FORMATTERS
+from payslip2budget.instrumentation import StageProfile, add_hook, remove_hook, span, count
+
+# The PDF libraries and the HTTP stack are only imported on the paths that use
+# them, so --help and argument errors stay fast; tests/test_startup.py checks
+# they stay out of sys.modules and benchmarks/run.py times the import.
+
+def memory_options(args):
+    """Parser options for --low-memory and --max-rss."""
+    max_rss = None if args.max_rss is None else args.max_rss * 2**20
+    return {"low_memory": args.low_memory or max_rss is not None, "max_rss": max_rss}
+
+def summary_main(argv):
+    parser = argparse.ArgumentParser(prog="payslip2budget summary",
+                                     description="Total a payslip history by category and month, and check it against the payslips' YTD amounts.")
+    parser.add_argument("input", help="Path to a PDF payslip, or a directory/glob of payslips")
+    parser.add_argument("output", help="Path to the report CSV, '-' for stdout", nargs="?", default="-")
+    parser.add_argument("--categories", help="Path to custom categories JSON file", default=None)
+    parser.add_argument("--payee", help="Payee", default="Employer")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes (default: CPU count)")
+    parser.add_argument("--cache-dir", help=f"Directory for cached parse results (default: {DEFAULT_CACHE_DIR})", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--no-cache", action="store_true", help="Always parse the PDFs instead of reusing cached results")
+    parser.add_argument("--parser", help="Payslip layout, 'auto' detects it for each PDF", choices=[*PARSERS, "auto"], default="auto")
+    parser.add_argument("--extractor", help="PDF text extraction backend", choices=[*EXTRACTORS, "auto"], default="pdfplumber")
+    args = parser.parse_intermixed_args(argv)
+
+    try:
+        from payslip2budget.summary import PayslipSummary, write_report
+    except ImportError:
+        parser.error("the summary report needs NumPy, install it with 'pip install payslip2budget[summary]'")
+    from payslip2budget.formatters.stream import open_output
+
+    paths = collect_inputs(args.input)
+    if not paths:
+        parser.error(f"no PDF files found for '{args.input}'")
+
+    transactions = []
+    failed = 0
+    cache_dir = None if args.no_cache else args.cache_dir
+    for result in parse_batch(paths, args.categories, args.payee, args.workers, cache_dir,
+                              parser=args.parser, extractor=args.extractor):
+        if result.error:
+            print(f"[ERROR] Failed to parse {result.path}: {result.error}", file=sys.stderr)
+            failed += 1
+        else:
+            transactions.extend(result.transactions)
+
+    with open_output(args.output) as stream:
+        mismatches = write_report(PayslipSummary(transactions), stream)
+    if mismatches:
+        print(f"[WARN] {mismatches} items do not add up to the YTD amount on their payslip", file=sys.stderr)
+
+    if failed:
+        print(f"[WARN] {failed} of {len(paths)} payslips failed to parse", file=sys.stderr)
+        sys.exit(1)
+
+def watch_main(argv):
+    parser = argparse.ArgumentParser(prog="payslip2budget watch",
+                                     description="Watch a directory and parse and export each new or changed payslip as it arrives.")
+    parser.add_argument("directory", help="Directory the payroll system drops payslip PDFs into")
+    parser.add_argument("--output-dir", help="Write each payslip's transactions to <name>.csv in this directory", default=None)
+    parser.add_argument("--format", help="Output format for --output-dir", choices=FORMATTERS.keys(), default="ynab")
+    parser.add_argument("--api-config", help="Path to API configuration file; each payslip is exported to the API", default=None)
+    parser.add_argument("--dry-run", action="store_true", help="Run in dry-run mode without making changes")
+    parser.add_argument("--categories", help="Path to custom categories JSON file", default=None)
+    parser.add_argument("--payee", help="Payee", default="Employer")
+    parser.add_argument("--parser", help="Payslip layout, 'auto' detects it for each PDF", choices=[*PARSERS, "auto"], default="auto")
+    parser.add_argument("--extractor", help="PDF text extraction backend", choices=[*EXTRACTORS, "auto"], default="pdfplumber")
+    parser.add_argument("--templates", action="store_true", help="Read items by the column positions learned for each payslip layout")
+    parser.add_argument("--low-memory", action="store_true", help="Release each page before reading the next, so memory stays flat on very long PDFs")
+    parser.add_argument("--max-rss", type=int, default=None, metavar="MIB", help="Stop parsing a PDF once resident memory passes this many MiB; implies --low-memory")
+    parser.add_argument("--template-dir", help=f"Directory for learned column templates (default: {DEFAULT_TEMPLATE_DIR})", default=DEFAULT_TEMPLATE_DIR)
+    parser.add_argument("--cache-dir", help=f"Directory for cached parse results (default: {DEFAULT_CACHE_DIR})", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--no-cache", action="store_true", help="Always parse the PDFs instead of reusing cached results")
+    parser.add_argument("--state", help="File recording the payslips already processed (default: under the cache directory)", default=None)
+    parser.add_argument("--debounce", type=float, default=2.0, help="Seconds a file must stay unchanged before it is parsed (default: 2)")
+    parser.add_argument("--poll-interval", type=float, default=5.0, help="Seconds between scans when inotify is unavailable (default: 5)")
+    parser.add_argument("--polling", action="store_true", help="Scan the directory periodically even where inotify is available")
+    parser.add_argument("--once", action="store_true", help="Process what is waiting, then exit")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.directory):
+        parser.error(f"'{args.directory}' is not a directory")
+    if not args.output_dir and not args.api_config:
+        parser.error("one of --output-dir or --api-config is required")
+
+    from payslip2budget.watch import FolderWatcher, run_watch
+
+    # The parsers, their cache and the exporter's HTTP session stay warm for the whole run
+    cache = None if args.no_cache else ParseCache(args.cache_dir)
+    parsers = ParserDispatcher(args.categories, args.payee, cache, parser=args.parser, extractor=args.extractor,
+                               template_dir=args.template_dir if args.templates else None,
+                               **memory_options(args))
+    exporter = None
+    if args.api_config:
+        from payslip2budget.exporters.exporter import TransactionExporter
+        exporter = TransactionExporter(config_path=args.api_config, dry_run=args.dry_run)
+    formatter = FORMATTERS[args.format]
+
+    def handle(path):
+        transactions = parsers.parser_for(path).parse_payslip(path)
+        print(f"[INFO] Parsed {len(transactions)} transactions from {path}", file=sys.stderr)
+        if args.output_dir:
+            from payslip2budget.formatters.stream import open_output
+
+            name = os.path.splitext(os.path.basename(path))[0] + ".csv"
+            with open_output(os.path.join(args.output_dir, name)) as stream:
+                formatter.write(transactions, stream)
+        if exporter is not None:
+            exporter.export(transactions, destination="api")
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+    watcher = FolderWatcher(args.directory, args.state, args.debounce, args.poll_interval,
+                            use_inotify=not args.polling)
+    mode = "inotify" if watcher.inotify is not None else f"polling every {args.poll_interval:g}s"
+    print(f"[INFO] Watching {args.directory} ({mode})", file=sys.stderr)
+    try:
+        run_watch(watcher, handle, once=args.once)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+        if exporter is not None:
+            exporter.close()
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["summary"]:
+        return summary_main(argv[1:])
+    if argv[:1] == ["watch"]:
+        return watch_main(argv[1:])
+
+    parser = argparse.ArgumentParser(description="Convert payslip PDF to budget transactions. Run 'payslip2budget summary -h' for the history report, or 'payslip2budget watch -h' to ingest a folder continuously.")
+    parser.add_argument("input", help="Path to the input PDF payslip, '-' to read it from stdin, or a directory/glob of payslips for batch mode")
     parser.add_argument("output", help="Path to the output file (e.g. 'output.csv'), '-' for stdout. Omit this when using '--api-config'", nargs="?", default="output.csv")
     parser.add_argument("--format", help="Output format, ignored when using --api-config", choices=FORMATTERS.keys(), default="ynab")
     parser.add_argument("--categories", help="Path to custom categories JSON file", default=None)
     parser.add_argument("--payee", help="Payee", default="Employer")
     parser.add_argument("--api-config", help="Path to API configuration file. If set, output is sent to the API and the output arg is ignored.", default=None)
     parser.add_argument("--dry-run", action="store_true", help="Run in dry-run mode without making changes")
+    parser.add_argument("--refresh-catalog", action="store_true", help="Re-download the budget's categories and payees instead of syncing the stored copy")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes used in batch mode (default: CPU count)")
+    parser.add_argument("--cache-dir", help=f"Directory for cached parse results (default: {DEFAULT_CACHE_DIR})", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--parser", help="Payslip layout. 'auto' detects it for each PDF from its metadata and first-page header", choices=[*PARSERS, "auto"], default="auto")
+    parser.add_argument("--extractor", help="PDF text extraction backend. 'auto' uses the first backend, in a fixed order, whose items match pdfplumber's on every page, remembered per layout", choices=[*EXTRACTORS, "auto"], default="pdfplumber")
+    parser.add_argument("--templates", action="store_true", help="Read items by the column positions learned for each payslip layout")
+    parser.add_argument("--low-memory", action="store_true", help="Release each page before reading the next, so memory stays flat on very long PDFs")
+    parser.add_argument("--max-rss", type=int, default=None, metavar="MIB", help="Stop parsing a PDF once resident memory passes this many MiB; implies --low-memory")
+    parser.add_argument("--template-dir", help=f"Directory for learned column templates (default: {DEFAULT_TEMPLATE_DIR})", default=DEFAULT_TEMPLATE_DIR)
+    parser.add_argument("--split-stubs", action="store_true", help="Treat the input PDF as a payroll register and parse every employee's stub as a payslip of its own")
+    parser.add_argument("--page-workers", type=int, default=None, help="Extract the pages of each long PDF in this many worker processes")
+    parser.add_argument("--prune", action="store_true", help="Skip pages that a quick text probe finds no deduction or check date lines on")
+    parser.add_argument("--page-spec", help="Path to a JSON page/region spec limiting which parts of each PDF are extracted", default=None)
+    parser.add_argument("--no-cache", action="store_true", help="Always parse the PDFs instead of reusing cached results")
+    parser.add_argument("--buffer-size", type=int, default=64 * 1024, help="Bytes of formatted output buffered between writes (default: 65536)")
+    parser.add_argument("--gzip", action="store_true", help="Gzip the formatted output; implied when the output path ends in '.gz'")
+    parser.add_argument("--pipeline", action="store_true", help="In batch mode with --api-config, upload parsed payslips while the rest are still parsing")
+    parser.add_argument("--profile", action="store_true", help="Print the time spent in each stage and counts of pages, lines, tokens, matches and HTTP bytes to stderr as JSON")
+    parser.add_argument("--profile-output", help="Write cProfile statistics of this process to the given file", default=None)
+
+    # Intermixed parsing so the optional output positional can follow other options
+    args = parser.parse_intermixed_args(argv)
 
-    args = parser.parse_args()
+    # Spans cost next to nothing until a hook is installed, so only install one when asked
+    stage_profile = None
+    if args.profile:
+        stage_profile = StageProfile()
+        add_hook(stage_profile)
+    profiler = None
+    if args.profile_output:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
 
-    # Parse transctions from the payslip
-    adp = PayslipParser(args.categories, args.payee)
-    transactions = adp.parse_payslip(args.input)
+    start = time.perf_counter()
+    try:
+        failed, total = convert(args, parser, argv, stage_profile)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile_output)
+        if stage_profile is not None:
+            remove_hook(stage_profile)
+            report = {"seconds": time.perf_counter() - start, **stage_profile.to_dict()}
+            print(json.dumps(report, indent=2), file=sys.stderr)
+
+    if failed:
+        print(f"[WARN] {failed} of {total} payslips failed to parse", file=sys.stderr)
+        sys.exit(1)
+
+def make_exporter(args, argv):
+    if "--format" in argv:
+        print(f"[WARN] Format is ignored when using an api-config")
+
+    from payslip2budget.exporters.exporter import TransactionExporter
+
+    return TransactionExporter(config_path=args.api_config, dry_run=args.dry_run,
+                               refresh_catalog=args.refresh_catalog)
+
+def payslip_rows(results, totals, failed, stage_profile=None):
+    """
+    Yield the transactions of each PayslipResult in turn, reporting failures as they come.
+
+    Payslip, row, cache and page counts are added up in totals, and the names of
+    payslips that failed to parse appended to failed. Each result's transactions are
+    dropped once yielded, so a written-out payslip no longer holds memory.
+    """
+    for result in results:
+        totals["payslips"] += 1
+        if result.profile:
+            # Timings taken in a worker process
+            stage_profile.merge(result.profile)
+        if result.cache_hit is not None:
+            totals["hits" if result.cache_hit else "misses"] += 1
+        if result.pages_total is not None:
+            totals["pages_total"] += result.pages_total
+            totals["pages_skipped"] += result.pages_skipped or 0
+        if result.error:
+            print(f"[ERROR] Failed to parse {result.name}: {result.error}", file=sys.stderr)
+            failed.append(result.name)
+            continue
+
+        totals["rows"] += len(result.transactions)
+        yield from result.transactions
+        result.transactions = []
+
+def convert(args, parser, argv, stage_profile=None):
+    """
+    Parse the input and write or export its transactions.
+
+    Returns:
+        (number of payslips that failed to parse, number of payslips)
+    """
+    cache_dir = None if args.no_cache else args.cache_dir
+    parser_options = {"parser": args.parser, "extractor": args.extractor, "prune": args.prune, "page_spec": args.page_spec,
+                      "template_dir": args.template_dir if args.templates else None, "page_workers": args.page_workers,
+                      **memory_options(args)}
+
+    if args.split_stubs and is_batch_input(args.input):
+        parser.error("--split-stubs takes a single PDF, not a directory or glob")
+
+    failed = []
+    exported = False
+    if args.split_stubs:
+        from payslip2budget.register import parse_register
+        from payslip2budget.source import as_source
+
+        # Every employee's stub is parsed as a payslip of its own. Stubs arrive in page
+        # order, so each is written out while the rest are still parsing.
+        results = (result for _, result in parse_register(as_source(args.input), args.categories, args.payee,
+                                                          args.workers, cache_dir, profile=stage_profile is not None,
+                                                          **parser_options))
+    elif is_batch_input(args.input):
+        paths = collect_inputs(args.input)
+        if not paths:
+            parser.error(f"no PDF files found for '{args.input}'")
+
+        # Parse every payslip in the batch, ordered by check date then path
+        if args.pipeline and args.api_config is not None:
+            import asyncio
+            from payslip2budget.pipeline import parse_and_export
+
+            # Upload each group of parsed payslips while the next ones parse
+            exporter = make_exporter(args, argv)
+            try:
+                results = asyncio.run(parse_and_export(paths, exporter, args.categories, args.payee, args.workers,
+                                                       cache_dir, profile=stage_profile is not None,
+                                                       **parser_options))
+            finally:
+                exporter.close()
+            exported = True
+        else:
+            results = parse_batch(paths, args.categories, args.payee, args.workers, cache_dir,
+                                  profile=stage_profile is not None, **parser_options)
+    else:
+        from payslip2budget.source import as_source
+
+        # Parse transctions from the payslip; stdin is read once and shared by layout detection and parsing
+        source = as_source(args.input)
+        cache = ParseCache(cache_dir) if cache_dir else None
+        adp = ParserDispatcher(args.categories, args.payee, cache, **parser_options).parser_for(source)
+        transactions = adp.parse_payslip(source)
+        results = [PayslipResult(args.input, transactions, cache_hit=cache.hits > 0 if cache else None,
+                                 pages_total=adp.pages_total, pages_skipped=adp.pages_skipped)]
+
+    totals = Counter()
+    rows = payslip_rows(results, totals, failed, stage_profile)
 
     # Handle output
     if args.api_config is not None:
-        if "--format" in sys.argv:
-            print(f"[WARN] Format is ignored when using an api-config")
-
-        exporter = TransactionExporter(config_path=args.api_config, dry_run=args.dry_run)
-        exporter.export(transactions, destination="api")
+        if exported:
+            # The pipeline has already exported everything it parsed, only tally the results
+            for _ in rows:
+                pass
+        else:
+            exporter = make_exporter(args, argv)
+            exporter.export(list(rows), destination="api")
         # args.output is unused so it doesn't matter what the value us
     else:
+        from payslip2budget.formatters.stream import open_output
+
+        # Rows are written as they are formatted, straight to the file or stdout
         formatter = FORMATTERS[args.format]
-        formatted_output = formatter(transactions)
+        with open_output(args.output, args.buffer_size, args.gzip or None) as stream, span("format"):
+            formatter.write(rows, stream)
+        count("rows", totals["rows"])
 
-        if args.output == "-":
-            print(formatted_output)
-        else:
-            with open(args.output, "w") as f:
-                f.write(formatted_output)
+    if cache_dir and args.profile:
+        print(f"[INFO] Parse cache: {totals['hits']} hits, {totals['misses']} misses", file=sys.stderr)
+    if args.prune or args.page_spec:
+        # Cache hits are not counted, they never open the PDF
+        print(f"[INFO] Skipped {totals['pages_skipped']} of {totals['pages_total']} pages", file=sys.stderr)
+
+    return len(failed), totals["payslips"]
 
 if __name__ == "__main__":
     main()
@@ -5,3 +5,19 @@ class APIHandlerBase:
 
     def send_transactions(self, transactions):
         raise NotImplementedError("This method should be implemented by subclasses.")
+
+    async def send_transactions_async(self, transactions):
+        """
+        Awaitable send_transactions for the asyncio export pipeline.
+
+        By default the blocking send runs in a worker thread, which is enough to let
+        parsing carry on during the HTTP waits. Handlers with a native async client can
+        override this.
+        """
+        import asyncio
+
+        return await asyncio.to_thread(self.send_transactions, transactions)
+
+    def close(self):
+        """Release any connections held by the handler."""
+        pass
@@ -0,0 +1,94 @@
+import json
+import os
+import tempfile
+import time
+from payslip2budget.cache import DEFAULT_CACHE_DIR
+
+DEFAULT_CATALOG_DIR = os.path.join(DEFAULT_CACHE_DIR, "ynab")
+
+class YNABCatalog:
+    """
+    On-disk copy of a budget's categories and payees.
+
+    Each resource is stored in its own JSON file with the server_knowledge of the
+    last sync, so the next sync can ask YNAB for changes only. Entries younger than
+    ttl seconds are used as they are, without contacting the API.
+    """
+
+    def __init__(self, budget_id, catalog_dir=DEFAULT_CATALOG_DIR, ttl=0):
+        self.budget_id = budget_id
+        self.catalog_dir = catalog_dir
+        self.ttl = ttl
+
+    def _path(self, resource):
+        return os.path.join(self.catalog_dir, f"{self.budget_id}-{resource}.json")
+
+    def load(self, resource):
+        """Return the stored entry for resource, or None if there is none."""
+        try:
+            with open(self._path(resource), "r") as f:
+                return json.load(f)
+        except (IOError, ValueError):
+            return None
+
+    def is_fresh(self, entry):
+        return entry is not None and time.time() - entry.get("fetched_at", 0) < self.ttl
+
+    def save(self, resource, entry):
+        """Store entry for resource, stamped with the current time."""
+        entry = {**entry, "fetched_at": time.time()}
+        os.makedirs(self.catalog_dir, exist_ok=True)
+
+        # Write to a temporary file first so a concurrent run never reads a partial catalog
+        fd, tmp_path = tempfile.mkstemp(dir=self.catalog_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self._path(resource))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+def merge_category_groups(groups, changes, delta):
+    """
+    Apply category_groups from a YNAB response to stored groups.
+
+    Groups are stored as {group_id: {"name": str, "categories": {category_id: name}}}.
+    A full response replaces everything it lists; a delta response only carries
+    changed entries, and entries marked deleted are removed.
+    """
+    groups = {group_id: {"name": group["name"], "categories": dict(group["categories"])}
+              for group_id, group in groups.items()} if delta else {}
+
+    for change in changes:
+        if delta and change.get("deleted"):
+            groups.pop(change["id"], None)
+            continue
+
+        group = groups.setdefault(change["id"], {"name": change["name"], "categories": {}})
+        group["name"] = change["name"]
+
+        for category in change.get("categories", []):
+            if delta:
+                # A category moved to another group is listed under its new group only
+                for other in groups.values():
+                    other["categories"].pop(category["id"], None)
+            if not (delta and category.get("deleted")):
+                group["categories"][category["id"]] = category["name"]
+
+    return groups
+
+
+def merge_payees(payees, changes, delta):
+    """Apply payees from a YNAB response to stored {payee_id: name}, like merge_category_groups."""
+    payees = dict(payees) if delta else {}
+
+    for change in changes:
+        if delta and change.get("deleted"):
+            payees.pop(change["id"], None)
+        else:
+            payees[change["id"]] = change["name"]
+
+    return payees
@@ -0,0 +1,229 @@
+import contextlib
+import hashlib
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    # No flock on Windows, where concurrent runs are not kept from overspending the quota
+    fcntl = None
+
+# YNAB allows 200 requests per access token per rolling hour
+DEFAULT_RATE_LIMIT = 200
+DEFAULT_CHUNK_SIZE = 100
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF = 1.0
+
+def _load_json(path, default):
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return default
+
+def _save_json(path, data):
+    # Write to a temporary file first so an interrupted run never leaves a partial state file
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+@contextlib.contextmanager
+def _file_lock(path):
+    # Exclusive lock held by at most one process at a time
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class TokenBucket:
+    """
+    Token-bucket request limiter whose state is saved to disk after every request.
+
+    The bucket holds up to capacity tokens and refills at capacity per period
+    seconds. Because the state outlives the process, back-to-back runs share one
+    hourly quota instead of each assuming a full bucket. Runs at the same time
+    share it too: each update rereads and saves the state under a lock on a file
+    next to it.
+    """
+
+    def __init__(self, state_path, capacity=DEFAULT_RATE_LIMIT, period=3600.0,
+                 clock=time.time, sleep=time.sleep):
+        self.state_path = state_path
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.clock = clock
+        self.sleep = sleep
+        self.lock = threading.Lock()
+        self.lock_path = state_path + ".lock"
+        self._load()
+
+    def _load(self):
+        state = _load_json(self.state_path, {})
+        self.tokens = min(state.get("tokens", self.capacity), self.capacity)
+        self.updated_at = state.get("updated_at", self.clock())
+
+    @contextlib.contextmanager
+    def _update(self):
+        # Another process may have taken tokens since this one last looked
+        with self.lock, _file_lock(self.lock_path):
+            self._load()
+            yield
+            _save_json(self.state_path, {"tokens": self.tokens, "updated_at": self.updated_at})
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def acquire(self):
+        """Take one token, sleeping until one is available."""
+        with self._update():
+            self._refill()
+            if self.tokens < 1:
+                self.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+    def drain(self):
+        """Mark the quota as used up, e.g. after the server answered 429."""
+        with self._update():
+            self._refill()
+            self.tokens = min(self.tokens, 0)
+
+
+class UploadScheduler:
+    """
+    Upload a large list of transactions as a series of rate-limited POSTs.
+
+    Transactions are sent in chunks of chunk_size. A 429 or 5xx response, a
+    dropped connection or a timeout is retried up to max_retries times with jittered exponential backoff, honouring
+    Retry-After when the server sends it. The number of acknowledged chunks is
+    saved after each one, so rerunning the same upload after a failure resumes
+    with the first chunk that was not acknowledged.
+    """
+
+    def __init__(self, post, limiter, progress_path, chunk_size=DEFAULT_CHUNK_SIZE,
+                 max_retries=DEFAULT_MAX_RETRIES, backoff=DEFAULT_BACKOFF, sleep=time.sleep):
+        """
+        Args:
+            post: Callable taking a list of transactions and returning a requests response
+            limiter: TokenBucket acquired before every POST
+            progress_path: JSON file recording acknowledged chunks per upload
+        """
+        self.post = post
+        self.limiter = limiter
+        self.progress_path = progress_path
+        self.chunk_size = chunk_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.sleep = sleep
+
+    def upload_key(self, transactions):
+        """Identify an upload by its content and chunking, so a rerun can resume it."""
+        payload = json.dumps([self.chunk_size, transactions], sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def upload(self, transactions):
+        """
+        Send every chunk not yet acknowledged.
+
+        Returns:
+            List of the JSON bodies of the chunks sent by this call
+        """
+        key = self.upload_key(transactions)
+        progress = _load_json(self.progress_path, {})
+        start = progress.get(key, 0)
+
+        responses = []
+        for index in range(start, len(transactions), self.chunk_size):
+            chunk = transactions[index:index + self.chunk_size]
+            responses.append(self._post_with_retries(chunk))
+
+            progress = _load_json(self.progress_path, {})
+            progress[key] = index + len(chunk)
+            _save_json(self.progress_path, progress)
+
+        # The upload is complete, so there is nothing left to resume
+        progress = _load_json(self.progress_path, {})
+        if progress.pop(key, None) is not None:
+            _save_json(self.progress_path, progress)
+
+        return responses
+
+    def _post_with_retries(self, chunk):
+        import requests
+
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            try:
+                response = self.post(chunk)
+            except (requests.ConnectionError, requests.Timeout):
+                # As transient as a 5xx; a chunk that did arrive is not duplicated on
+                # retry because YNAB skips import ids it already has
+                if attempt == self.max_retries:
+                    raise
+                self.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+                continue
+
+            if response.status_code == 201:
+                return response.json()
+
+            retryable = response.status_code == 429 or response.status_code >= 500
+            if not retryable or attempt == self.max_retries:
+                error_msg = (
+                    f"YNAB API call failed: {response.status_code} - {response.reason}\n"
+                    f"Response body: {response.text}"
+                )
+                raise RuntimeError(error_msg)
+
+            retry_after = self._retry_after(response)
+            if retry_after is not None:
+                self.sleep(retry_after)
+                continue
+
+            if response.status_code == 429:
+                # No hint from the server, so let the limiter pace the retry from an empty bucket
+                self.limiter.drain()
+            # Full jitter keeps retries from many jobs from lining up
+            self.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+
+    @staticmethod
+    def _retry_after(response):
+        try:
+            return float(response.headers["Retry-After"])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+
+def merge_responses(responses):
+    """Combine the JSON bodies of several chunk POSTs into one, concatenating list fields."""
+    if len(responses) == 1:
+        return responses[0]
+
+    merged = {}
+    for response in responses:
+        for field, value in response.get("data", {}).items():
+            if isinstance(value, list):
+                merged.setdefault(field, []).extend(value)
+            else:
+                merged[field] = value
+    return {"data": merged}
@@ -1,12 +1,39 @@
+import hashlib
+import os
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from payslip2budget import instrumentation
 from payslip2budget.models.transaction_base import Transaction
 from payslip2budget.models.ynab_transaction import YNABTransaction
 from payslip2budget.exporters.apihandlers.apihandlerbase import APIHandlerBase
+from payslip2budget.exporters.apihandlers.catalog import (
+    YNABCatalog, DEFAULT_CATALOG_DIR, merge_category_groups, merge_payees
+)
+from payslip2budget.exporters.apihandlers.scheduler import (
+    TokenBucket, UploadScheduler, merge_responses,
+    DEFAULT_RATE_LIMIT, DEFAULT_CHUNK_SIZE, DEFAULT_MAX_RETRIES
+)
 import json
 
+# (connect, read) seconds, overridable with "timeout" in the API config
+DEFAULT_TIMEOUT = (5, 30)
+# Enough connections for the concurrent metadata requests plus the POST
+POOL_SIZE = 4
+
+def _record_http(response):
+    """Count a finished request and the bytes it sent and received, when instrumentation is on."""
+    if not instrumentation.enabled():
+        return
+    body = getattr(response.request, "body", None)
+    instrumentation.count("http.requests")
+    instrumentation.count("http.bytes_sent", len(body) if isinstance(body, (bytes, str)) else 0)
+    content = response.content
+    instrumentation.count("http.bytes_received", len(content) if isinstance(content, bytes) else 0)
+
 # This class is still a WIP and incomplete!
 class YNABAPIHandler(APIHandlerBase):
-    def __init__(self, config, dry_run: bool = False):
+    def __init__(self, config, dry_run: bool = False, refresh_catalog: bool = False):
         super().__init__(config, dry_run)
         self.api_key = self.config.get("api_key")
         self.budget_id = self.config.get("budget_id")
@@ -25,69 +52,116 @@ class YNABAPIHandler(APIHandlerBase):
         if not all([self.api_key, self.budget_id, self.account_id]):
             raise ValueError("Missing required YNAB configuration parameters.")
 
+        timeout = self.config.get("timeout", DEFAULT_TIMEOUT)
+        self.timeout = tuple(timeout) if isinstance(timeout, list) else timeout
+
+        # One keep-alive session so every request after the first reuses its TLS connection
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+        self.session.mount("https://", adapter)
+
+        # Categories and payees are kept on disk between runs and synced with delta requests.
+        # "catalog_ttl" seconds skips the sync for a recent catalog, refresh_catalog forces a full one.
+        self.catalog = YNABCatalog(
+            self.budget_id,
+            self.config.get("catalog_dir", DEFAULT_CATALOG_DIR),
+            self.config.get("catalog_ttl", 0)
+        )
+        self.refresh_catalog = refresh_catalog
+
+        # The request quota belongs to the access token, so its limiter state is shared by
+        # every budget using that token. Upload progress lives next to the catalog.
+        token_hash = hashlib.sha256(self.api_key.encode("utf-8")).hexdigest()[:16]
+        self.limiter = TokenBucket(
+            os.path.join(self.catalog.catalog_dir, f"ratelimit-{token_hash}.json"),
+            self.config.get("rate_limit", DEFAULT_RATE_LIMIT)
+        )
+        self.scheduler = UploadScheduler(
+            self.post_transactions,
+            self.limiter,
+            os.path.join(self.catalog.catalog_dir, f"{self.budget_id}-uploads.json"),
+            chunk_size=self.config.get("chunk_size", DEFAULT_CHUNK_SIZE),
+            max_retries=self.config.get("max_retries", DEFAULT_MAX_RETRIES)
+        )
+
+    @property
+    def ledger_scope(self):
+        """Destination key under which the import ledger records what this handler sent."""
+        return f"ynab:{self.budget_id}:{self.account_id}"
+
+    def close(self):
+        """Close the pooled connections."""
+        self.session.close()
+
     def send_transactions(self, transactions: list[Transaction]):
         """
         Send the list of transactions to API, but first fetch categories and and find
         the ID for categories for each transaction, then check account ID for validity.
         """
-        # Cache categories
-        self.fetch_and_cache_categories()
-        # Create a list of categories used in transactions
-        category_ids = self.extract_category_ids(transactions)
-
-        # Confirm the account is valid
-        self.confirm_account_id_validity()
-
-        # Cache payees
-        self.fetch_and_cache_payees()
+        # The three metadata requests are independent, so issue them together
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            # Cache categories
+            categories = executor.submit(self.fetch_and_cache_categories)
+            # Confirm the account is valid
+            account = executor.submit(self.confirm_account_id_validity)
+            # Cache payees
+            payees = executor.submit(self.fetch_and_cache_payees)
+
+            # Collect them in the original order so the same error wins if several fail
+            categories.result()
+            # Create a list of categories used in transactions
+            category_ids = self.extract_category_ids(transactions)
+            account.result()
+            payees.result()
 
         ynab_transactions = []
         for txn in transactions:
-            category_tuple = self.get_category_tuple(txn["Category"])
-            payee_id = self.get_cached_payee_id(txn["Payee"])
+            # Plain dicts are accepted too; their amounts are converted to cents exactly
+            txn = Transaction.from_dict(txn)
+            category_tuple = self.get_category_tuple(txn.category)
+            payee_id = self.get_cached_payee_id(txn.payee)
 
-            # YNAB expects milliunits, so multiplying the amount by 1000 to get that
-            amount_in_milliunits = int(float(txn["Amount"]) * 1000)
-            # Verifying via print that the amount is correct
-            #print(f"Amount: {txn['Amount']}, Type: {type(amount_in_milliunits)}, Value: {amount_in_milliunits}")
+            # YNAB expects milliunits, and a cent is exactly 10 of them
+            amount_in_milliunits = txn.amount * 10
 
             ynab_txn = YNABTransaction(
-                date=txn["Date"],
-                payee=txn["Payee"],
+                date=txn.date,
+                payee=txn.payee,
                 payee_id=payee_id,
-                memo=txn["Memo"],
+                memo=txn.memo,
                 amount=amount_in_milliunits,
                 account_id=self.account_id,
                 category_id=category_ids[category_tuple[1]],
                 category_name=category_tuple[1],
+                import_id=txn.import_id,
             ).to_api_dict()
 
             ynab_transactions.append(ynab_txn)
 
         #print(ynab_transactions)
-        payload = {"transactions": ynab_transactions}
 
         # THe dryrun still does all the GETs, but returns before the POST so no changes are made
         if self.dry_run:
             print("[DRY RUN] Would send the following transactions:")
-            print(json.dumps(transactions, indent=2))
+            print(json.dumps([dict(txn) for txn in transactions], indent=2))
             return
 
-        response = requests.post(
-            f"{self.base_url}/budgets/{self.budget_id}/transactions",
-            headers=self.headers,
-            json=payload
-        )
-
-        if response.status_code == 201:
-            print("Transactions successfully imported to YNAB.")
-            return response.json()
-        else:
-            error_msg = (
-                f"YNAB API call failed: {response.status_code} - {response.reason}\n"
-                f"Response body: {response.text}"
+        # Chunked, rate limited and resumable; raises RuntimeError once retries run out
+        responses = self.scheduler.upload(ynab_transactions)
+        print("Transactions successfully imported to YNAB.")
+        return merge_responses(responses)
+
+    def post_transactions(self, ynab_transactions):
+        """POST one chunk of API transaction dicts and return the raw response."""
+        with instrumentation.span("ynab.transactions"):
+            response = self.session.post(
+                f"{self.base_url}/budgets/{self.budget_id}/transactions",
+                headers=self.headers,
+                json={"transactions": ynab_transactions},
+                timeout=self.timeout
             )
-            raise RuntimeError(error_msg)
+        _record_http(response)
+        return response
 
     def fetch_and_cache_categories(self):
         """
@@ -95,26 +169,53 @@ class YNABAPIHandler(APIHandlerBase):
         subcategories, and their IDs so that we can use them later.
 
         This method also confirms that the budget_id is valid (by making a request).
+        Only changes since the stored catalog are requested, and a catalog younger than
+        the TTL is used without a request.
         """
+        stored = self._load_catalog("categories")
 
-        response = requests.get(
-            f"{self.base_url}/budgets/{self.budget_id}/categories",
-            headers=self.headers
-        )
-
-        if response.status_code != 200:
-            raise RuntimeError(f"YNAB API call failed: {response.status_code} - {response.text}")
+        if self.catalog.is_fresh(stored):
+            groups = stored["groups"]
+        else:
+            data = self._sync_catalog(f"{self.base_url}/budgets/{self.budget_id}/categories", stored)
+            groups = merge_category_groups(stored["groups"] if stored else {}, data["category_groups"],
+                                           delta=bool(stored))
+            self.catalog.save("categories", {"server_knowledge": data.get("server_knowledge", 0), "groups": groups})
 
-        data = response.json()["data"]["category_groups"]
         self.cached_categories = {}
 
-        for category_group in data:
-            group_name = category_group["name"]
+        for group in groups.values():
+            group_name = group["name"]
             self.cached_categories[group_name] = {}
 
-            for category in category_group["categories"]:
-                category_name = category["name"]
-                self.cached_categories[group_name][category_name] = category["id"]
+            for category_id, category_name in group["categories"].items():
+                self.cached_categories[group_name][category_name] = category_id
+
+    def _load_catalog(self, resource):
+        # A stored entry without server knowledge cannot be synced from, so it counts as missing
+        if self.refresh_catalog:
+            return None
+        stored = self.catalog.load(resource)
+        return stored if stored and stored.get("server_knowledge") else None
+
+    def _sync_catalog(self, url, stored):
+        """GET a catalog resource, as a delta against the stored copy when there is one."""
+        params = {"last_knowledge_of_server": stored["server_knowledge"]} if stored else None
+        self.limiter.acquire()
+        # Named after the resource, e.g. ynab.categories
+        with instrumentation.span(f"ynab.{url.rsplit('/', 1)[-1]}"):
+            response = self.session.get(
+                url,
+                headers=self.headers,
+                params=params,
+                timeout=self.timeout
+            )
+        _record_http(response)
+
+        if response.status_code != 200:
+            raise RuntimeError(f"YNAB API call failed: {response.status_code} - {response.text}")
+
+        return response.json()["data"]
 
     def extract_category_ids(self, transactions: list[Transaction]):
         """
@@ -153,10 +254,14 @@ class YNABAPIHandler(APIHandlerBase):
         return (category_group, category_name)
 
     def confirm_account_id_validity(self):
-        response = requests.get(
-            f"{self.base_url}/budgets/{self.budget_id}/accounts/{self.account_id}",
-            headers=self.headers
-        )
+        self.limiter.acquire()
+        with instrumentation.span("ynab.account"):
+            response = self.session.get(
+                f"{self.base_url}/budgets/{self.budget_id}/accounts/{self.account_id}",
+                headers=self.headers,
+                timeout=self.timeout
+            )
+        _record_http(response)
 
         if response.status_code == 200:
             return response.json()
@@ -168,17 +273,17 @@ class YNABAPIHandler(APIHandlerBase):
             raise RuntimeError(error_msg)
 
     def fetch_and_cache_payees(self):
-        response = requests.get(
-            f"{self.base_url}/budgets/{self.budget_id}/payees",
-            headers=self.headers
-        )
+        stored = self._load_catalog("payees")
 
-        if response.status_code != 200:
-            raise RuntimeError(f"YNAB API failed: {response.status_code} - {response.text}")
+        if self.catalog.is_fresh(stored):
+            payees = stored["payees"]
+        else:
+            data = self._sync_catalog(f"{self.base_url}/budgets/{self.budget_id}/payees", stored)
+            payees = merge_payees(stored["payees"] if stored else {}, data["payees"], delta=bool(stored))
+            self.catalog.save("payees", {"server_knowledge": data.get("server_knowledge", 0), "payees": payees})
 
-        data = response.json()["data"]["payees"]
         self.cached_payees = {
-            payee["name"].strip().lower(): payee["id"] for payee in data
+            name.strip().lower(): payee_id for payee_id, name in payees.items()
         }
 
     def get_cached_payee_id(self, payee_name: str) -> str | None:
@@ -1,12 +1,14 @@
 import json
 import os
-from payslip2budget.exporters.apihandlers.ynab import YNABAPIHandler
+from payslip2budget.ledger import ImportLedger, DEFAULT_LEDGER_PATH
 
 class TransactionExporter:
-    def __init__(self, config_path=None, dry_run: bool = False):
+    def __init__(self, config_path=None, dry_run: bool = False, refresh_catalog: bool = False):
         self.config = {}
         self.dry_run = dry_run
+        self.refresh_catalog = refresh_catalog
         self.api_handler = None
+        self.ledger = None
 
         if config_path:
             self.load_config(config_path)
@@ -22,10 +24,22 @@ class TransactionExporter:
         api_type = api_config.get("type")
 
         if api_type == "ynab":
-            self.api_handler = YNABAPIHandler(api_config, self.dry_run)
+            # Imported here so the HTTP stack only loads when an API is configured
+            from payslip2budget.exporters.apihandlers.ynab import YNABAPIHandler
+            self.api_handler = YNABAPIHandler(api_config, self.dry_run, self.refresh_catalog)
         else:
             raise ValueError(f"Unsupported API type: {api_type}")
 
+        # Import ids acknowledged by the API, so reruns only send new transactions
+        self.ledger = ImportLedger(api_config.get("ledger_path", DEFAULT_LEDGER_PATH))
+
+    def close(self):
+        """Release the API handler's connections and the ledger."""
+        if self.api_handler is not None:
+            self.api_handler.close()
+        if self.ledger is not None:
+            self.ledger.close()
+
     def export(self, transactions, destination='stdout'):
         if destination == 'stdout':
             self._export_to_stdout(transactions)
@@ -34,13 +48,49 @@ class TransactionExporter:
         elif destination == 'api':
             if not self.api_handler:
                 raise ValueError("API handler not configured.")
-            self.api_handler.send_transactions(transactions)
+            self._export_to_api(transactions)
         else:
             raise ValueError(f"Unsupported export destination: {destination}")
 
+    async def export_async(self, transactions):
+        """Export transactions to the configured API without blocking the event loop during the upload."""
+        if not self.api_handler:
+            raise ValueError("API handler not configured.")
+
+        scope, new_transactions = self._unexported(transactions)
+        if new_transactions:
+            await self.api_handler.send_transactions_async(new_transactions)
+            self._record(scope, new_transactions)
+
+    def _export_to_api(self, transactions):
+        scope, new_transactions = self._unexported(transactions)
+        if new_transactions:
+            self.api_handler.send_transactions(new_transactions)
+            self._record(scope, new_transactions)
+
+    def _unexported(self, transactions):
+        """Return the ledger scope and the transactions the ledger has no record of sending."""
+        transactions = list(transactions)
+        scope = self.api_handler.ledger_scope
+        exported = self.ledger.exported_ids(
+            scope, [txn["ImportId"] for txn in transactions if txn.get("ImportId")]
+        )
+        new_transactions = [txn for txn in transactions if txn.get("ImportId") not in exported]
+
+        if exported:
+            print(f"Skipping {len(transactions) - len(new_transactions)} previously exported transactions.")
+        if not new_transactions:
+            print("No new transactions to export.")
+        return scope, new_transactions
+
+    def _record(self, scope, transactions):
+        # A dry run sends nothing, so there is nothing to record
+        if not self.dry_run:
+            self.ledger.record(scope, [txn["ImportId"] for txn in transactions if txn.get("ImportId")])
+
     def _export_to_stdout(self, transactions):
         for txn in transactions:
-            print(json.dumps(txn, indent=2))
+            print(json.dumps(dict(txn), indent=2))
 
     def _export_to_csv(self, transactions, filepath):
         import csv
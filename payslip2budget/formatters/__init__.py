@@ -0,0 +1,27 @@
+from payslip2budget.formatters.stream import FIELDS, write_csv, format_csv
+
+
+class CsvFormatter:
+    """
+    A budget app's CSV import format, given by the columns it expects in order.
+    """
+
+    def __init__(self, fields=FIELDS):
+        self.fields = fields
+
+    def write(self, transactions, stream):
+        """Write transactions to a text stream, one row at a time."""
+        write_csv(transactions, stream, self.fields)
+
+    def format(self, transactions):
+        return format_csv(transactions, self.fields)
+
+
+# Output formats by name. Every supported app imports the same columns today; an app
+# that needs others gets its own CsvFormatter(fields).
+FORMATTERS = {name: CsvFormatter() for name in ["ynab", "mint", "everydollar", "monarch"]}
+
+ynab = FORMATTERS["ynab"]
+mint = FORMATTERS["mint"]
+everydollar = FORMATTERS["everydollar"]
+monarch = FORMATTERS["monarch"]
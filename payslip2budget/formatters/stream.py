@@ -0,0 +1,69 @@
+import csv
+import io
+import sys
+from contextlib import contextmanager
+
+FIELDS = ["Date", "Payee", "Category", "Memo", "Amount"]
+DEFAULT_BUFFER_SIZE = 64 * 1024
+
+def write_csv(transactions, stream, fields=FIELDS):
+    """
+    Write transactions to a text stream as CSV, one row at a time.
+
+    Values are quoted by csv.writer, so memos containing commas or quotes
+    survive. Memory use does not grow with the number of transactions.
+    """
+    writer = csv.writer(stream, lineterminator="\n")
+    writer.writerow(fields)
+    for txn in transactions:
+        writer.writerow([txn[field] for field in fields])
+
+def format_csv(transactions, fields=FIELDS):
+    """Return the CSV for transactions as a single string."""
+    buffer = io.StringIO(newline="")
+    write_csv(transactions, buffer, fields)
+    return buffer.getvalue()
+
+@contextmanager
+def open_output(path, buffer_size=DEFAULT_BUFFER_SIZE, compress=None):
+    """
+    Open a text stream for formatter output.
+
+    Args:
+        path: Output file path, or '-' for stdout
+        buffer_size: Bytes buffered before each write to the underlying file
+        compress: Gzip the output; by default only when path ends in '.gz'
+    """
+    if compress is None:
+        compress = path.endswith(".gz")
+
+    if path == "-":
+        binary = sys.stdout.buffer
+        sys.stdout.flush()
+    else:
+        binary = open(path, "wb", buffering=buffer_size)
+
+    try:
+        if compress:
+            # Only imported when asked for
+            import gzip
+            compressed = gzip.GzipFile(fileobj=binary, mode="wb")
+            raw = io.BufferedWriter(compressed, buffer_size)
+        else:
+            compressed = None
+            raw = binary
+        stream = io.TextIOWrapper(raw, encoding="utf-8", newline="", write_through=False)
+        try:
+            yield stream
+        finally:
+            stream.flush()
+            # Detach so stdout, or the file closed below, isn't closed by the wrapper
+            stream.detach()
+            if compressed is not None:
+                # Writes the gzip trailer; the file itself stays open
+                raw.close()
+    finally:
+        if path == "-":
+            binary.flush()
+        else:
+            binary.close()
@@ -0,0 +1,140 @@
+import contextlib
+import threading
+import time
+
+# Installed hooks, replaced rather than mutated so they can be read without a lock.
+# Each hook is called as hook(kind, name, value): kind "span" with the elapsed
+# seconds of a timed stage, or kind "count" with a counter increment.
+_hooks = ()
+
+# Depth of muted() blocks in each thread; spans and counters reported inside one are dropped
+_muted = threading.local()
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+# Handed out while no hook is installed, so a disabled span costs one call and no allocation
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        for hook in _hooks:
+            hook("span", self.name, elapsed)
+        return False
+
+
+def enabled() -> bool:
+    """Return True when at least one hook is installed."""
+    return bool(_hooks)
+
+def span(name):
+    """Context manager timing the enclosed block as the stage called name."""
+    return _Span(name) if _hooks and not getattr(_muted, "depth", 0) else _NULL_SPAN
+
+def count(name, amount=1):
+    """Add amount to the counter called name."""
+    if not _hooks or getattr(_muted, "depth", 0):
+        return
+    for hook in _hooks:
+        hook("count", name, amount)
+
+@contextlib.contextmanager
+def muted():
+    """
+    Drop the spans and counters this thread reports inside the block.
+
+    For work that is not part of the run being profiled, such as reading a
+    document twice to compare extractors. Other threads report as usual.
+    """
+    _muted.depth = getattr(_muted, "depth", 0) + 1
+    try:
+        yield
+    finally:
+        _muted.depth -= 1
+
+def timed_iter(name, iterable):
+    """Iterate over iterable, timing each step as the stage called name."""
+    if not _hooks:
+        return iterable
+    return _timed_iter(name, iter(iterable))
+
+def _timed_iter(name, iterator):
+    while True:
+        with span(name):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+def add_hook(hook):
+    """Start forwarding spans and counters to hook(kind, name, value)."""
+    global _hooks
+    _hooks = (*_hooks, hook)
+
+def remove_hook(hook):
+    global _hooks
+    _hooks = tuple(installed for installed in _hooks if installed is not hook)
+
+
+class StageProfile:
+    """
+    Hook that totals the calls and seconds of every stage and the value of every counter.
+
+    Spans nest, so a stage's time includes that of the stages timed inside it.
+    """
+
+    def __init__(self):
+        # Spans also arrive from the YNAB handler's request threads
+        self.lock = threading.Lock()
+        self.stages = {}
+        self.counters = {}
+
+    def __call__(self, kind, name, value):
+        with self.lock:
+            if kind == "span":
+                stage = self.stages.setdefault(name, {"calls": 0, "seconds": 0.0})
+                stage["calls"] += 1
+                stage["seconds"] += value
+            else:
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    def merge(self, snapshot):
+        """Add a snapshot from to_dict(), e.g. one taken in a worker process."""
+        for name, stage in snapshot["stages"].items():
+            with self.lock:
+                totals = self.stages.setdefault(name, {"calls": 0, "seconds": 0.0})
+                totals["calls"] += stage["calls"]
+                totals["seconds"] += stage["seconds"]
+        for name, value in snapshot["counters"].items():
+            self("count", name, value)
+
+    def reset(self):
+        with self.lock:
+            self.stages = {}
+            self.counters = {}
+
+    def to_dict(self) -> dict:
+        with self.lock:
+            return {
+                "stages": {name: dict(stage) for name, stage in sorted(self.stages.items())},
+                "counters": dict(sorted(self.counters.items())),
+            }
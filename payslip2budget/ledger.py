@@ -0,0 +1,74 @@
+import hashlib
+import os
+from payslip2budget.cache import DEFAULT_CACHE_DIR
+
+DEFAULT_LEDGER_PATH = os.path.join(DEFAULT_CACHE_DIR, "ledger.sqlite3")
+
+# YNAB rejects import ids longer than 36 characters
+IMPORT_ID_PREFIX = "P2B:"
+IMPORT_ID_LENGTH = 36
+
+def make_import_id(source, date, category, amount, occurrence=1):
+    """
+    Build a deterministic import id for a parsed transaction.
+
+    Args:
+        source: SHA-256 hex digest of the payslip PDF
+        date: Check date string
+        category: Final category of the transaction
+        amount: Amount string as written to the transaction
+        occurrence: 1-based count of identical (date, category, amount) rows on the payslip
+    """
+    seed = f"{source}:{date}:{category}:{amount}:{occurrence}"
+    digest = hashlib.sha256(seed.encode("utf-8")).hexdigest()
+    return IMPORT_ID_PREFIX + digest[:IMPORT_ID_LENGTH - len(IMPORT_ID_PREFIX)]
+
+
+class ImportLedger:
+    """
+    SQLite record of the import ids each destination has acknowledged.
+
+    Ids are stored per scope (e.g. a YNAB budget and account), so the same payslip
+    can still be exported to a different destination.
+    """
+
+    def __init__(self, path=DEFAULT_LEDGER_PATH):
+        # sqlite3 is only needed on the export path
+        import sqlite3
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS exported ("
+                " scope TEXT NOT NULL,"
+                " import_id TEXT NOT NULL,"
+                " exported_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,"
+                " PRIMARY KEY (scope, import_id))"
+            )
+
+    def exported_ids(self, scope, import_ids):
+        """Return the subset of import_ids already recorded for scope."""
+        import_ids = list(import_ids)
+        found = set()
+        # Stay under SQLite's default limit on bound parameters
+        for start in range(0, len(import_ids), 500):
+            batch = import_ids[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows = self.connection.execute(
+                f"SELECT import_id FROM exported WHERE scope = ? AND import_id IN ({placeholders})",
+                [scope, *batch]
+            )
+            found.update(row[0] for row in rows)
+        return found
+
+    def record(self, scope, import_ids):
+        """Record import_ids as acknowledged by scope."""
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO exported (scope, import_id) VALUES (?, ?)",
+                [(scope, import_id) for import_id in import_ids]
+            )
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,42 @@
+import gc
+import os
+import sys
+
+class MemoryLimitError(MemoryError):
+    """Raised when the process's resident memory passes the configured ceiling."""
+
+
+def current_rss_bytes():
+    """
+    Return the resident set size of this process, or None where it cannot be read.
+
+    Outside Linux only the peak is available, which can only overstate the current size.
+    """
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def check_rss(limit, context=""):
+    """
+    Raise MemoryLimitError if resident memory is over limit bytes.
+
+    Garbage is collected before giving up, in case unreachable cycles hold the excess.
+    """
+    rss = current_rss_bytes()
+    if rss is None or rss <= limit:
+        return
+    gc.collect()
+    rss = current_rss_bytes()
+    if rss > limit:
+        raise MemoryLimitError(f"Resident memory {rss / 2**20:.0f} MiB is over the {limit / 2**20:.0f} MiB limit{context}")
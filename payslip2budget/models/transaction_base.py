@@ -1,11 +1,88 @@
+import sys
+from collections.abc import Mapping
 from dataclasses import dataclass
-from datetime import date
+from decimal import Decimal, ROUND_HALF_UP
 from typing import Optional
 
-@dataclass(kw_only=True)
-class Transaction:
-    date: date
+def to_cents(value) -> int:
+    """Convert an amount such as '12.34', 12.34 or Decimal('12.34') to integer cents, exactly."""
+    if isinstance(value, int):
+        return value * 100
+    # str() gives the shortest repr of a float, so 0.1 becomes '0.1' rather than 0.1000000000000000055...
+    return int((Decimal(str(value)) * 100).to_integral_value(ROUND_HALF_UP))
+
+def format_cents(cents: int) -> str:
+    """Format integer cents the way amounts have always been written, e.g. -154032 -> '-1540.32'."""
+    sign = "-" if cents < 0 else ""
+    whole, fraction = divmod(abs(cents), 100)
+    return f"{sign}{whole}.{fraction:02d}"
+
+
+# eq=False keeps Mapping's equality, so a record compares equal to its dict form
+@dataclass(kw_only=True, slots=True, eq=False)
+class Transaction(Mapping):
+    """
+    A budget transaction with its amount held as integer cents.
+
+    Records also read like the dicts the parser used to emit, keyed by "Date",
+    "Payee", "Category", "Memo", "Amount" (a '%.2f' string), "ImportId" and "YTD", so
+    formatters and CSV writers can use either form.
+    """
+    date: str  # ISO check date
     payee: str
     category: Optional[str] = None
     memo: str
-    amount: int  # In dollars for base class
+    amount: int  # In cents for base class
+    import_id: Optional[str] = None
+    ytd: Optional[int] = None  # Year-to-date amount printed on the payslip, in cents
+
+    def __post_init__(self):
+        # Every row of a payslip shares its date and payee, so keep one copy of each
+        self.date = sys.intern(self.date)
+        self.payee = sys.intern(self.payee)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a Transaction from the dict form, accepting a Transaction unchanged."""
+        if isinstance(data, Transaction):
+            return data
+        return cls(
+            date=data["Date"],
+            payee=data["Payee"],
+            category=data.get("Category"),
+            memo=data["Memo"],
+            amount=to_cents(data["Amount"]),
+            import_id=data.get("ImportId"),
+            ytd=None if data.get("YTD") is None else to_cents(data["YTD"]),
+        )
+
+    def to_dict(self) -> dict:
+        return {key: self[key] for key in _VIEW_KEYS}
+
+    def format_amount(self, amount: int) -> str:
+        """Write an amount in this record's unit (cents here) the way the dict form shows it."""
+        return format_cents(amount)
+
+    def __getitem__(self, key):
+        try:
+            getter = _VIEW_KEYS[key]
+        except KeyError:
+            raise KeyError(key) from None
+        return getter(self)
+
+    def __iter__(self):
+        return iter(_VIEW_KEYS)
+
+    def __len__(self):
+        return len(_VIEW_KEYS)
+
+
+_VIEW_KEYS = {
+    "Date": lambda txn: txn.date,
+    "Payee": lambda txn: txn.payee,
+    "Category": lambda txn: txn.category,
+    "Memo": lambda txn: txn.memo,
+    "Amount": lambda txn: txn.format_amount(txn.amount),
+    "ImportId": lambda txn: txn.import_id,
+    "YTD": lambda txn: None if txn.ytd is None else txn.format_amount(txn.ytd),
+}
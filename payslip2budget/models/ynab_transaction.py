@@ -1,19 +1,25 @@
 from dataclasses import dataclass
-from datetime import date
+from decimal import Decimal
 from typing import Optional
-from payslip2budget.models.transaction_base import Transaction
+from payslip2budget.models.transaction_base import Transaction, format_cents
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True, eq=False)
 class YNABTransaction(Transaction):
+    # amount is in milliunits here, not cents
     account_id: str
     category_id: Optional[str] = None
     category_name: Optional[str] = None
     cleared: str = "cleared"  # 'cleared', 'uncleared', or 'reconciled'
     approved: bool = False # True or False
     flag_color: Optional[str] = None  # e.g., "red", "orange", etc.
-    import_id: Optional[str] = None
     payee_id: Optional[str] = None
 
+    def format_amount(self, amount: int) -> str:
+        # A cent is exactly 10 milliunits; finer amounts keep all three places
+        if amount % 10 == 0:
+            return format_cents(amount // 10)
+        return str(Decimal(amount).scaleb(-3))
+
     def to_api_dict(self) -> dict:
         return {
             "account_id": self.account_id,
@@ -1,4 +1,3 @@
-import pdfplumber
 from datetime import datetime
 import logging
 import warnings
@@ -6,16 +5,57 @@ import re
 import json
 import os
 import csv
+from payslip2budget.parsers.keywords import KeywordMatcher
+from payslip2budget.parsers.tokenizer import tokenize, name_segments, first_amount, ytd_amount, parse_amount
+from payslip2budget.parsers.extractors import (EXTRACTORS, AUTO_CANDIDATES, REFERENCE_EXTRACTOR,
+                                               PARALLEL_MIN_PAGES, parallel_pages)
+from payslip2budget.parsers.pruning import PageProbe, load_page_spec, count_pages
+from payslip2budget.parsers.layout import LayoutFingerprint
+from payslip2budget.parsers.templates import (TemplateStore, page_words, group_rows, row_text, layout_key,
+                                              learn_template, apply_template)
+from payslip2budget.source import as_source
+from payslip2budget.ledger import make_import_id
+from payslip2budget.models.transaction_base import Transaction, format_cents
+from payslip2budget.instrumentation import span, count, muted
+from payslip2budget.memory import check_rss
 
 class PayslipParser:
-    def __init__(self, category_config=None, payee="Employer"):
+    # Registry name, part of the parse cache key, and the cheap signs of an ADP earnings statement
+    name = "adp"
+    layout = LayoutFingerprint(producer=(r"\bADP\b",), header=r"Earnings\s*Statement|ADP, Inc")
+
+    def __init__(self, category_config=None, payee="Employer", cache=None, extractor="pdfplumber",
+                 prune=False, page_spec=None, template_dir=None, low_memory=False, max_rss=None,
+                 page_workers=None):
         """
         Initialize the parser with an optional category configuration.
         
         Args:
             category_config: Path to JSON config file or a dictionary with 
                              category mappings in format {category: [keywords]}
+            payee: Payee name set on every transaction
+            cache: Optional ParseCache consulted by parse_payslip before opening the PDF
+            extractor: Text extraction backend, one of EXTRACTORS or "auto" to pick, once
+                       per layout, the first of AUTO_CANDIDATES that agrees with pdfplumber
+            prune: Probe pages cheaply first and skip those without deduction or check date lines
+            page_spec: Optional path or dictionary limiting extraction to known pages/regions,
+                       see load_page_spec
+            template_dir: Optional directory of learned column templates. When set, items
+                          are read from pdfplumber's word positions with the template learned
+                          for the payslip's layout instead of from the extracted text, and
+                          extractor is not used.
+            low_memory: Release everything parsed from a page before reading the next, so
+                        memory use stays flat however many pages the PDF has
+            max_rss: Optional ceiling in bytes on the process's resident memory, checked
+                     after every page; parsing stops with MemoryLimitError past it
+            page_workers: Extract the text of long PDFs in this many worker processes, each
+                          taking a range of pages. Lines are still scanned in document order,
+                          so the transactions are the same as with one process. Not used
+                          with template_dir.
         """
+        if extractor != "auto" and extractor not in EXTRACTORS:
+            raise ValueError(f"Unsupported extractor: {extractor}")
+
         self.category_mappings = {
             "Health Savings Account": ["hsa"],
             "Legal": ["legal"],
@@ -36,6 +76,33 @@ class PayslipParser:
             self.load_category_config(category_config)
 
         self.payee = payee
+        self.cache = cache
+        self.extractor = extractor
+        self.prune = prune
+        self.page_spec = load_page_spec(page_spec) if page_spec else None
+        self.templates = TemplateStore(template_dir) if template_dir else None
+        self.low_memory = low_memory
+        self.max_rss = max_rss
+        self.page_workers = page_workers
+
+        # Page counts of the last extraction, for reporting what pruning skipped
+        self.pages_total = None
+        self.pages_skipped = None
+        # Whether the last payslip parsed had a check date, rather than being dated today
+        self.check_date_found = False
+        # Backend picked by "auto" for each layout seen so far
+        self.auto_extractors = {}
+
+    @property
+    def category_mappings(self):
+        return self._category_mappings
+
+    @category_mappings.setter
+    def category_mappings(self, mappings):
+        # Compile the keywords once here instead of rescanning them for every line
+        self._category_mappings = mappings
+        self.keyword_matcher = KeywordMatcher(mappings)
+        self.page_probe = PageProbe(self.keyword_matcher.priorities)
     
     def load_category_config(self, config):
         """
@@ -59,70 +126,281 @@ class PayslipParser:
         else:
             print("Invalid category configuration. Using defaults.")
     
+    def extract_pages(self, pdf_path, only_pages=None):
+        """
+        Yield the text lines of each page of the PDF using the configured extractor.
+
+        Pages and regions ruled out by the page spec or the pruning probe are never
+        extracted; pages_total and pages_skipped record how many were left out.
+        """
+        pages, regions = self._select_pages(pdf_path, only_pages)
+        # Worker processes reopen the PDF by its path, so in-memory input is read here
+        path = as_source(pdf_path).path
+        parallel = False
+        if self.page_workers and self.page_workers > 1 and path is not None:
+            if pages is None:
+                pages = list(range(count_pages(pdf_path)))
+            parallel = len(pages) >= PARALLEL_MIN_PAGES
+
+        def extract(name):
+            if parallel:
+                return parallel_pages(name, path, pages, regions, self.low_memory, self.page_workers)
+            return EXTRACTORS[name](pdf_path, pages, regions, self.low_memory)
+
+        if self.extractor == "auto":
+            return self._extract_pages_auto(pdf_path, extract)
+        return extract(self.extractor)
+
+    def _select_pages(self, pdf_path, only_pages=None):
+        # Pages (None for all) and regions to extract, after the page spec and pruning.
+        # only_pages narrows them to part of the document, such as one stub of a register.
+        pages = self.page_spec["pages"] if self.page_spec else None
+        regions = self.page_spec["regions"] if self.page_spec else None
+        if only_pages is not None:
+            pages = list(only_pages) if pages is None else sorted(set(pages) & set(only_pages))
+
+        if self.prune:
+            pages, self.pages_total = self.page_probe.select_pages(pdf_path, pages)
+        elif only_pages is not None:
+            # Already known to be in the document
+            self.pages_total = None
+        elif pages is not None:
+            self.pages_total = count_pages(pdf_path)
+            pages = [index for index in pages if index < self.pages_total]
+        else:
+            self.pages_total = None
+        if only_pages is not None:
+            self.pages_total = len(only_pages)
+        self.pages_skipped = None if pages is None else self.pages_total - len(pages)
+        return pages, regions
+
+    def iter_lines(self, pdf_path, only_pages=None):
+        """
+        Yield each text line of the PDF with its (item_name, amount, ytd) items.
+
+        Items are None when they are still to be found in the line's text, which is
+        the case unless column templates are in use.
+        """
+        for page in self._iter_pages(pdf_path, only_pages):
+            yield from page
+
+    def _iter_pages(self, pdf_path, only_pages=None):
+        # Each page as a list of the (line, items) pairs iter_lines yields
+        if self.templates is not None:
+            yield from self._iter_template_pages(pdf_path, only_pages)
+            return
+
+        for number, lines in enumerate(self.extract_pages(pdf_path, only_pages), start=1):
+            self._check_memory(pdf_path, number)
+            count("lines", len(lines))
+            yield [(line, None) for line in lines]
+
+    def _check_memory(self, pdf_path, pages_read):
+        if self.max_rss is not None:
+            check_rss(self.max_rss, f" after {pages_read} pages of {pdf_path}")
+
+    def _iter_template_pages(self, pdf_path, only_pages=None):
+        # The layout is keyed by the first page read, and its template learned from the
+        # first page with categorized items when none is stored yet. A stored template
+        # that finds nothing on a page is relearned from it, in case the layout moved.
+        # Pages no template can be learned from have their items found in the row text.
+        pages, regions = self._select_pages(pdf_path, only_pages)
+        key = template = None
+        for number, (words, page_height) in enumerate(page_words(pdf_path, pages, regions, self.low_memory), start=1):
+            self._check_memory(pdf_path, number)
+            if key is None:
+                key = layout_key(self.name, words, page_height)
+                template = self.templates.get(key)
+
+            rows = group_rows(words)
+            count("lines", len(rows))
+            with span("parse.template"):
+                items = apply_template(rows, template) if template else None
+                if items is None or not any(self.categorize_line(item[0]) for row in items for item in row):
+                    learned = learn_template(rows, self.categorize_line)
+                    if learned is None:
+                        items = None
+                    elif learned != template:
+                        template = learned
+                        self.templates.put(key, template)
+                        items = apply_template(rows, template)
+
+            if items is None:
+                yield [(row_text(row), None) for row in rows]
+            else:
+                yield [(row_text(row), row_items) for row, row_items in zip(rows, items)]
+
+    def _extract_pages_auto(self, pdf_path, extract):
+        # The first PDF of a layout is read with every backend, and the backend chosen for
+        # it is used alone for the rest of the layout's PDFs
+        key = self._auto_layout_key(pdf_path)
+        name = self.auto_extractors.get(key)
+        if name is not None:
+            return extract(name)
+
+        # The comparison shows in --profile as one stage, and only the pages used count
+        with span("parse.auto_select"), muted():
+            reference = list(extract(REFERENCE_EXTRACTOR))
+            expected = [self._page_items(lines) for lines in reference]
+            name, pages = REFERENCE_EXTRACTOR, reference
+            if any(expected):
+                for candidate in AUTO_CANDIDATES:
+                    try:
+                        extracted = list(extract(candidate))
+                    except Exception:
+                        # A backend that cannot read this document simply fails the check
+                        continue
+                    # Every page must agree, so items or sections continuing across pages are checked too
+                    if [self._page_items(lines) for lines in extracted] == expected:
+                        name, pages = candidate, extracted
+                        break
+        count("pages", len(pages))
+        if key is not None:
+            self.auto_extractors[key] = name
+        return iter(pages)
+
+    @staticmethod
+    def _auto_layout_key(pdf_path):
+        # The producer and the digit-free first-page header, or None when they say nothing
+        from payslip2budget.parsers.layout import LayoutHints
+
+        try:
+            with as_source(pdf_path).open() as f:
+                hints = LayoutHints(f)
+                header = re.sub(r"\d", "", hints.header)
+                producer = hints.producer
+        except Exception:
+            return None
+        return (producer, header) if header.strip() else None
+
+    def _page_items(self, lines):
+        """Sorted categorized items on a page, for comparing extractors."""
+        items = []
+        for line in lines:
+            for item_name, amount in self.extract_deduction_items(line):
+                category = self.categorize_line(item_name)
+                if category:
+                    items.append((category, item_name.strip(), amount))
+        return sorted(items)
+
     def categorize_line(self, text):
         """Determine the category of a line item based on configured keywords"""
-        text_lower = text.lower()
-        
-        for category, keywords in self.category_mappings.items():
-            # Adding the "Gross Pay Offset" key screwed up the dict, so let's skip it
-            if category.lower() == "gross pay offset":
-                continue
-
-            if any(keyword.lower() in text_lower for keyword in keywords):
-                return category
-        
-        return None
+        # First category in mapping order with a matching keyword wins
+        return self.keyword_matcher.categorize(text)
 
-    def parse_payslip(self, pdf_path, output_csv=None):
+    def parse_payslip(self, pdf_path, output_csv=None, pages=None):
         """
         Parse a payslip PDF and extract deduction items.
         
         Args:
-            pdf_path: Path to the PDF file
+            pdf_path: Path to the PDF file, "-" for stdin, bytes, a memoryview, a binary
+                      file object or a PdfSource, see payslip2budget.source
             output_csv: Optional path to save results as CSV
+            pages: Optional sorted 0-based indices of the pages holding the payslip, for
+                   one stub of a payroll register, see payslip2budget.register
             
         Returns:
-            List of transaction dictionaries
+            List of Transaction records, which also read as transaction dictionaries
         """
-        transactions = []
-        total_deductions = 0.0
-        total_additions = 0.0
+        self.pages_total = self.pages_skipped = None
+        # Every stage reads the same source, so stdin is read and the content hashed only once
+        pdf_path = as_source(pdf_path)
+        if self.cache is None:
+            transactions = list(self.iter_transactions(pdf_path, pages))
+        else:
+            settings = [self.name, self.category_mappings, self.payee, self.extractor, self.prune, self.page_spec,
+                        self.templates is not None, pages]
+            key = self.cache.key(pdf_path, self.cache.fingerprint(*settings))
+            # Payslips without a check date are dated today, so their entries are keyed by the day too
+            today_key = self.cache.key(pdf_path, self.cache.fingerprint(*settings, datetime.today().strftime('%Y-%m-%d')))
+            cached = self.cache.get(key, today_key)
+            if cached is None:
+                transactions = list(self.iter_transactions(pdf_path, pages))
+                self.cache.put(key if self.check_date_found else today_key, [txn.to_dict() for txn in transactions])
+            else:
+                transactions = [Transaction.from_dict(txn) for txn in cached]
+
+        # Save to CSV if requested
+        if output_csv and transactions:
+            self.save_to_csv(transactions, output_csv)
+        
+        return transactions
+
+    def iter_transactions(self, pdf_path, pages=None):
+        """
+        Parse a payslip PDF, yielding each itemized transaction as soon as its line is read.
+
+        The Gross Pay Offset rows depend on every item, so they are yielded last.
+
+        Args:
+            pdf_path: The PDF, as for parse_payslip
+            pages: Optional 0-based indices of the pages to parse, as for parse_payslip
+
+        Yields:
+            Transaction records, amounts in cents
+        """
+        # Totals are kept in integer cents so the offsets match the items to the cent
+        total_deductions = 0
+        total_additions = 0
         tax_type = None
-        check_date = datetime.today()
+        date = datetime.today().strftime('%Y-%m-%d')
+        self.check_date_found = False
+
+        # Each transaction gets an import id derived from the payslip's content, so exporters
+        # can recognise rows they already sent
+        pdf_path = as_source(pdf_path)
+        source = pdf_path.digest()
+        if pages is not None:
+            # Stubs of one register are told apart by where they start
+            source = f"{source}@{pages[0] + 1}"
+        occurrences = {}
+
+        def import_id(date, category, cents):
+            # Ids are seeded with the amount string, as it was written before amounts were cents
+            amount = format_cents(cents)
+            key = (date, category, amount)
+            occurrences[key] = occurrences.get(key, 0) + 1
+            return make_import_id(source, date, category, amount, occurrences[key])
         
         # Suppress pdfplumber/pdfminer warnings
         logging.getLogger('pdfminer').setLevel(logging.ERROR)
         warnings.filterwarnings("ignore", message="CropBox missing from /Page, defaulting to MediaBox")
         
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                lines = page.extract_text().splitlines()
-                for line in lines:
+        # Items are found and categorized a page at a time, so that is what gets timed
+        for page in self._iter_pages(pdf_path, pages):
+            transactions = []
+            with span("parse.items"):
+                for line, items in page:
+                    line_lower = line.lower()
                     # Capture federal vs state to correctly count the generic 'withholding tax' lines
-                    if "tax deductions: federal" in line.lower():
+                    if "tax deductions: federal" in line_lower:
                         tax_type = "Federal"
                         continue
-                    elif "tax deductions:" in line.lower():
+                    elif "tax deductions:" in line_lower:
                         tax_type = "State"
                         continue
-                    elif "additional deductions" in line.lower():
+                    elif "additional deductions" in line_lower:
                         tax_type = None
                         continue
-                    elif "check date" in line.lower():
+                    elif "check date" in line_lower:
                         # Grab the date the payments were issued
                         # TODO make this more robust or configurable so that other date formats don't break it
                         check_date = datetime.strptime(line.split(":")[1].strip(), "%m/%d/%Y")
-                    
+                        date = check_date.strftime('%Y-%m-%d')
+                        self.check_date_found = True
+            
                     # Find all potential deduction items in the line
-                    items = self.extract_deduction_items(line)
+                    if items is None:
+                        items = self.extract_line_items(line)
 
-                    for item_name, amount in items:
+                    for item_name, amount, ytd in items:
                         category = self.categorize_line(item_name)
                         if category:
-                            if amount < 0:
-                                total_deductions -= amount
+                            cents = round(amount * 100)
+                            if cents < 0:
+                                total_deductions -= cents
                             else:
-                                total_additions += amount
+                                total_additions += cents
 
                             # Set memo field so I can modify it instead of using item_name.strip() directly
                             memo = item_name.strip()
@@ -132,39 +410,41 @@ class PayslipParser:
                                     memo = f"{tax_type} {memo}"
                                     category = f"Taxes:{tax_type} Withholding"
 
-                            transactions.append({
-                                "Date": check_date.strftime('%Y-%m-%d'),
-                                "Payee": self.payee,
-                                "Category": category,
-                                "Memo": memo,
-                                "Amount": f"{amount:.2f}",
-                            })
-        
+                            transactions.append(Transaction(
+                                date=date,
+                                payee=self.payee,
+                                category=category,
+                                memo=memo,
+                                amount=cents,
+                                import_id=import_id(date, category, cents),
+                                ytd=None if ytd is None else round(ytd * 100),
+                            ))
+            count("matches", len(transactions))
+            yield from transactions
+
         # Offset deductions with an addition
         if total_deductions > 0:
-            transactions.append({
-                "Date": check_date.strftime('%Y-%m-%d'),
-                "Payee": self.payee,
-                "Category": self.category_mappings.get("Gross Pay Offset"),
-                "Memo": "Offset for itemized paycheck deductions",
-                "Amount": f"{total_deductions:.2f}"
-            })
+            category = self.category_mappings.get("Gross Pay Offset")
+            yield Transaction(
+                date=date,
+                payee=self.payee,
+                category=category,
+                memo="Offset for itemized paycheck deductions",
+                amount=total_deductions,
+                import_id=import_id(date, category, total_deductions),
+            )
         
         # Offset additions with a deduction
         if total_additions > 0:
-            transactions.append({
-                "Date": check_date.strftime('%Y-%m-%d'),
-                "Payee": self.payee,
-                "Category": self.category_mappings.get("Gross Pay Offset"),
-                "Memo": "Offset for itemized paycheck additions (employer contributions)",
-                "Amount": f"-{total_additions:.2f}"
-            })
-
-        # Save to CSV if requested
-        if output_csv and transactions:
-            self.save_to_csv(transactions, output_csv)
-        
-        return transactions
+            category = self.category_mappings.get("Gross Pay Offset")
+            yield Transaction(
+                date=date,
+                payee=self.payee,
+                category=category,
+                memo="Offset for itemized paycheck additions (employer contributions)",
+                amount=-total_additions,
+                import_id=import_id(date, category, -total_additions),
+            )
         
     def save_to_csv(self, transactions, output_path):
         """
@@ -178,7 +458,7 @@ class PayslipParser:
         
         try:
             with open(output_path, 'w', newline='') as csvfile:
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+                writer = csv.DictWriter(csvfile, fieldnames=fieldnames, extrasaction="ignore")
                 writer.writeheader()
                 writer.writerows(transactions)
             print(f"Transactions saved to {output_path}")
@@ -187,17 +467,7 @@ class PayslipParser:
 
     def extract_money_amount(self, text):
         """Extract money amount from text, handling both formats like '100.00' and '100.00-'"""
-        # Remove dollar signs and commas
-        text = text.replace('$', '').replace(',', '')
-
-        # Handle trailing minus sign
-        if text.endswith('-'):
-            text = '-' + text[:-1]
-
-        try:
-            return float(text)
-        except ValueError:
-            return None
+        return parse_amount(text)
 
 
     def extract_deduction_items(self, line):
@@ -206,108 +476,55 @@ class PayslipParser:
         For each item, grab the first dollar amount (current pay period) and ignore YTD amounts.
         Returns a list of (item_name, amount) tuples for valid deduction items.
         """
+        return [(item_name, amount) for item_name, amount, _ in self.extract_line_items(line)]
+
+    def extract_line_items(self, line):
+        """
+        Extract deduction items from a payslip line along with their year-to-date amounts.
+        Returns a list of (item_name, amount, ytd) tuples, ytd being None when the line has no YTD column.
+        """
         items = []
         
-        # Split the line into parts
-        parts = line.split()
-        if len(parts) < 2:
+        # Split the line into name and amount tokens, classifying each one once
+        tokens = tokenize(line)
+        count("tokens", len(tokens))
+        if len(tokens) < 2:
             return items
         
-        # First, identify all text segments that might be item descriptions
-        item_segments = []
-        current_item = []
-        
-        for i, part in enumerate(parts):
-            # Check if this part is a monetary amount
-            amount = self.extract_money_amount(part)
-            
-            if amount is None:
-                # This is part of an item name
-                current_item.append(part)
-            else:
-                # We found a monetary amount - if we have collected words for an item, save it
-                if current_item:
-                    item_segments.append({
-                        'name': ' '.join(current_item),
-                        'index': i - len(current_item),
-                        'length': len(current_item)
-                    })
-                    current_item = []
-        
-        # Add any remaining item at the end
-        if current_item:
-            item_segments.append({
-                'name': ' '.join(current_item),
-                'index': len(parts) - len(current_item),
-                'length': len(current_item)
-            })
-        
-        # Process each potentially meaningful segment
-        for segment in item_segments:
+        # Process each run of name tokens that might be an item description
+        for start, end in name_segments(tokens):
             # Replace * from some items
-            item_name = segment['name'].replace("*","")
+            item_name = ' '.join(token.text for token in tokens[start:end]).replace("*","")
             category = self.categorize_line(item_name)
             
             if category:
-                # Find the first amount that appears after this item name
-                start_idx = segment['index'] + segment['length']
-                for j in range(start_idx, len(parts)):
-                    # If the item is the year-to-date column, then the amount is 0
-                    if parts[j] == parts[-1]:
-                        amount = 0
-                    else:
-                        amount = self.extract_money_amount(parts[j])
-
-                    if amount is not None and amount != 0:
-                        # We found the first amount for this item - always use the first amount (current period)
-                        items.append((item_name, amount))
-                        break
+                # We found the first amount for this item - always use the first amount (current period)
+                amount = first_amount(tokens, end)
+                if amount is not None:
+                    items.append((item_name, amount, ytd_amount(tokens, end)))
         
         # Special handling for items that might need specific detection
-        # Flatten all keywords from category mappings to look for special items
-        all_keywords = []
-        for keywords in self.category_mappings.values():
-            all_keywords.extend(keywords)
-        
-        for keyword in all_keywords:
-            if keyword.lower() in line.lower():
-                # Find where this keyword appears
-                for i, part in enumerate(parts):
-                    if keyword.lower() in part.lower():
-                        # Check if we already captured this item
-                        already_captured = False
-                        for item_name, _ in items:
-                            if keyword.lower() in item_name.lower():
-                                already_captured = True
-                                break
-                        
-                        if already_captured:
-                            continue
-                        
-                        # Find the extent of this item name (look backward and forward)
-                        start_idx = i
-                        while start_idx > 0 and self.extract_money_amount(parts[start_idx-1]) is None:
-                            start_idx -= 1
-                        
-                        end_idx = i
-                        while end_idx < len(parts)-1 and self.extract_money_amount(parts[end_idx+1]) is None:
-                            end_idx += 1
-                        
-                        item_name = ' '.join(parts[start_idx:end_idx+1])
-                        
-                        # Find the first amount after this item
-                        for j in range(end_idx+1, len(parts)):
-                            # If the item is the year-to-date column, then the amount is 0
-                            if parts[j] == parts[-1]:
-                                amount = 0
-                            else:
-                                amount = self.extract_money_amount(parts[j])
+        # Look for keywords inside individual tokens that the segment pass missed
+        for keyword, i in self.keyword_matcher.find_in_tokens(line).items():
+            # Check if we already captured this item
+            if any(keyword in item_name.lower() for item_name, _, _ in items):
+                continue
 
-                            if amount is not None and amount != 0:
-                                items.append((item_name, amount))
-                                break
-                        
-                        break
+            # Find the extent of this item name (look backward and forward)
+            start_idx = i
+            while start_idx > 0 and not tokens[start_idx-1].is_amount:
+                start_idx -= 1
+
+            end_idx = i
+            while end_idx < len(tokens)-1 and not tokens[end_idx+1].is_amount:
+                end_idx += 1
+
+            item_name = ' '.join(token.text for token in tokens[start_idx:end_idx+1])
+
+            # Find the first amount after this item
+            amount = first_amount(tokens, end_idx+1)
+            if amount is not None:
+                items.append((item_name, amount, ytd_amount(tokens, end_idx+1)))
         
         #print(f"Extracted items: {items}")
         return items
@@ -0,0 +1,181 @@
+import inspect
+import warnings
+from payslip2budget.instrumentation import span, count, timed_iter
+from payslip2budget.source import as_source
+
+# The PDF libraries are imported inside each backend so only the one in use is loaded
+
+# Wide character margin keeps a table row on one line, small line margin keeps rows apart
+PDFMINER_LAPARAMS = {"char_margin": 20.0, "line_margin": 0.1}
+
+# Every backend takes the PDF (a path or anything as_source accepts) plus optional 0-based page indices to read and
+# [x0, top, x1, bottom] regions to read them from, and yields each page's text lines.
+# With low_memory, nothing parsed from one page is kept once the next is read.
+
+def plumber_pages(pdf, low_memory=False):
+    """
+    Yield the pages of an open pdfplumber PDF, closing each one once the next is requested.
+
+    Closing drops the page's cached chars and layout, which otherwise stay alive as
+    long as the document. pdf.pages also builds every page up front and pdfminer keeps
+    every object it parses, content streams included; with low_memory pages are built
+    one at a time and that object cache is emptied between them.
+
+    Building pages lazily relies on pdfplumber internals (pdf.pages_to_parse, the Page
+    constructor, the document's _cached_objs), which pyproject.toml pins the version
+    range for. Where they are missing, pages are still closed one by one and a
+    warning says the rest of low_memory is unavailable.
+    """
+    if low_memory and not _lazy_pages_supported(pdf):
+        warnings.warn("This pdfplumber version lacks what --low-memory needs to build pages lazily; "
+                      "pages are only closed once read", RuntimeWarning, stacklevel=2)
+        low_memory = False
+
+    if low_memory:
+        from pdfminer.pdfpage import PDFPage
+        from pdfplumber.page import Page
+
+        def build(wanted):
+            doctop = 0
+            for index, pdfminer_page in enumerate(PDFPage.create_pages(pdf.doc)):
+                page = Page(pdf, pdfminer_page, page_number=index + 1, initial_doctop=doctop)
+                doctop += page.height
+                if wanted is None or index + 1 in wanted:
+                    yield page
+
+        wanted = pdf.pages_to_parse
+        source = build(None if wanted is None else set(wanted))
+    else:
+        source = pdf.pages
+
+    for page in source:
+        try:
+            yield page
+        finally:
+            page.close()
+            if low_memory:
+                pdf.doc._cached_objs.clear()
+
+def _lazy_pages_supported(pdf):
+    from pdfplumber.page import Page
+
+    parameters = inspect.signature(Page).parameters
+    return (hasattr(pdf, "pages_to_parse") and isinstance(getattr(pdf.doc, "_cached_objs", None), dict)
+            and {"page_number", "initial_doctop"} <= parameters.keys())
+
+
+def pdfplumber_pages(pdf_path, pages=None, regions=None, low_memory=False):
+    """Yield the text lines of each page using pdfplumber's layout-aware extraction."""
+    import pdfplumber
+
+    with as_source(pdf_path).open() as f:
+        with span("pdf.open"):
+            pdf = pdfplumber.open(f, pages=None if pages is None else [index + 1 for index in pages])
+        with pdf:
+            for page in plumber_pages(pdf, low_memory):
+                count("pages")
+                with span("pdf.extract_text"):
+                    if regions is None:
+                        lines = (page.extract_text() or "").splitlines()
+                    else:
+                        lines = []
+                        for region in regions:
+                            lines.extend((page.crop(region, strict=False).extract_text() or "").splitlines())
+                yield lines
+
+
+def pypdf2_pages(pdf_path, pages=None, regions=None, low_memory=False):
+    """Yield the text lines of each page from PyPDF2's content-stream text extraction."""
+    import PyPDF2
+
+    if regions is not None:
+        raise ValueError("The pypdf2 extractor does not support page regions")
+
+    with as_source(pdf_path).open() as f:
+        with span("pdf.open"):
+            reader = PyPDF2.PdfReader(f)
+        for index in range(len(reader.pages)) if pages is None else pages:
+            count("pages")
+            with span("pdf.extract_text"):
+                lines = (reader.pages[index].extract_text() or "").splitlines()
+            if low_memory:
+                # Resolved objects are cached for the reader's lifetime
+                reader.resolved_objects.clear()
+            yield lines
+
+
+def _in_regions(element, page_height, regions):
+    # pdfminer measures y from the bottom of the page, regions from the top
+    x0, y0, x1, y1 = element.bbox
+    top, bottom = page_height - y1, page_height - y0
+    return any(x0 < r_x1 and x1 > r_x0 and top < r_bottom and bottom > r_top
+               for r_x0, r_top, r_x1, r_bottom in regions)
+
+
+def pdfminer_pages(pdf_path, pages=None, regions=None, low_memory=False):
+    """Yield the text lines of each page from pdfminer's layout analysis, without pdfplumber's char objects."""
+    from pdfminer.high_level import extract_pages
+    from pdfminer.layout import LAParams, LTTextContainer, LTTextLine
+
+    laparams = LAParams(**PDFMINER_LAPARAMS)
+    with as_source(pdf_path).open() as f:
+        # caching=False stops pdfminer keeping every object it parses for the document's lifetime
+        layouts = extract_pages(f, page_numbers=pages, laparams=laparams, caching=not low_memory)
+        # pdfminer parses the document and lays out each page lazily, so time each step of the iteration
+        for page in timed_iter("pdf.extract_text", layouts):
+            count("pages")
+            lines = []
+            for element in page:
+                if not isinstance(element, LTTextContainer):
+                    continue
+                for text_line in [element] if isinstance(element, LTTextLine) else element:
+                    if regions is not None and not _in_regions(text_line, page.height, regions):
+                        continue
+                    lines.extend(line for line in text_line.get_text().splitlines() if line.strip())
+            yield lines
+
+
+EXTRACTORS = {
+    "pdfplumber": pdfplumber_pages,
+    "pypdf2": pypdf2_pages,
+    "pdfminer": pdfminer_pages,
+}
+
+# Fewer pages than this are extracted in order, starting worker processes would cost more than it saves
+PARALLEL_MIN_PAGES = 16
+# Smallest page range handed to one worker, each one opens the PDF again
+PARALLEL_MIN_RANGE = 4
+
+def _extract_range(extractor, pdf_path, pages, regions, low_memory):
+    return list(EXTRACTORS[extractor](pdf_path, pages, regions, low_memory))
+
+def parallel_pages(extractor, pdf_path, pages, regions=None, low_memory=False, workers=2):
+    """
+    Yield the text lines of each page as EXTRACTORS[extractor] would, extracting
+    ranges of pages in worker processes. Each worker opens pdf_path itself, so it
+    must be a path.
+
+    Pages are yielded in document order. Each worker gets about two ranges so a slow
+    range does not leave the others idle. Stage timings inside the workers are not
+    reported, only the time spent waiting for them.
+
+    Args:
+        pages: Sorted 0-based indices of the pages to extract
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    size = max(PARALLEL_MIN_RANGE, -(-len(pages) // (workers * 2)))
+    ranges = [pages[start:start + size] for start in range(0, len(pages), size)]
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as executor:
+        futures = [executor.submit(_extract_range, extractor, pdf_path, page_range, regions, low_memory)
+                   for page_range in ranges]
+        for future in futures:
+            with span("pdf.extract_parallel"):
+                range_lines = future.result()
+            count("pages", len(range_lines))
+            yield from range_lines
+
+# Backends tried by "auto", in a fixed order of preference (usually the faster first, this
+# is not measured), each checked against REFERENCE_EXTRACTOR
+AUTO_CANDIDATES = ["pypdf2", "pdfminer"]
+REFERENCE_EXTRACTOR = "pdfplumber"
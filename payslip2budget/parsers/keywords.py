@@ -0,0 +1,93 @@
+import re
+from bisect import bisect_right
+
+TOKEN_RE = re.compile(r"\S+")
+
+class KeywordMatcher:
+    """
+    Category keywords compiled into a single alternation regex.
+
+    Alternatives are ordered by category priority and wrapped in a lookahead, so
+    each position reports the highest-priority keyword starting there and the
+    lowest priority seen over the whole text is the first matching category in
+    mapping order, the same answer as checking every category in turn.
+    """
+
+    def __init__(self, category_mappings):
+        self.categories = []
+        self.priorities = {}  # lowercased keyword -> index into self.categories
+
+        for category, keywords in category_mappings.items():
+            # The "Gross Pay Offset" entry maps to a category name, not keywords
+            if category.lower() == "gross pay offset":
+                continue
+
+            if isinstance(keywords, str):
+                keywords = [keywords]
+
+            priority = len(self.categories)
+            self.categories.append(category)
+            for keyword in keywords:
+                self.priorities.setdefault(keyword.lower(), priority)
+
+        # Position of each keyword in mapping order, for processing matches in that order
+        self.ranks = {keyword: rank for rank, keyword in enumerate(self.priorities)}
+
+        self.pattern = self._compile(self.priorities)
+
+        # Keywords without whitespace can be found inside a single token of a line
+        token_keywords = {k: p for k, p in self.priorities.items() if not any(c.isspace() for c in k)}
+        self.token_pattern = self._compile(token_keywords)
+
+        # Keywords that can start at the same position are prefixes of one another,
+        # and the regex only reports the first of them, so remember the others
+        self.prefix_related = {
+            keyword: [other for other in token_keywords
+                      if other != keyword and (other.startswith(keyword) or keyword.startswith(other))]
+            for keyword in token_keywords
+        }
+
+    @staticmethod
+    def _compile(priorities):
+        if not priorities:
+            return None
+        ordered = sorted(priorities, key=priorities.get)
+        return re.compile("(?=(" + "|".join(map(re.escape, ordered)) + "))")
+
+    def categorize(self, text):
+        """Return the first category in mapping order with a keyword in text, or None."""
+        if self.pattern is None:
+            return None
+
+        best = None
+        for match in self.pattern.finditer(text.lower()):
+            priority = self.priorities[match.group(1)]
+            if best is None or priority < best:
+                best = priority
+                if best == 0:
+                    break
+
+        return None if best is None else self.categories[best]
+
+    def find_in_tokens(self, line):
+        """
+        Find keywords that occur inside a single whitespace-separated token of line.
+
+        Returns:
+            Dict of keyword -> index of the first token containing it, in mapping order
+        """
+        if self.token_pattern is None:
+            return {}
+
+        line_lower = line.lower()
+        token_starts = [match.start() for match in TOKEN_RE.finditer(line_lower)]
+
+        found = {}
+        for match in self.token_pattern.finditer(line_lower):
+            start = match.start()
+            keyword = match.group(1)
+            for candidate in [keyword] + self.prefix_related[keyword]:
+                if candidate not in found and line_lower.startswith(candidate, start):
+                    found[candidate] = bisect_right(token_starts, start) - 1
+
+        return {keyword: found[keyword] for keyword in sorted(found, key=self.ranks.get)}
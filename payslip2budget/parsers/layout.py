@@ -0,0 +1,60 @@
+import re
+from typing import NamedTuple
+
+# PDF string literals, e.g. (Earnings Statement), allowing escaped characters inside
+LITERAL_RE = re.compile(rb"\(((?:[^()\\]|\\.)*)\)")
+# Only the start of the first page is searched, headers sit there
+HEADER_BYTES = 512 * 1024
+
+class LayoutFingerprint(NamedTuple):
+    """
+    Cheap signs that a PDF was produced by a given payroll provider.
+
+    producer: Regexes matched against the document's /Producer and /Creator metadata
+    header: Regex matched against the first page's text, as read by layout_hints
+    """
+    producer: tuple = ()
+    header: str = None
+
+    def matches_producer(self, producer):
+        return any(re.search(pattern, producer, re.IGNORECASE) for pattern in self.producer)
+
+    def matches_header(self, header):
+        return self.header is not None and re.search(self.header, header, re.IGNORECASE) is not None
+
+
+class LayoutHints:
+    """
+    What layout detection may look at, read lazily from the PDF with PyPDF2.
+
+    Neither is a real text extraction: producer comes from the document info
+    dictionary, and header joins the string literals of the first page's content
+    stream. That costs milliseconds, but finds nothing on documents whose text is
+    only in hex or CID-encoded strings.
+    """
+
+    def __init__(self, stream):
+        """
+        Args:
+            stream: PDF opened in binary mode; objects are read from it on demand
+        """
+        # Only needed when there is more than one layout to choose from
+        import PyPDF2
+
+        self.reader = PyPDF2.PdfReader(stream)
+        self._header = None
+
+    @property
+    def producer(self):
+        metadata = self.reader.metadata or {}
+        return " ".join(str(metadata.get(key, "")) for key in ("/Producer", "/Creator"))
+
+    @property
+    def header(self):
+        if self._header is None:
+            contents = self.reader.pages[0].get_contents() if len(self.reader.pages) else None
+            data = contents.get_data()[:HEADER_BYTES] if contents is not None else b""
+            text = b"".join(LITERAL_RE.findall(data)).decode("latin-1")
+            # Words split across literals run together, so header patterns should allow for missing spaces
+            self._header = " ".join(text.split())
+        return self._header
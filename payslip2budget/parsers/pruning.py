@@ -0,0 +1,107 @@
+import json
+import os
+import re
+from payslip2budget.source import as_source
+
+# Lines the parser acts on besides keyword items
+SECTION_MARKERS = ["check date", "tax deductions", "additional deductions"]
+
+def load_page_spec(config):
+    """
+    Load a per-layout page/region spec from a JSON file or dictionary.
+
+    The spec has two optional keys:
+        pages: 1-based page numbers that can hold deduction or check date lines
+        regions: [x0, top, x1, bottom] boxes in PDF points from the top-left corner;
+                 only text inside them is extracted
+
+    Returns:
+        Dict with "pages" (sorted 0-based indices or None) and "regions" (list of tuples or None)
+    """
+    if isinstance(config, str):
+        if not os.path.exists(config):
+            raise FileNotFoundError(f"Page spec not found: {config}")
+        with open(config, 'r') as f:
+            config = json.load(f)
+
+    pages = config.get("pages")
+    if pages is not None:
+        if any(not isinstance(page, int) or page < 1 for page in pages):
+            raise ValueError("Page spec 'pages' must be 1-based page numbers")
+        pages = sorted({page - 1 for page in pages})
+
+    regions = config.get("regions")
+    if regions is not None:
+        if any(len(region) != 4 for region in regions):
+            raise ValueError("Page spec 'regions' must be [x0, top, x1, bottom] boxes")
+        regions = [tuple(float(value) for value in region) for region in regions]
+
+    return {"pages": pages, "regions": regions or None}
+
+
+class PageProbe:
+    """
+    Cheap check of which pages can contain a line the parser would use.
+
+    Pages without fonts (scanned check stubs, blank pages) are dropped without reading
+    any text. The rest are read with PyPDF2, which is much faster than a layout
+    extraction, and kept if they mention a category keyword or a section marker.
+    """
+
+    def __init__(self, keywords):
+        # PyPDF2 spacing differs from pdfplumber's, so compare with whitespace collapsed
+        terms = {" ".join(term.lower().split()) for term in list(keywords) + SECTION_MARKERS}
+        terms.discard("")
+        self.pattern = re.compile("|".join(map(re.escape, sorted(terms))))
+
+    @staticmethod
+    def _has_fonts(page):
+        resources = page.get("/Resources")
+        if resources is None:
+            return False
+        resources = resources.get_object()
+        if "/Font" in resources:
+            return True
+
+        # Form XObjects carry their own resources, so only pages of plain images are text-free
+        xobjects = resources.get("/XObject")
+        if xobjects is None:
+            return False
+        return any(xobject.get_object().get("/Subtype") != "/Image" for xobject in xobjects.get_object().values())
+
+    def select_pages(self, pdf_path, candidates=None):
+        """
+        Return the indices of the pages worth extracting, and the document's page count.
+
+        Args:
+            pdf_path: Path to the PDF file, or anything else as_source accepts
+            candidates: Optional 0-based page indices to probe (default: every page)
+        """
+        import PyPDF2
+
+        with as_source(pdf_path).open() as f:
+            reader = PyPDF2.PdfReader(f)
+            total = len(reader.pages)
+            if candidates is None:
+                candidates = range(total)
+
+            selected = []
+            for index in candidates:
+                if index >= total:
+                    continue
+                page = reader.pages[index]
+                if not self._has_fonts(page):
+                    continue
+                text = " ".join((page.extract_text() or "").lower().split())
+                if self.pattern.search(text):
+                    selected.append(index)
+
+        return selected, total
+
+
+def count_pages(pdf_path):
+    """Return the number of pages in the PDF without extracting any text."""
+    import PyPDF2
+
+    with as_source(pdf_path).open() as f:
+        return len(PyPDF2.PdfReader(f).pages)
@@ -0,0 +1,77 @@
+from payslip2budget.parsers.adp import PayslipParser
+from payslip2budget.source import as_source
+
+# Payslip parsers by layout name. Each class declares a LayoutFingerprint as `layout`
+# and takes the same constructor arguments as PayslipParser.
+PARSERS = {
+    "adp": PayslipParser,
+}
+
+# Used when no fingerprint matches
+DEFAULT_PARSER = "adp"
+
+def register_parser(name, parser_class):
+    """Add a parser for another payroll provider's layout."""
+    PARSERS[name] = parser_class
+
+def detect_parser(pdf_path, parsers=None, default=DEFAULT_PARSER):
+    """
+    Return the name of the parser whose layout fingerprint matches the PDF.
+
+    Producer metadata is checked for every parser before any page content is read.
+    Unreadable files go to the default parser, which reports the error when parsing.
+    """
+    from payslip2budget.parsers.layout import LayoutHints
+
+    parsers = PARSERS if parsers is None else parsers
+    try:
+        with as_source(pdf_path).open() as f:
+            hints = LayoutHints(f)
+            for name, parser_class in parsers.items():
+                if parser_class.layout.matches_producer(hints.producer):
+                    return name
+            for name, parser_class in parsers.items():
+                if parser_class.layout.matches_header(hints.header):
+                    return name
+    except Exception:
+        pass
+    return default
+
+
+class ParserDispatcher:
+    """
+    Hand each PDF to the parser for its layout, building each parser on first use.
+
+    Every parser shares the same category configuration, payee, cache and options.
+    """
+
+    def __init__(self, category_config=None, payee="Employer", cache=None, parser="auto", **parser_options):
+        """
+        Args:
+            parser: Name of a registered parser, or "auto" to detect each PDF's layout
+            parser_options: Further parser options (extractor, prune, page_spec)
+        """
+        if parser != "auto" and parser not in PARSERS:
+            raise ValueError(f"Unsupported parser: {parser}")
+
+        self.category_config = category_config
+        self.payee = payee
+        self.cache = cache
+        self.parser = parser
+        self.parser_options = parser_options
+        self.parsers = {}
+
+    def name_for(self, pdf_path):
+        if self.parser != "auto":
+            return self.parser
+        # With a single layout registered there is nothing to detect
+        if len(PARSERS) == 1:
+            return next(iter(PARSERS))
+        return detect_parser(pdf_path)
+
+    def parser_for(self, pdf_path):
+        name = self.name_for(pdf_path)
+        if name not in self.parsers:
+            self.parsers[name] = PARSERS[name](self.category_config, self.payee, self.cache,
+                                               **self.parser_options)
+        return self.parsers[name]
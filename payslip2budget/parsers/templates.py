@@ -0,0 +1,242 @@
+import hashlib
+import json
+import os
+import tempfile
+from payslip2budget.cache import DEFAULT_CACHE_DIR
+from payslip2budget.instrumentation import span, count
+from payslip2budget.parsers.tokenizer import parse_amount
+from payslip2budget.parsers.extractors import plumber_pages
+from payslip2budget.source import as_source
+
+DEFAULT_TEMPLATE_DIR = os.path.join(DEFAULT_CACHE_DIR, "templates")
+# Bump this whenever learning would produce different templates for the same page
+TEMPLATE_VERSION = 1
+
+# Words whose tops are this close in points share a row
+ROW_TOLERANCE = 3.0
+# Item descriptions starting this close together belong to one table
+TABLE_TOLERANCE = 5.0
+# Amounts are right-aligned, so amounts ending this close together share a column.
+# It is wide enough for the '*' some layouts put after excluded amounts.
+COLUMN_TOLERANCE = 8.0
+# Leeway around learned edges for amounts a little wider than any seen while learning
+EDGE_MARGIN = 2.0
+RIGHT_MARGIN = 10.0
+# Sign and currency marks printed as separate words before an amount
+AMOUNT_MARKS = {"-", "+", "$"}
+# Header words that identify a layout come from this top fraction of the first page
+HEADER_FRACTION = 0.25
+
+
+def page_words(pdf_path, pages=None, regions=None, low_memory=False):
+    """
+    Yield the words of each page, with their boxes, from pdfplumber.
+
+    Args:
+        pdf_path: Path to the PDF file, or anything else as_source accepts
+        pages: Optional 0-based page indices to read
+        regions: Optional [x0, top, x1, bottom] boxes; only words inside them are kept
+        low_memory: As for the extractors, see plumber_pages
+
+    Yields:
+        (words, page height) per page, each word a dict with text, x0, x1 and top
+    """
+    import pdfplumber
+
+    with as_source(pdf_path).open() as f:
+        with span("pdf.open"):
+            pdf = pdfplumber.open(f, pages=None if pages is None else [index + 1 for index in pages])
+        with pdf:
+            for page in plumber_pages(pdf, low_memory):
+                count("pages")
+                with span("pdf.extract_words"):
+                    words = page.extract_words()
+                if regions is not None:
+                    words = [word for word in words
+                             if any(word["x0"] < x1 and word["x1"] > x0 and word["top"] < bottom and word["bottom"] > top
+                                    for x0, top, x1, bottom in regions)]
+                yield words, page.height
+
+
+def group_rows(words):
+    """Group words into rows by their tops, each row ordered left to right."""
+    rows = []
+    row_top = None
+    for word in sorted(words, key=lambda word: word["top"]):
+        if row_top is None or word["top"] - row_top > ROW_TOLERANCE:
+            rows.append([])
+            row_top = word["top"]
+        rows[-1].append(word)
+    for row in rows:
+        row.sort(key=lambda word: word["x0"])
+    return rows
+
+def row_text(row):
+    return " ".join(word["text"] for word in row)
+
+
+def layout_key(name, words, page_height):
+    """
+    Key a layout by the digit-free words at the top of its first page.
+
+    Employer names, addresses and headings stay the same from one payslip to the
+    next, while dates, amounts and reference numbers change and are left out.
+    """
+    header = sorted({word["text"].lower() for word in words
+                     if word["top"] < page_height * HEADER_FRACTION
+                     and not any(char.isdigit() for char in word["text"])})
+    digest = hashlib.sha256(json.dumps([TEMPLATE_VERSION, header]).encode("utf-8")).hexdigest()
+    return f"{name}-{digest[:16]}"
+
+
+def _is_amount(text):
+    return parse_amount(text.replace("*", "")) is not None
+
+def _row_entries(row):
+    """Split a row into (description words, amount boxes) runs, read left to right."""
+    entries = []
+    description = []
+    amounts = []
+    mark_x0 = None
+    for word in row:
+        if word["text"] in AMOUNT_MARKS:
+            mark_x0 = word["x0"] if mark_x0 is None else mark_x0
+        elif _is_amount(word["text"]):
+            # A sign printed before the amount belongs to its column
+            amounts.append((word["x0"] if mark_x0 is None else mark_x0, word["x1"]))
+            mark_x0 = None
+        else:
+            if amounts:
+                entries.append((description, amounts))
+                description, amounts = [], []
+            description.append(word)
+            mark_x0 = None
+    if description and amounts:
+        entries.append((description, amounts))
+    return entries
+
+def _clusters(values, tolerance, key):
+    """Split values into runs whose keys lie within tolerance of the run's first key."""
+    clusters = []
+    for value in sorted(values, key=key):
+        if clusters and key(value) - key(clusters[-1][0]) <= tolerance:
+            clusters[-1].append(value)
+        else:
+            clusters.append([value])
+    return clusters
+
+
+def learn_template(rows, categorize):
+    """
+    Learn the column positions of every table holding categorized items on a page.
+
+    Each row is split into item descriptions and the amounts after them. Items whose
+    description categorizes are grouped into tables by where the description starts,
+    and each table's amounts into columns by where they end. The last column of a
+    table with more than one is year-to-date and the one before it the current
+    period; any in between (rates, hours) are skipped. Layouts without aligned
+    columns, where the template would miss some of the items, learn nothing.
+
+    Args:
+        rows: Rows of words from group_rows
+        categorize: Callable returning the category of a description, or None
+
+    Returns:
+        Template dictionary, or None when no template reads the page's categorized items
+    """
+    items = []
+    for row in rows:
+        for description, amounts in _row_entries(row):
+            if categorize(row_text(description).replace("*", "")):
+                items.append((description[0]["x0"], amounts))
+    if not items:
+        return None
+
+    tables = []
+    for table in _clusters(items, TABLE_TOLERANCE, key=lambda item: item[0]):
+        boxes = [(index, x0, x1) for index, (_, amounts) in enumerate(table) for x0, x1 in amounts]
+        columns = [[round(min(box[1] for box in column) - EDGE_MARGIN, 1), round(max(box[2] for box in column) + RIGHT_MARGIN, 1)]
+                   for column in _clusters(boxes, COLUMN_TOLERANCE, key=lambda box: box[2])
+                   # Numbers beside only the odd item (page furniture, margin notes) are not a column
+                   if 2 * len({box[0] for box in column}) > len(table)]
+        if not columns:
+            continue
+        current = columns[-2] if len(columns) > 1 else columns[0]
+        ytd = columns[-1] if len(columns) > 1 else None
+        # Amounts overflowing to the left stay in their column up to the next column's edge
+        if ytd is not None:
+            current[1] = ytd[0]
+        tables.append({
+            "description": [round(min(x0 for x0, _ in table) - EDGE_MARGIN, 1), columns[0][0]],
+            "current": current,
+            "ytd": ytd,
+        })
+    if not tables:
+        return None
+
+    # Only keep a template that reads back every item it was learned from
+    template = {"version": TEMPLATE_VERSION, "tables": tables}
+    found = sum(1 for row_items in apply_template(rows, template) for name, _, _ in row_items if categorize(name))
+    return template if found == len(items) else None
+
+
+def _column_text(words, bounds):
+    return "".join(word["text"] for word in words if bounds[0] <= (word["x0"] + word["x1"]) / 2 < bounds[1])
+
+def apply_template(rows, template):
+    """
+    Read each row's items by bucketing its words into the template's columns.
+
+    Returns:
+        One list of (item_name, amount, ytd) tuples per row, ytd being None when
+        the table has no YTD column or the row leaves it empty
+    """
+    items = []
+    for row in rows:
+        row_items = []
+        for table in template["tables"]:
+            description = " ".join(word["text"] for word in row
+                                   if table["description"][0] <= (word["x0"] + word["x1"]) / 2 < table["description"][1])
+            if not description:
+                continue
+            amount = parse_amount(_column_text(row, table["current"]).replace("*", ""))
+            if amount is None:
+                continue
+            ytd = parse_amount(_column_text(row, table["ytd"]).replace("*", "")) if table["ytd"] else None
+            row_items.append((description.replace("*", ""), amount, ytd))
+        items.append(row_items)
+    return items
+
+
+class TemplateStore:
+    """
+    Learned column templates on disk, one JSON file per layout key.
+    """
+
+    def __init__(self, directory=DEFAULT_TEMPLATE_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        """Return the template stored under key, or None."""
+        try:
+            with open(self._path(key), "r") as f:
+                template = json.load(f)
+        except (IOError, ValueError):
+            return None
+        return template if template.get("version") == TEMPLATE_VERSION else None
+
+    def put(self, key, template):
+        # Write to a temporary file first so concurrent readers never see a partial template
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(template, f)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
@@ -0,0 +1,86 @@
+import re
+from typing import NamedTuple, Optional
+
+# A plain or scientific decimal, once '$' and ',' are stripped and a trailing '-' moved to the front
+AMOUNT_RE = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+
+class Token(NamedTuple):
+    text: str
+    amount: Optional[float]  # None when the token is part of an item name
+
+    @property
+    def is_amount(self) -> bool:
+        return self.amount is not None
+
+
+def parse_amount(text):
+    """Parse money text such as '$1,100.00' or '100.00-' into a float, or None if it is not an amount."""
+    text = text.replace('$', '').replace(',', '')
+
+    # Handle trailing minus sign
+    if text.endswith('-'):
+        text = '-' + text[:-1]
+
+    if AMOUNT_RE.fullmatch(text) is None:
+        return None
+    return float(text)
+
+
+def tokenize(line):
+    """Split a payslip line on whitespace and classify every token once as a name or an amount."""
+    return [Token(part, parse_amount(part)) for part in line.split()]
+
+
+def name_segments(tokens):
+    """
+    Group consecutive name tokens into candidate item descriptions.
+
+    Returns:
+        List of (start, end) token index ranges, end exclusive
+    """
+    segments = []
+    start = None
+
+    for i, token in enumerate(tokens):
+        if token.is_amount:
+            if start is not None:
+                segments.append((start, i))
+                start = None
+        elif start is None:
+            start = i
+
+    # Add any remaining item at the end
+    if start is not None:
+        segments.append((start, len(tokens)))
+
+    return segments
+
+
+def first_amount(tokens, start):
+    """
+    Return the first non-zero amount at or after start, or None.
+
+    The last column is year-to-date, so any token with the same text as the last
+    one counts as zero and is passed over in favour of the current period amount.
+    """
+    ytd_text = tokens[-1].text
+    for token in tokens[start:]:
+        amount = 0 if token.text == ytd_text else token.amount
+        if amount:
+            return amount
+    return None
+
+
+def ytd_amount(tokens, start):
+    """
+    Return the year-to-date amount of the item whose amounts begin at start, or None.
+
+    That is the last amount in the run of amounts starting at start, as long as the
+    run also holds a current period amount before it.
+    """
+    end = start
+    while end < len(tokens) and tokens[end].is_amount:
+        end += 1
+    if end - start < 2:
+        return None
+    return tokens[end - 1].amount
@@ -0,0 +1,90 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from payslip2budget.batch import PayslipResult, _init_worker, _parse_one
+
+# Parsed payslips allowed to wait for upload before parsing pauses
+DEFAULT_QUEUE_SIZE = 4
+
+
+async def parse_and_export(paths, exporter, category_config=None, payee="Employer", workers=None,
+                           cache_dir=None, queue_size=DEFAULT_QUEUE_SIZE, profile=False,
+                           **parser_options) -> list[PayslipResult]:
+    """
+    Parse payslips and export them to the API, overlapping the two stages.
+
+    Payslips are parsed in an executor while earlier ones upload, so the run takes
+    about as long as the slower stage rather than both added together. Parsed payslips
+    wait in a queue of queue_size entries. When uploads fall behind, the queue fills
+    and parsing pauses. Every payslip waiting when an upload finishes is sent in the
+    next upload, so a slow API gets fewer, larger requests.
+
+    Args:
+        paths: Iterable of PDF paths
+        exporter: TransactionExporter with an API configured
+        workers: Number of parser processes (default: CPU count). With one worker,
+                 parsing runs in a thread of this process.
+        Remaining arguments are as for batch.parse_batch.
+
+    Returns:
+        List of PayslipResult ordered by check date, then path
+    """
+    paths = list(paths)
+    workers = min(workers or os.cpu_count() or 1, max(len(paths), 1))
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=queue_size)
+    results = []
+
+    if workers == 1:
+        # The GIL is released during the uploads' socket waits, so a thread is enough here
+        _init_worker(category_config, payee, cache_dir, parser_options)
+        executor = ThreadPoolExecutor(max_workers=1)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                       initargs=(category_config, payee, cache_dir, parser_options, profile))
+
+    async def produce():
+        try:
+            # At most one payslip per worker is being parsed at a time
+            parsing = set()
+            for path in paths:
+                if len(parsing) >= workers:
+                    done, parsing = await asyncio.wait(parsing, return_when=asyncio.FIRST_COMPLETED)
+                    for future in done:
+                        await queue.put(future.result())
+                parsing.add(loop.run_in_executor(executor, _parse_one, path))
+
+            for future in asyncio.as_completed(parsing):
+                await queue.put(await future)
+        finally:
+            # The consumer stops at the end marker, even when parsing failed (e.g. a worker
+            # process was killed); awaiting the producer then raises the failure
+            await queue.put(None)
+
+    async def consume():
+        finished = False
+        while not finished:
+            batch = [await queue.get()]
+            while not queue.empty():
+                batch.append(queue.get_nowait())
+            if batch[-1] is None:
+                finished = True
+                batch.pop()
+
+            results.extend(batch)
+            transactions = [txn for result in batch if not result.error for txn in result.transactions]
+            if transactions:
+                await exporter.export_async(transactions)
+
+    producer = asyncio.ensure_future(produce())
+    try:
+        await consume()
+        await producer
+    finally:
+        if not producer.done():
+            producer.cancel()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    return sorted(results, key=PayslipResult.sort_key)
@@ -0,0 +1,111 @@
+import os
+import re
+from dataclasses import dataclass, field
+from itertools import repeat
+from typing import Optional
+from payslip2budget.batch import _init_worker, _parse_one
+from payslip2budget.source import as_source
+
+# Stub headers, matched on PyPDF2's page text, whose spacing is loose
+EMPLOYEE_ID_RE = re.compile(r"employee\s*(?:id|no\.?|number|#)\s*:?\s*([a-z0-9][a-z0-9-]*)", re.IGNORECASE)
+CHECK_DATE_RE = re.compile(r"check\s*date\s*:?\s*(\d{1,2}/\d{1,2}/\d{2,4})", re.IGNORECASE)
+
+@dataclass
+class Stub:
+    pages: list = field(default_factory=list)  # Sorted 0-based page indices
+    employee: Optional[str] = None
+    check_date: Optional[str] = None  # As printed on the stub
+
+
+def split_stubs(marks) -> list[Stub]:
+    """
+    Group consecutive pages into stubs from the (employee id, check date) found on each.
+
+    Where the register prints employee ids, a stub ends when the id or the check date
+    changes. Without them, every page with a check date starts a stub. Pages with
+    neither belong to the stub before them.
+
+    Args:
+        marks: One (employee id or None, check date or None) pair per page
+    """
+    uses_ids = any(employee for employee, _ in marks)
+    stubs = []
+
+    for index, (employee, check_date) in enumerate(marks):
+        current = stubs[-1] if stubs else None
+        new_date = check_date is not None and current is not None and current.check_date is not None
+        if current is None:
+            new = True
+        elif uses_ids:
+            new = ((employee is not None and current.employee is not None and employee != current.employee)
+                   or (new_date and check_date != current.check_date))
+        else:
+            new = new_date
+
+        if new:
+            stubs.append(Stub([index], employee, check_date))
+        else:
+            current.pages.append(index)
+            current.employee = current.employee or employee
+            current.check_date = current.check_date or check_date
+
+    return stubs
+
+
+def find_stubs(pdf_path) -> list[Stub]:
+    """
+    Find the employee stubs of a combined payroll register from PyPDF2's page text.
+
+    That costs a few milliseconds a page, far less than the layout extraction the
+    stubs are then parsed with.
+    """
+    import PyPDF2
+
+    marks = []
+    with as_source(pdf_path).open() as f:
+        for page in PyPDF2.PdfReader(f).pages:
+            text = page.extract_text() or ""
+            employee = EMPLOYEE_ID_RE.search(text)
+            check_date = CHECK_DATE_RE.search(text)
+            marks.append((employee.group(1) if employee else None, check_date.group(1) if check_date else None))
+    return split_stubs(marks)
+
+
+def parse_register(pdf_path, category_config=None, payee="Employer", workers=None, cache_dir=None,
+                   profile=False, stubs=None, **parser_options):
+    """
+    Parse every stub of a payroll register as a payslip of its own.
+
+    Each stub gets its own check date, import ids and Gross Pay Offset rows. Stubs
+    are parsed in a process pool and yielded in page order as soon as each one and
+    those before it are done, so a caller can write out one employee while the
+    rest are still parsing.
+
+    Args:
+        pdf_path: Path to the register PDF, or anything else as_source accepts
+        workers: Number of worker processes (default: CPU count). With one worker,
+                 a single stub, or a PDF that is not a file on disk, parsing runs in
+                 this process.
+        stubs: Stubs to parse (default: find_stubs(pdf_path))
+        Remaining arguments are as for batch.parse_batch.
+
+    Yields:
+        (Stub, PayslipResult) pairs
+    """
+    source = as_source(pdf_path)
+    stubs = find_stubs(source) if stubs is None else stubs
+    workers = min(workers or os.cpu_count() or 1, max(len(stubs), 1))
+
+    # Worker processes reopen the register by its path
+    if workers == 1 or source.path is None:
+        _init_worker(category_config, payee, cache_dir, parser_options)
+        for stub in stubs:
+            yield stub, _parse_one(source, stub.pages)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(category_config, payee, cache_dir, parser_options, profile)) as executor:
+        results = executor.map(_parse_one, repeat(source.path), [stub.pages for stub in stubs])
+        yield from zip(stubs, results)
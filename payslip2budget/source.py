@@ -0,0 +1,171 @@
+import hashlib
+import io
+import mmap
+import os
+import stat
+import sys
+
+# Local files at least this large are memory-mapped instead of read through a buffer
+MMAP_MIN_BYTES = 1024 * 1024
+
+
+class _MappedFile(io.BufferedIOBase):
+    """Read-only binary stream over an mmap, for libraries that only accept io streams (pdfminer)."""
+
+    def __init__(self, mapping):
+        self._mapping = mapping
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def read(self, size=-1):
+        return self._mapping.read(size)
+
+    read1 = read
+
+    def readline(self, size=-1):
+        if size is None or size < 0:
+            return self._mapping.readline()
+        return super().readline(size)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        self._mapping.seek(offset, whence)
+        return self._mapping.tell()
+
+    def tell(self):
+        return self._mapping.tell()
+
+    def close(self):
+        self._mapping.close()
+        super().close()
+
+
+class _ViewReader(io.RawIOBase):
+    """Raw stream over a memoryview, copying out only the bytes each read asks for."""
+
+    def __init__(self, view):
+        self._view = view
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        chunk = self._view[self._position:self._position + len(buffer)]
+        buffer[:len(chunk)] = chunk
+        self._position += len(chunk)
+        return len(chunk)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        if offset < 0:
+            raise ValueError(f"negative seek position {offset}")
+        self._position = offset
+        return offset
+
+    def tell(self):
+        return self._position
+
+
+class PdfSource:
+    """
+    A PDF to parse, given as a path, bytes, a memoryview, a binary file object, or
+    "-" for stdin.
+
+    open() hands out an independent, seekable binary stream each time it is called,
+    so several readers can work through the document at once. Large local files and
+    file objects backed by a regular file are memory-mapped, so the PDF libraries
+    read straight from the page cache and the document is never copied into Python
+    memory; such a file object must stay open until parsing is done. bytes,
+    bytearrays and memoryviews are shared, not copied, so leave them unchanged
+    until parsing is done. Other streams, such as a pipe on stdin, are read once into
+    memory, so create one PdfSource per document and pass it around rather than
+    the original stream.
+    """
+
+    def __init__(self, source):
+        # path: filesystem path to reopen, e.g. in another process; None for in-memory input
+        self.path = None
+        self._fileno = None
+        self._data = None
+        self._view = None
+        self._digest = None
+
+        if isinstance(source, (str, os.PathLike)) and os.fspath(source) == "-":
+            source = sys.stdin.buffer
+
+        if isinstance(source, (str, os.PathLike)):
+            self.path = os.fspath(source)
+            self.name = self.path
+        elif isinstance(source, bytes):
+            # bytes can back any number of BytesIO streams without a copy
+            self._data = source
+            self.name = "<bytes>"
+        elif isinstance(source, (bytearray, memoryview)):
+            # BytesIO would copy these, so they are read through the view instead
+            view = memoryview(source)
+            self._view = view.cast("B") if view.contiguous else memoryview(view.tobytes())
+            self.name = "<bytes>"
+        elif self._is_regular_file(source):
+            self._fileno = source.fileno()
+            self.name = getattr(source, "name", "<file>")
+        else:
+            self._data = source.read()
+            self.name = getattr(source, "name", "<stream>")
+            if not isinstance(self.name, str):
+                self.name = "<stream>"
+
+    @staticmethod
+    def _is_regular_file(stream):
+        try:
+            return stat.S_ISREG(os.fstat(stream.fileno()).st_mode)
+        except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+            return False
+
+    def __str__(self):
+        return self.name
+
+    def open(self):
+        """Return a new binary stream positioned at the start of the PDF; close it when done."""
+        if self._data is not None:
+            return io.BytesIO(self._data)
+        if self._view is not None:
+            return io.BufferedReader(_ViewReader(self._view))
+        if self._fileno is not None:
+            # An empty file has nothing to map, let the PDF library report it as such
+            if os.fstat(self._fileno).st_size == 0:
+                return io.BytesIO(b"")
+            return _MappedFile(mmap.mmap(self._fileno, 0, access=mmap.ACCESS_READ))
+
+        if os.stat(self.path).st_size < MMAP_MIN_BYTES:
+            return open(self.path, "rb")
+        with open(self.path, "rb") as f:
+            # The mapping stays valid once the file is closed
+            return _MappedFile(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def digest(self):
+        """SHA-256 hex digest of the PDF's content, computed once."""
+        if self._digest is None:
+            digest = hashlib.sha256()
+            if self._view is not None:
+                digest.update(self._view)
+            else:
+                with self.open() as f:
+                    for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                        digest.update(chunk)
+            self._digest = digest.hexdigest()
+        return self._digest
+
+
+def as_source(source):
+    """Return source as a PdfSource, wrapping paths, bytes and streams."""
+    return source if isinstance(source, PdfSource) else PdfSource(source)
@@ -0,0 +1,132 @@
+import csv
+import numpy as np
+from payslip2budget.models.transaction_base import Transaction, format_cents
+
+# Stands in for a missing YTD amount in the int64 column
+NO_YTD = np.iinfo(np.int64).min
+
+
+class PayslipSummary:
+    """
+    Transactions from many payslips held as NumPy columns for whole-history reports.
+
+    Each transaction becomes one row of dates, category codes, item codes and
+    amounts in cents, sorted by check date. Totals, running sums and the
+    year-to-date check are computed on those columns without a Python loop
+    over the rows.
+    """
+
+    def __init__(self, transactions):
+        records = [Transaction.from_dict(txn) for txn in transactions]
+        count = len(records)
+
+        dates = np.array([txn.date for txn in records], dtype="datetime64[D]")
+        # Stable, so rows from the same payslip keep their order
+        order = np.argsort(dates, kind="stable")
+
+        self.dates = dates[order]
+        self.cents = np.fromiter((txn.amount for txn in records), dtype=np.int64, count=count)[order]
+        # Payslips print YTD amounts unsigned next to signed current amounts (50.00- 150.00),
+        # so each YTD amount takes the sign of its row's amount
+        self.ytd = np.fromiter(
+            (NO_YTD if txn.ytd is None else abs(txn.ytd) if txn.amount >= 0 else -abs(txn.ytd) for txn in records),
+            dtype=np.int64, count=count
+        )[order]
+
+        # Uncategorized rows are grouped under an empty category
+        categories = np.array([txn.category or "" for txn in records], dtype=str)[order]
+        memos = np.array([txn.memo for txn in records], dtype=str)[order]
+        self.categories, self.category_codes = np.unique(categories, return_inverse=True)
+
+        # A payslip item is its category and memo; YTD columns are kept per item
+        items, self.item_codes = np.unique(np.char.add(np.char.add(categories, "\x1f"), memos), return_inverse=True)
+        self.items = [tuple(item.split("\x1f", 1)) for item in items.tolist()]
+
+    def __len__(self):
+        return len(self.cents)
+
+    def category_totals(self):
+        """Return the total in cents for each category, in the order of self.categories."""
+        # bincount sums in float64, which is exact for any realistic total in cents
+        totals = np.bincount(self.category_codes, weights=self.cents, minlength=len(self.categories))
+        return totals.astype(np.int64)
+
+    def monthly_totals(self):
+        """
+        Total each category per calendar month.
+
+        Returns:
+            (months, totals): datetime64[M] array of the months with transactions, and a
+            months x categories array of totals in cents
+        """
+        months, month_codes = np.unique(self.dates.astype("datetime64[M]"), return_inverse=True)
+        cells = month_codes * len(self.categories) + self.category_codes
+        totals = np.bincount(cells, weights=self.cents, minlength=len(months) * len(self.categories))
+        return months, totals.astype(np.int64).reshape(len(months), len(self.categories))
+
+    def running_totals(self):
+        """Return, for every row, the sum of its item's amounts so far in the calendar year."""
+        if not len(self):
+            return self.cents.copy()
+
+        years = self.dates.astype("datetime64[Y]").astype(np.int64)
+        groups = self.item_codes * (years.max() - years.min() + 1) + (years - years.min())
+
+        # Rows are already in date order, so a stable sort keeps each group chronological
+        order = np.argsort(groups, kind="stable")
+        cents = self.cents[order]
+        sums = np.cumsum(cents)
+
+        # Subtract everything summed before each group's first row
+        starts = np.ones(len(order), dtype=bool)
+        starts[1:] = groups[order][1:] != groups[order][:-1]
+        first = np.maximum.accumulate(np.where(starts, np.arange(len(order)), 0))
+        running = np.empty_like(sums)
+        running[order] = sums - sums[first] + cents[first]
+        return running
+
+    def ytd_mismatches(self):
+        """
+        Compare each item's running sum with the YTD amount printed next to it.
+
+        A mismatch usually means a payslip from earlier in the year is missing from
+        the history, or a line was parsed wrongly.
+
+        Returns:
+            Indices of the rows whose running sum differs from their YTD amount, and
+            the running sums of all rows
+        """
+        running = self.running_totals()
+        mismatched = (self.ytd != NO_YTD) & (running != self.ytd)
+        return np.flatnonzero(mismatched), running
+
+
+def write_report(summary, stream):
+    """Write the category, monthly and YTD mismatch tables as CSV sections separated by blank lines."""
+    writer = csv.writer(stream, lineterminator="\n")
+
+    writer.writerow(["Category", "Total"])
+    for category, total in zip(summary.categories, summary.category_totals()):
+        writer.writerow([category, format_cents(int(total))])
+
+    writer.writerow([])
+    months, totals = summary.monthly_totals()
+    writer.writerow(["Month", *summary.categories])
+    for month, row in zip(months, totals):
+        writer.writerow([str(month), *(format_cents(int(total)) for total in row)])
+
+    writer.writerow([])
+    mismatches, running = summary.ytd_mismatches()
+    writer.writerow(["Date", "Category", "Memo", "Running", "YTD", "Difference"])
+    for row in mismatches:
+        category, memo = summary.items[summary.item_codes[row]]
+        writer.writerow([
+            str(summary.dates[row]),
+            category,
+            memo,
+            format_cents(int(running[row])),
+            format_cents(int(summary.ytd[row])),
+            format_cents(int(running[row] - summary.ytd[row])),
+        ])
+
+    return len(mismatches)
@@ -0,0 +1,221 @@
+import hashlib
+import json
+import os
+import select
+import struct
+import sys
+import tempfile
+import time
+from payslip2budget.cache import DEFAULT_CACHE_DIR
+
+# Kept apart from the parse cache's entries, which it evicts by age
+DEFAULT_STATE_DIR = os.path.join(DEFAULT_CACHE_DIR, "watch")
+
+# Seconds a file's size and mtime must stay unchanged before it is parsed
+DEFAULT_DEBOUNCE = 2.0
+# Seconds between directory scans when inotify is unavailable
+DEFAULT_POLL_INTERVAL = 5.0
+
+# inotify event bits, from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+INOTIFY_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+# struct inotify_event: int wd; uint32_t mask, cookie, len; then len bytes of name
+INOTIFY_EVENT = struct.Struct("iIII")
+
+
+class Inotify:
+    """
+    Minimal inotify watch on one directory through libc, reporting the names of changed entries.
+
+    Raises OSError where inotify is unavailable, so callers can fall back to polling.
+    """
+
+    def __init__(self, directory):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+
+        import ctypes
+        import ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        # IN_NONBLOCK and IN_CLOEXEC share their values with O_NONBLOCK and O_CLOEXEC
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), INOTIFY_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {directory}")
+
+    def wait(self, timeout):
+        """Block until an event arrives or timeout seconds pass."""
+        select.select([self.fd], [], [], timeout)
+
+    def read(self):
+        """Return the names of the entries changed since the last read, without blocking."""
+        names = []
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return names
+
+            offset = 0
+            while offset < len(data):
+                _, _, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+                offset += INOTIFY_EVENT.size
+                names.append(os.fsdecode(data[offset:offset + length].rstrip(b"\0")))
+                offset += length
+
+    def close(self):
+        os.close(self.fd)
+
+
+def default_state_path(directory):
+    """State file recording which payslips in directory were already processed."""
+    digest = hashlib.sha256(os.path.abspath(directory).encode("utf-8")).hexdigest()[:16]
+    path = os.path.join(DEFAULT_STATE_DIR, f"{digest}.json")
+    # Earlier versions kept the state among the parse cache's entries
+    legacy_path = os.path.join(DEFAULT_CACHE_DIR, f"watch-{digest}.json")
+    if os.path.exists(legacy_path) and not os.path.exists(path):
+        os.makedirs(DEFAULT_STATE_DIR, exist_ok=True)
+        os.replace(legacy_path, path)
+    return path
+
+
+class FolderWatcher:
+    """
+    Report new or changed PDFs in a directory once they have finished being written.
+
+    A file is ready when its size and mtime have not changed for debounce seconds,
+    so payslips still being copied in are left alone. Each file's size and mtime
+    are saved once it is processed, so a restarted watcher only reports what
+    changed while it was down. Changes are picked up with inotify where
+    available, otherwise by rescanning the directory every poll_interval seconds.
+    Subdirectories are not watched.
+    """
+
+    def __init__(self, directory, state_path=None, debounce=DEFAULT_DEBOUNCE,
+                 poll_interval=DEFAULT_POLL_INTERVAL, use_inotify=True, clock=time.monotonic):
+        self.directory = directory
+        self.state_path = state_path or default_state_path(directory)
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.clock = clock
+
+        try:
+            with open(self.state_path, "r") as f:
+                self.processed = json.load(f)
+        except (IOError, ValueError):
+            self.processed = {}
+        # path -> (signature, time the signature was first seen)
+        self.pending = {}
+
+        self.inotify = None
+        if use_inotify:
+            try:
+                self.inotify = Inotify(directory)
+            except (OSError, AttributeError):
+                # AttributeError: a libc without the inotify functions
+                pass
+
+        # Whatever changed while nothing was watching
+        self._scan()
+
+    @staticmethod
+    def _signature(path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def _scan(self):
+        for entry in os.scandir(self.directory):
+            if entry.name.lower().endswith(".pdf") and entry.is_file():
+                self._seen(entry.path)
+
+    def _seen(self, path):
+        signature = self._signature(path)
+        if signature is None or signature == self.processed.get(path):
+            self.pending.pop(path, None)
+        elif path not in self.pending or self.pending[path][0] != signature:
+            self.pending[path] = (signature, self.clock())
+
+    def poll(self):
+        """Return the paths, sorted, of changed PDFs that have been stable for the debounce interval."""
+        if self.inotify is None:
+            self._scan()
+        else:
+            for name in self.inotify.read():
+                if name.lower().endswith(".pdf"):
+                    self._seen(os.path.join(self.directory, name))
+
+        now = self.clock()
+        ready = []
+        for path, (signature, since) in list(self.pending.items()):
+            self._seen(path)
+            if self.pending.get(path) == (signature, since) and now - since >= self.debounce:
+                ready.append(path)
+        return sorted(ready)
+
+    def mark_processed(self, path):
+        """Record path as handled at its current size and mtime, so it is only reported again once it changes."""
+        signature, _ = self.pending.pop(path, (self._signature(path), None))
+        self.processed[path] = signature
+        self._save_state()
+
+    def _save_state(self):
+        # Write to a temporary file first so an interrupted write never loses the state
+        directory = os.path.dirname(self.state_path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(self.processed, f)
+            os.replace(tmp_path, self.state_path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def wait(self):
+        """Sleep until the next poll could find something: a debounce interval while files are settling."""
+        if self.inotify is None:
+            time.sleep(self.debounce if self.pending else self.poll_interval)
+        else:
+            # Nothing can become ready without an event unless a file is already settling
+            self.inotify.wait(self.debounce if self.pending else None)
+
+    def close(self):
+        if self.inotify is not None:
+            self.inotify.close()
+            self.inotify = None
+
+
+def run_watch(watcher, handle, once=False):
+    """
+    Call handle(path) for every payslip the watcher reports, until interrupted.
+
+    A payslip whose handler raises is reported on stderr and marked processed
+    anyway, so it is retried only once the file changes again.
+
+    Args:
+        watcher: FolderWatcher to poll
+        handle: Callable parsing and exporting one payslip
+        once: Return once no file is left settling instead of watching forever
+    """
+    while True:
+        for path in watcher.poll():
+            try:
+                handle(path)
+            except Exception as e:
+                print(f"[ERROR] Failed to process {path}: {type(e).__name__}: {e}", file=sys.stderr)
+            watcher.mark_processed(path)
+
+        if once and not watcher.pending:
+            return
+        watcher.wait()
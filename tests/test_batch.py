@@ -0,0 +1,62 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from payslip2budget.batch import collect_inputs, is_batch_input, parse_batch
+
+SAMPLE_PDF = "tests/fixtures/sample.pdf"
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        for name in ["b.pdf", "a.pdf"]:
+            shutil.copy(SAMPLE_PDF, os.path.join(self.tmpdir, name))
+        with open(os.path.join(self.tmpdir, "broken.pdf"), "w") as f:
+            f.write("not a pdf")
+        with open(os.path.join(self.tmpdir, "notes.txt"), "w") as f:
+            f.write("ignored")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_collect_inputs_from_directory_and_glob(self):
+        expected = [os.path.join(self.tmpdir, name) for name in ["a.pdf", "b.pdf", "broken.pdf"]]
+
+        self.assertTrue(is_batch_input(self.tmpdir))
+        self.assertEqual(collect_inputs(self.tmpdir), expected)
+        self.assertEqual(collect_inputs(os.path.join(self.tmpdir, "*.pdf")), expected)
+        self.assertFalse(is_batch_input(SAMPLE_PDF))
+
+    def test_existing_file_with_glob_characters_is_not_a_glob(self):
+        path = os.path.join(self.tmpdir, "pay[1].pdf")
+        shutil.copy(SAMPLE_PDF, path)
+
+        self.assertFalse(is_batch_input(path))
+        self.assertEqual(collect_inputs(path), [path])
+        result = subprocess.run(["python", "-m", "payslip2budget.cli", path, "-"], capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn("Offset for itemized paycheck", result.stdout)
+
+    def test_parse_batch_orders_results_and_reports_failures(self):
+        results = parse_batch(collect_inputs(self.tmpdir), workers=2)
+
+        self.assertEqual([os.path.basename(r.path) for r in results], ["broken.pdf", "a.pdf", "b.pdf"])
+        self.assertIsNotNone(results[0].error)
+        self.assertEqual(results[0].transactions, [])
+        self.assertEqual(results[1].transactions, results[2].transactions)
+        self.assertTrue(results[1].transactions)
+
+    def test_cli_batch_continues_past_failures(self):
+        result = subprocess.run(
+            ["python", "-m", "payslip2budget.cli", self.tmpdir, "-", "--workers", "2"],
+            capture_output=True, text=True
+        )
+
+        assert result.returncode == 1
+        assert "Failed to parse" in result.stderr
+        assert result.stdout.count("Offset for itemized paycheck") == 2
+
+if __name__ == '__main__':
+    unittest.main()
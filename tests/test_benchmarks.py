@@ -0,0 +1,44 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import date
+from benchmarks import run
+from benchmarks.synthetic import generate_payslip
+from payslip2budget.parsers.adp import PayslipParser
+
+class TestBenchmarks(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_synthetic_payslip_parses_every_item(self):
+        path = os.path.join(self.tmpdir, "synthetic.pdf")
+        spec = generate_payslip(path, pages=3, lines_per_page=30, keyword_density=0.5,
+                                check_date=date(2024, 7, 25), seed=3)
+
+        for extractor in ["pdfplumber", "pypdf2"]:
+            transactions = PayslipParser(extractor=extractor).parse_payslip(path)
+            # Every item plus the gross pay offset
+            self.assertEqual(len(transactions), spec["items"] + 1, extractor)
+            self.assertEqual(transactions[0]["Date"], "2024-07-25")
+        self.assertEqual((spec["pages"], spec["lines"]), (3, 90))
+
+    def test_run_writes_json_results(self):
+        output = os.path.join(self.tmpdir, "results.json")
+
+        run.main(["--files", "2", "--pages", "1", "--rows", "10", "--output", output])
+
+        with open(output) as f:
+            results = json.load(f)["results"]
+        self.assertGreater(results["parse"]["pages_per_sec"], 0)
+        self.assertEqual(set(results["formatters"]) - {"peak_rss_bytes"}, {"ynab", "mint", "everydollar", "monarch"})
+        self.assertGreater(results["ynab"]["transactions_per_sec"], 0)
+        self.assertGreater(results["startup"]["cli_import_ms"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+from benchmarks.synthetic import generate_payslip
+from payslip2budget.cache import ParseCache
+from payslip2budget.parsers.adp import PayslipParser
+
+SAMPLE_PDF = "tests/fixtures/sample.pdf"
+
+class TestParseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.cache = ParseCache(self.tmpdir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_hit_returns_transactions_without_opening_pdf(self):
+        parser = PayslipParser(cache=self.cache)
+        expected = parser.parse_payslip(SAMPLE_PDF)
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 1))
+
+        with patch("pdfplumber.open", side_effect=AssertionError("PDF opened")):
+            self.assertEqual(parser.parse_payslip(SAMPLE_PDF), expected)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_payslip_without_check_date_is_cached_for_the_day(self):
+        # Its rows are dated today, which a hit on a later day must not report
+        parser = PayslipParser(cache=self.cache)
+        expected = parser.parse_payslip(SAMPLE_PDF)
+        self.assertFalse(parser.check_date_found)
+        self.assertEqual(parser.parse_payslip(SAMPLE_PDF), expected)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+        tomorrow = datetime.today() + timedelta(days=1)
+        with patch("payslip2budget.parsers.adp.datetime", wraps=datetime) as fake:
+            fake.today.return_value = tomorrow
+            transactions = parser.parse_payslip(SAMPLE_PDF)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+        self.assertEqual({txn["Date"] for txn in transactions}, {tomorrow.strftime("%Y-%m-%d")})
+
+    def test_payslip_with_check_date_is_cached_across_days(self):
+        path = os.path.join(self.tmpdir, "dated.pdf")
+        generate_payslip(path, check_date=date(2024, 1, 15))
+        parser = PayslipParser(cache=self.cache)
+        expected = parser.parse_payslip(path)
+        self.assertTrue(parser.check_date_found)
+
+        with patch("payslip2budget.parsers.adp.datetime", wraps=datetime) as fake:
+            fake.today.return_value = datetime.today() + timedelta(days=1)
+            self.assertEqual(parser.parse_payslip(path), expected)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_settings_change_the_key(self):
+        default = PayslipParser()
+        fingerprint = ParseCache.fingerprint(default.category_mappings, default.payee)
+
+        self.assertNotEqual(fingerprint, ParseCache.fingerprint(default.category_mappings, "Acme"))
+        self.assertNotEqual(fingerprint, ParseCache.fingerprint({"Legal": ["legal"]}, default.payee))
+        self.assertEqual(ParseCache.key(SAMPLE_PDF, fingerprint), ParseCache.key(SAMPLE_PDF, fingerprint))
+
+    def test_evicts_least_recently_used(self):
+        cache = ParseCache(self.tmpdir, max_bytes=250)
+        payload = [{"Memo": "x" * 80}]
+
+        cache.put("a", payload)
+        cache.put("b", payload)
+        os.utime(os.path.join(self.tmpdir, "a.json"), (0, 0))
+        os.utime(os.path.join(self.tmpdir, "b.json"), (1, 1))
+        self.assertEqual(cache.get("a"), payload)
+
+        # Reading "a" made "b" the least recently used entry
+        cache.put("c", payload)
+        self.assertEqual(sorted(os.listdir(self.tmpdir)), ["a.json", "c.json"])
+        self.assertIsNone(cache.get("b"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,7 +2,10 @@ import subprocess
 import unittest
 import json
 import tempfile
+from collections import Counter
 from pathlib import Path
+from payslip2budget.batch import PayslipResult
+from payslip2budget.cli import payslip_rows
 
 class TestCLI(unittest.TestCase):
 
@@ -25,5 +28,38 @@ class TestCLI(unittest.TestCase):
         assert result.returncode == 1
         assert "[WARN] Format is ignored when using an api-config" in result.stdout
 
+    def test_cache_counts_only_reported_with_profile(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            def stderr(*options):
+                return subprocess.run(
+                    ["python", "-m", "payslip2budget.cli", "tests/fixtures/sample.pdf", "-", "--cache-dir", cache_dir, *options],
+                    capture_output=True, text=True, check=True
+                ).stderr
+
+            self.assertNotIn("Parse cache", stderr())
+            self.assertIn("[INFO] Parse cache: 1 hits, 0 misses", stderr("--profile"))
+
+    def test_rows_stream_one_payslip_at_a_time(self):
+        pulled = []
+        first = PayslipResult("a.pdf", [{"Memo": "a1"}, {"Memo": "a2"}], cache_hit=True)
+
+        def results():
+            for result in [first, PayslipResult("b.pdf", error="broken"),
+                           PayslipResult("c.pdf", [{"Memo": "c1"}], cache_hit=False, pages_total=3, pages_skipped=1)]:
+                pulled.append(result.path)
+                yield result
+
+        totals, failed = Counter(), []
+        rows = payslip_rows(results(), totals, failed)
+
+        # The first payslip's rows come out before the next payslip is asked for
+        self.assertEqual([next(rows)["Memo"], next(rows)["Memo"]], ["a1", "a2"])
+        self.assertEqual(pulled, ["a.pdf"])
+        self.assertEqual([row["Memo"] for row in rows], ["c1"])
+        # Written payslips no longer hold their rows
+        self.assertEqual(first.transactions, [])
+        self.assertEqual(failed, ["b.pdf"])
+        self.assertEqual(totals, Counter(payslips=3, rows=3, hits=1, misses=1, pages_total=3, pages_skipped=1))
+
 if __name__ == '__main__':
     unittest.main()
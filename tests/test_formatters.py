@@ -0,0 +1,49 @@
+import csv
+import gzip
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from payslip2budget.formatters import ynab, mint, everydollar, monarch
+from payslip2budget.formatters.stream import open_output
+from payslip2budget.models.transaction_base import Transaction
+
+class TestFormatters(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.transactions = [
+            Transaction(date="2025-05-01", payee="Employer", category="Taxes", memo="Dental, Vision", amount=-2000),
+            {"Date": "2025-05-01", "Payee": "Employer", "Category": "Offset", "Memo": 'The "net" pay', "Amount": "20.00"},
+        ]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_quotes_memos(self):
+        for formatter in [ynab, mint, everydollar, monarch]:
+            rows = list(csv.reader(io.StringIO(formatter.format(self.transactions))))
+
+            self.assertEqual(rows[0], ["Date", "Payee", "Category", "Memo", "Amount"])
+            self.assertEqual(rows[1], ["2025-05-01", "Employer", "Taxes", "Dental, Vision", "-20.00"])
+            self.assertEqual(rows[2][3], 'The "net" pay')
+
+    def test_streams_to_file_and_gzip(self):
+        plain = os.path.join(self.tmpdir, "out.csv")
+        compressed = os.path.join(self.tmpdir, "out.csv.gz")
+
+        # A small buffer forces many partial writes
+        with open_output(plain, buffer_size=8) as stream:
+            ynab.write(self.transactions, stream)
+        with open_output(compressed) as stream:
+            ynab.write(self.transactions, stream)
+
+        with open(plain, newline="") as f:
+            expected = f.read()
+        self.assertEqual(expected, ynab.format(self.transactions))
+        with gzip.open(compressed, "rt", newline="") as f:
+            self.assertEqual(f.read(), expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import tempfile
+import threading
+import unittest
+from payslip2budget import instrumentation
+from payslip2budget.instrumentation import StageProfile, add_hook, remove_hook, span, count, muted, timed_iter
+from payslip2budget.parsers.adp import PayslipParser
+
+SAMPLE_PDF = "tests/fixtures/sample.pdf"
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.profile = StageProfile()
+        self.events = []
+
+    def tearDown(self):
+        remove_hook(self.profile)
+        remove_hook(self.events.append)
+
+    def test_disabled_spans_are_shared_no_ops(self):
+        self.assertFalse(instrumentation.enabled())
+        self.assertIs(span("a"), span("b"))
+
+        items = [1, 2]
+        self.assertIs(timed_iter("a", items), items)
+
+    def test_hooks_receive_spans_and_counters(self):
+        hook = lambda *event: self.events.append(event)
+        add_hook(hook)
+        try:
+            with span("stage"):
+                count("things", 3)
+            self.assertEqual(list(timed_iter("step", [1, 2])), [1, 2])
+        finally:
+            remove_hook(hook)
+
+        self.assertEqual(self.events[0], ("count", "things", 3))
+        self.assertEqual([event[:2] for event in self.events[1:]],
+                         [("span", "stage"), ("span", "step"), ("span", "step"), ("span", "step")])
+
+    def test_stage_profile_totals_and_merges(self):
+        self.profile("span", "parse", 0.5)
+        self.profile("span", "parse", 0.25)
+        self.profile("count", "lines", 10)
+        self.profile.merge({"stages": {"parse": {"calls": 1, "seconds": 1.0}}, "counters": {"lines": 5}})
+
+        self.assertEqual(self.profile.to_dict(), {
+            "stages": {"parse": {"calls": 3, "seconds": 1.75}},
+            "counters": {"lines": 15},
+        })
+
+    def test_parser_reports_stages(self):
+        add_hook(self.profile)
+        transactions = PayslipParser().parse_payslip(SAMPLE_PDF)
+        remove_hook(self.profile)
+
+        snapshot = self.profile.to_dict()
+        self.assertEqual(snapshot["counters"]["pages"], 1)
+        self.assertEqual(snapshot["counters"]["matches"], len(transactions) - 1)
+        self.assertGreater(snapshot["counters"]["tokens"], snapshot["counters"]["lines"])
+        for stage in ["pdf.open", "pdf.extract_text", "parse.items"]:
+            self.assertIn(stage, snapshot["stages"])
+        # Timed once per page, not per line or item
+        self.assertEqual(snapshot["stages"]["parse.items"]["calls"], 1)
+
+    def test_template_matches_count_categorized_items(self):
+        with tempfile.TemporaryDirectory() as template_dir:
+            parser = PayslipParser(template_dir=template_dir)
+            parser.parse_payslip(SAMPLE_PDF)
+            add_hook(self.profile)
+            transactions = parser.parse_payslip(SAMPLE_PDF)
+            remove_hook(self.profile)
+
+        items = [txn for txn in transactions if not txn["Memo"].startswith("Offset for")]
+        self.assertEqual(self.profile.to_dict()["counters"]["matches"], len(items))
+
+    def test_auto_extractor_counts_pages_once(self):
+        add_hook(self.profile)
+        PayslipParser(extractor="auto").parse_payslip(SAMPLE_PDF)
+        remove_hook(self.profile)
+
+        snapshot = self.profile.to_dict()
+        self.assertEqual(snapshot["counters"]["pages"], 1)
+        self.assertEqual(snapshot["stages"]["parse.auto_select"]["calls"], 1)
+        # The comparison's own extraction is timed as part of parse.auto_select
+        self.assertNotIn("pdf.extract_text", snapshot["stages"])
+
+    def test_muted_drops_only_this_threads_reports(self):
+        add_hook(self.profile)
+        with muted():
+            count("things")
+            with span("stage"):
+                thread = threading.Thread(target=count, args=("things", 2))
+                thread.start()
+                thread.join()
+        count("things")
+        remove_hook(self.profile)
+
+        self.assertEqual(self.profile.to_dict(), {"stages": {}, "counters": {"things": 3}})
+
+if __name__ == '__main__':
+    unittest.main()
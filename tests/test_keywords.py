@@ -0,0 +1,53 @@
+import unittest
+from payslip2budget.parsers.adp import PayslipParser
+from payslip2budget.parsers.keywords import KeywordMatcher
+
+def naive_categorize(category_mappings, text):
+    # The original per-category scan the matcher replaces
+    text_lower = text.lower()
+    for category, keywords in category_mappings.items():
+        if category.lower() == "gross pay offset":
+            continue
+        if any(keyword.lower() in text_lower for keyword in keywords):
+            return category
+    return None
+
+class TestKeywordMatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.mappings = PayslipParser().category_mappings
+        self.matcher = KeywordMatcher(self.mappings)
+
+    def test_categorize_matches_first_category_in_mapping_order(self):
+        lines = [
+            "HSA Employer Contribution",
+            "Roth 401(k)",
+            "Medical Dental Vision",
+            "Dental Insurance",
+            "Group Term Life",
+            "Lifestyle Spending",
+            "Social Security Tax",
+            "Stock Offset Withholding",
+            "Regular Earnings",
+            "",
+        ]
+        for line in lines:
+            self.assertEqual(self.matcher.categorize(line), naive_categorize(self.mappings, line), line)
+
+    def test_parser_recompiles_when_mappings_change(self):
+        parser = PayslipParser()
+        self.assertEqual(parser.categorize_line("Parking"), None)
+
+        parser.load_category_config({"Transport": ["parking"], "Gross Pay Offset": "Income:Offset"})
+        self.assertEqual(parser.categorize_line("Parking"), "Transport")
+        self.assertEqual(parser.categorize_line("Medical"), None)
+
+    def test_find_in_tokens_reports_prefix_related_keywords(self):
+        matcher = KeywordMatcher({"A": ["hs"], "B": ["hsa", "social security"]})
+
+        self.assertEqual(matcher.find_in_tokens("Pre-tax HSA 10.00 hs 5.00"), {"hs": 1, "hsa": 1})
+        # Keywords containing whitespace never fit inside a single token
+        self.assertEqual(matcher.find_in_tokens("Social Security 10.00"), {})
+
+if __name__ == '__main__':
+    unittest.main()
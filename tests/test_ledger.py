@@ -0,0 +1,82 @@
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+from payslip2budget.exporters.exporter import TransactionExporter
+from payslip2budget.ledger import ImportLedger, make_import_id
+from payslip2budget.parsers.adp import PayslipParser
+
+SAMPLE_PDF = "tests/fixtures/sample.pdf"
+
+class TestImportLedger(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.ledger_path = os.path.join(self.tmpdir, "ledger.sqlite3")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_make_import_id_is_deterministic(self):
+        import_id = make_import_id("abc", "2025-05-10", "Taxes:Medicare", "6.56")
+
+        self.assertEqual(import_id, make_import_id("abc", "2025-05-10", "Taxes:Medicare", "6.56"))
+        self.assertEqual(len(import_id), 36)
+        self.assertNotEqual(import_id, make_import_id("abc", "2025-05-10", "Taxes:Medicare", "6.56", 2))
+        self.assertNotEqual(import_id, make_import_id("abd", "2025-05-10", "Taxes:Medicare", "6.56"))
+
+    def test_parsed_transactions_carry_unique_import_ids(self):
+        first = PayslipParser().parse_payslip(SAMPLE_PDF)
+        second = PayslipParser(payee="Acme").parse_payslip(SAMPLE_PDF)
+
+        import_ids = [txn["ImportId"] for txn in first]
+        self.assertEqual(len(set(import_ids)), len(import_ids))
+        self.assertEqual(import_ids, [txn["ImportId"] for txn in second])
+
+    def test_ledger_records_per_scope(self):
+        ledger = ImportLedger(self.ledger_path)
+        ledger.record("ynab:budget:account", ["a", "b"])
+
+        self.assertEqual(ledger.exported_ids("ynab:budget:account", ["a", "c"]), {"a"})
+        self.assertEqual(ledger.exported_ids("ynab:budget:other", ["a"]), set())
+
+    def test_export_sends_only_new_transactions(self):
+        config_path = os.path.join(self.tmpdir, "api-config.json")
+        with open(config_path, "w") as f:
+            json.dump({"api": {"type": "ynab", "api_key": "key", "budget_id": "budget", "account_id": "account",
+                               "catalog_dir": self.tmpdir, "ledger_path": self.ledger_path}}, f)
+
+        exporter = TransactionExporter(config_path)
+        exporter.api_handler.send_transactions = MagicMock()
+        transactions = PayslipParser().parse_payslip(SAMPLE_PDF)
+
+        exporter.export(transactions[:2], destination="api")
+        exporter.export(transactions, destination="api")
+        exporter.export(transactions, destination="api")
+
+        sent = [call.args[0] for call in exporter.api_handler.send_transactions.call_args_list]
+        self.assertEqual(sent, [transactions[:2], transactions[2:]])
+
+    def test_export_async_shares_the_ledger(self):
+        config_path = os.path.join(self.tmpdir, "api-config.json")
+        with open(config_path, "w") as f:
+            json.dump({"api": {"type": "ynab", "api_key": "key", "budget_id": "budget", "account_id": "account",
+                               "catalog_dir": self.tmpdir, "ledger_path": self.ledger_path}}, f)
+
+        exporter = TransactionExporter(config_path)
+        # The default async variant runs the blocking send in a thread
+        exporter.api_handler.send_transactions = MagicMock()
+        transactions = PayslipParser().parse_payslip(SAMPLE_PDF)
+
+        asyncio.run(exporter.export_async(transactions[:2]))
+        exporter.export(transactions, destination="api")
+
+        sent = [call.args[0] for call in exporter.api_handler.send_transactions.call_args_list]
+        self.assertEqual(sent, [transactions[:2], transactions[2:]])
+        exporter.close()
+
+if __name__ == '__main__':
+    unittest.main()
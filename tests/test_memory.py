@@ -0,0 +1,80 @@
+import os
+import shutil
+import tempfile
+import unittest
+from collections import UserDict
+from datetime import date
+from benchmarks.synthetic import generate_payslip
+from payslip2budget.batch import parse_batch
+from payslip2budget.memory import MemoryLimitError, current_rss_bytes
+from payslip2budget.parsers.adp import PayslipParser
+from payslip2budget.parsers.extractors import plumber_pages
+
+class TestBoundedMemory(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def payslip(self, pages):
+        path = os.path.join(self.tmpdir, f"payslip-{pages}.pdf")
+        generate_payslip(path, pages=pages, lines_per_page=15, keyword_density=0.4,
+                         check_date=date(2024, 1, 15), seed=pages)
+        return path
+
+    def test_low_memory_releases_each_page(self):
+        import pdfplumber
+
+        with pdfplumber.open(self.payslip(4)) as pdf:
+            read = []
+            for page in plumber_pages(pdf, low_memory=True):
+                # Everything parsed for the pages before, content streams included, has been let go
+                for previous in read:
+                    self.assertNotIn(previous.page_obj.attrs["Contents"].objid, pdf.doc._cached_objs)
+                    self.assertFalse([name for name in previous.cached_properties if hasattr(previous, name)])
+                page.extract_text()
+                self.assertTrue(hasattr(page, "_objects"))
+                read.append(page)
+
+            # Pages were built one at a time, never all up front
+            self.assertEqual(len(read), 4)
+            self.assertFalse(hasattr(pdf, "_pages"))
+        self.assertFalse(hasattr(read[-1], "_objects"))
+
+    def test_low_memory_output_matches(self):
+        path = self.payslip(3)
+        for extractor in ["pdfplumber", "pypdf2", "pdfminer"]:
+            self.assertEqual(
+                [dict(txn) for txn in PayslipParser(extractor=extractor, low_memory=True).parse_payslip(path)],
+                [dict(txn) for txn in PayslipParser(extractor=extractor).parse_payslip(path)],
+                extractor,
+            )
+
+    @unittest.skipIf(current_rss_bytes() is None, "resident memory is not readable here")
+    def test_rss_ceiling(self):
+        path = self.payslip(2)
+
+        with self.assertRaises(MemoryLimitError):
+            PayslipParser(max_rss=1).parse_payslip(path)
+
+        # A batch reports the payslip as failed and carries on
+        [result] = parse_batch([path], workers=1, max_rss=1)
+        self.assertTrue(result.error.startswith("MemoryLimitError"))
+
+    def test_low_memory_falls_back_without_pdfplumber_internals(self):
+        import pdfplumber
+
+        path = self.payslip(3)
+        with pdfplumber.open(path) as pdf:
+            expected = [page.extract_text() for page in plumber_pages(pdf)]
+        with pdfplumber.open(path) as pdf:
+            # What a release whose object cache is no longer a plain dict would look like
+            pdf.doc._cached_objs = UserDict(pdf.doc._cached_objs)
+            with self.assertWarns(RuntimeWarning):
+                texts = [page.extract_text() for page in plumber_pages(pdf, low_memory=True)]
+        self.assertEqual(texts, expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import date
+from unittest.mock import patch
+from benchmarks.synthetic import generate_payslip
+from payslip2budget.parsers import adp
+from payslip2budget.parsers.adp import PayslipParser
+
+class TestPageParallel(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.pdf_path = os.path.join(self.tmpdir, "register.pdf")
+        # Long enough to be split into several ranges, with items spread over every page
+        generate_payslip(self.pdf_path, pages=20, lines_per_page=12, keyword_density=0.5,
+                         check_date=date(2024, 3, 29), seed=7)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def assert_same(self, **options):
+        serial = PayslipParser(**options).parse_payslip(self.pdf_path)
+        with patch.object(adp, "parallel_pages", wraps=adp.parallel_pages) as parallel:
+            split = PayslipParser(page_workers=2, **options).parse_payslip(self.pdf_path)
+        # Once per backend that "auto" compares
+        parallel.assert_called()
+        self.assertEqual([dict(txn) for txn in split], [dict(txn) for txn in serial])
+
+    def test_matches_serial_parse(self):
+        for extractor in ["pdfplumber", "pypdf2", "auto"]:
+            with self.subTest(extractor=extractor):
+                self.assert_same(extractor=extractor)
+
+    def test_matches_serial_page_spec(self):
+        self.assert_same(extractor="pypdf2", page_spec={"pages": list(range(2, 21))})
+
+    def test_short_documents_stay_serial(self):
+        with patch.object(adp, "parallel_pages") as parallel:
+            PayslipParser(page_workers=4).parse_payslip("tests/fixtures/sample.pdf")
+        parallel.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import types
+import unittest
+from unittest.mock import patch
+from payslip2budget.parsers.adp import PayslipParser
+from payslip2budget.parsers.extractors import EXTRACTORS
+
+SAMPLE_PDF = "tests/fixtures/sample.pdf"
+
+class TestPayslipParser(unittest.TestCase):
+
+    def setUp(self):
+        self.parser = PayslipParser()
+
+    def test_iter_transactions_streams_parse_payslip_rows(self):
+        stream = self.parser.iter_transactions(SAMPLE_PDF)
+        self.assertIsInstance(stream, types.GeneratorType)
+
+        transactions = list(stream)
+        self.assertEqual(transactions, self.parser.parse_payslip(SAMPLE_PDF))
+
+        # The offset rows come last
+        offsets = [tx["Memo"].startswith("Offset for itemized paycheck") for tx in transactions]
+        self.assertTrue(offsets[-1])
+        self.assertEqual(offsets, sorted(offsets))
+
+    def test_iter_transactions_yields_items_before_offsets(self):
+        first = next(self.parser.iter_transactions(SAMPLE_PDF))
+        self.assertNotEqual(first["Category"], self.parser.category_mappings["Gross Pay Offset"])
+
+    def test_every_extractor_reads_the_sample(self):
+        for name in EXTRACTORS:
+            transactions = PayslipParser(extractor=name).parse_payslip(SAMPLE_PDF)
+            self.assertIn("Medicare Tax -", [tx["Memo"] for tx in transactions], name)
+
+        with self.assertRaises(ValueError):
+            PayslipParser(extractor="ocr")
+
+    def test_auto_extractor_uses_first_backend_that_matches(self):
+        def backend(*pages):
+            return lambda path, *options: (lines for lines in pages)
+
+        reference = backend(["Medicare Tax - 6.56 341.12"], ["Dental - 4.00 200.00"])
+        matching = backend(["Medicare Tax - 6.56 341.12"], ["Dental -  4.00  200.00"])
+        mismatched = backend(["Medicare Tax 6.56"], ["Dental - 4.00 200.00"])
+        # Agrees on the first page only
+        later_mismatch = backend(["Medicare Tax - 6.56 341.12"], ["Dental - 40.00 200.00"])
+
+        with patch.dict(EXTRACTORS, {"pdfplumber": reference, "pypdf2": later_mismatch, "pdfminer": matching}):
+            pages = list(PayslipParser(extractor="auto").extract_pages(SAMPLE_PDF))
+        self.assertEqual(pages[1], ["Dental -  4.00  200.00"])
+
+        # Nothing agrees with pdfplumber, so its pages are used
+        with patch.dict(EXTRACTORS, {"pdfplumber": reference, "pypdf2": mismatched, "pdfminer": later_mismatch}):
+            pages = list(PayslipParser(extractor="auto").extract_pages(SAMPLE_PDF))
+        self.assertEqual(pages[1], ["Dental - 4.00 200.00"])
+
+    def test_auto_extractor_choice_is_kept_per_layout(self):
+        def backend(*pages):
+            return lambda path, *options: (lines for lines in pages)
+
+        def unused(*args):
+            raise AssertionError("backend compared again")
+
+        auto = PayslipParser(extractor="auto")
+        matching = backend(["Medicare Tax - 6.56 341.12"])
+        with patch.dict(EXTRACTORS, {"pdfplumber": matching, "pypdf2": matching, "pdfminer": unused}):
+            list(auto.extract_pages(SAMPLE_PDF))
+        with patch.dict(EXTRACTORS, {"pdfplumber": unused, "pypdf2": matching, "pdfminer": unused}):
+            self.assertEqual(list(auto.extract_pages(SAMPLE_PDF)), [["Medicare Tax - 6.56 341.12"]])
+        self.assertEqual(list(auto.auto_extractors.values()), ["pypdf2"])
+
+    def test_auto_extractor_matches_pdfplumber_on_sample(self):
+        self.assertEqual(
+            PayslipParser(extractor="auto").parse_payslip(SAMPLE_PDF),
+            self.parser.parse_payslip(SAMPLE_PDF)
+        )
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from payslip2budget import pipeline
+from payslip2budget.pipeline import parse_and_export
+
+SAMPLE_PDF = "tests/fixtures/sample.pdf"
+
+class FakeExporter:
+    """Records each upload, calling on_upload in a worker thread like the real handler sends."""
+
+    def __init__(self, on_upload=None):
+        self.on_upload = on_upload
+        self.uploads = []
+
+    async def export_async(self, transactions):
+        def send():
+            if self.on_upload:
+                self.on_upload()
+        await asyncio.to_thread(send)
+        self.uploads.append(transactions)
+
+class TestPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.paths = []
+        for name in ["a.pdf", "b.pdf", "c.pdf"]:
+            path = os.path.join(self.tmpdir, name)
+            shutil.copy(SAMPLE_PDF, path)
+            self.paths.append(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_exports_every_parsed_payslip(self):
+        broken = os.path.join(self.tmpdir, "broken.pdf")
+        with open(broken, "wb") as f:
+            f.write(b"not a pdf")
+        exporter = FakeExporter()
+
+        results = asyncio.run(parse_and_export(self.paths + [broken], exporter, workers=1))
+
+        self.assertEqual(sorted(result.path for result in results if result.error), [broken])
+        uploaded = [txn for upload in exporter.uploads for txn in upload]
+        self.assertEqual(len(uploaded), sum(len(result.transactions) for result in results))
+        self.assertEqual(len(uploaded), 3 * 6)
+
+    def test_uploads_overlap_parsing(self):
+        parse_one = pipeline._parse_one
+        uploading = threading.Event()
+        overlapped = []
+
+        def parse(path):
+            # The later payslips can only finish parsing once the first upload has started,
+            # which never happens if uploads wait for parsing to finish
+            if path != self.paths[0]:
+                overlapped.append(uploading.wait(timeout=30))
+            return parse_one(path)
+
+        exporter = FakeExporter(on_upload=uploading.set)
+        with mock.patch("payslip2budget.pipeline._parse_one", parse):
+            asyncio.run(parse_and_export(self.paths, exporter, workers=1, queue_size=1))
+
+        self.assertEqual(overlapped, [True, True])
+        self.assertEqual(sum(len(upload) for upload in exporter.uploads), 3 * 6)
+
+    def test_parse_failure_raises_instead_of_hanging(self):
+        def crash(path):
+            # What a killed worker process looks like to the pipeline
+            raise RuntimeError(f"worker died parsing {path}")
+
+        async def run():
+            return await asyncio.wait_for(parse_and_export(self.paths, FakeExporter(), workers=1), timeout=30)
+
+        with mock.patch("payslip2budget.pipeline._parse_one", crash):
+            with self.assertRaises(RuntimeError):
+                asyncio.run(run())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import shutil
+import tempfile
+import unittest
+import PyPDF2
+from payslip2budget.parsers.adp import PayslipParser
+from payslip2budget.parsers.extractors import EXTRACTORS
+from payslip2budget.parsers.pruning import load_page_spec
+
+SAMPLE_PDF = "tests/fixtures/sample.pdf"
+
+def parse(parser, pdf_path):
+    # Import ids depend on the file's bytes, which differ between the padded PDF and the sample
+    return [{k: v for k, v in txn.items() if k != "ImportId"} for txn in parser.parse_payslip(pdf_path)]
+
+class TestPruning(unittest.TestCase):
+
+    def setUp(self):
+        # Cover page, the payslip, then a trailing blank page
+        self.tmpdir = tempfile.mkdtemp()
+        self.pdf_path = os.path.join(self.tmpdir, "padded.pdf")
+        writer = PyPDF2.PdfWriter()
+        writer.add_blank_page(612, 792)
+        writer.add_page(PyPDF2.PdfReader(SAMPLE_PDF).pages[0])
+        writer.add_blank_page(612, 792)
+        with open(self.pdf_path, "wb") as f:
+            writer.write(f)
+
+        self.expected = parse(PayslipParser(), SAMPLE_PDF)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_prune_skips_pages_without_deductions(self):
+        parser = PayslipParser(prune=True)
+
+        self.assertEqual(parse(parser, self.pdf_path), self.expected)
+        self.assertEqual((parser.pages_total, parser.pages_skipped), (3, 2))
+
+    def test_page_spec_pages(self):
+        parser = PayslipParser(page_spec={"pages": [2, 9]})
+
+        self.assertEqual(parse(parser, self.pdf_path), self.expected)
+        self.assertEqual((parser.pages_total, parser.pages_skipped), (3, 2))
+
+    def test_page_spec_regions(self):
+        whole_page = {"pages": [2], "regions": [[0, 0, 612, 792]]}
+        blank_corner = {"pages": [2], "regions": [[0, 0, 20, 20]]}
+
+        for name in ["pdfplumber", "pdfminer"]:
+            full = parse(PayslipParser(extractor=name, page_spec=whole_page), self.pdf_path)
+            self.assertEqual(full, parse(PayslipParser(extractor=name), SAMPLE_PDF), name)
+            self.assertEqual(PayslipParser(extractor=name, page_spec=blank_corner).parse_payslip(self.pdf_path), [])
+
+        with self.assertRaises(ValueError):
+            list(EXTRACTORS["pypdf2"](self.pdf_path, regions=whole_page["regions"]))
+
+    def test_load_page_spec(self):
+        self.assertEqual(load_page_spec({"pages": [3, 1]}), {"pages": [0, 2], "regions": None})
+
+        with self.assertRaises(ValueError):
+            load_page_spec({"pages": [0]})
+        with self.assertRaises(ValueError):
+            load_page_spec({"regions": [[0, 0, 10]]})
+
+if __name__ == '__main__':
+    unittest.main()
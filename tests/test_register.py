@@ -0,0 +1,88 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import date
+from unittest import mock
+from benchmarks.synthetic import payslip_lines, write_pdf
+from payslip2budget.parsers.adp import PayslipParser
+from payslip2budget import cli, register
+from payslip2budget.register import Stub, split_stubs, find_stubs, parse_register
+
+def without_ids(transactions):
+    return [{k: v for k, v in txn.items() if k != "ImportId"} for txn in transactions]
+
+class TestRegister(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        # Three employees paid on the same day, the second with a two-page stub
+        self.stubs = []
+        for index, pages in enumerate([1, 2, 1]):
+            lines, _ = payslip_lines(pages, lines_per_page=20, keyword_density=0.5,
+                                     check_date=date(2024, 5, 31), seed=index)
+            lines[0].insert(1, f"Employee ID: E{index:03d}")
+            self.stubs.append(lines)
+
+        self.register = os.path.join(self.tmpdir, "register.pdf")
+        write_pdf(self.register, [page for stub in self.stubs for page in stub])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_split_by_employee_id(self):
+        self.assertEqual(split_stubs([("E1", "05/31/2024"), (None, None), ("E2", "05/31/2024"), ("E2", "06/14/2024")]), [
+            Stub([0, 1], "E1", "05/31/2024"),
+            Stub([2], "E2", "05/31/2024"),
+            Stub([3], "E2", "06/14/2024"),
+        ])
+
+    def test_split_by_check_date_without_ids(self):
+        self.assertEqual(split_stubs([(None, None), (None, "05/31/2024"), (None, None), (None, "05/31/2024")]), [
+            Stub([0, 1, 2], None, "05/31/2024"),
+            Stub([3], None, "05/31/2024"),
+        ])
+
+    def test_find_stubs(self):
+        self.assertEqual([(stub.pages, stub.employee) for stub in find_stubs(self.register)],
+                         [([0], "E000"), ([1, 2], "E001"), ([3], "E002")])
+
+    def test_each_stub_parses_like_its_own_payslip(self):
+        for workers in [1, 2]:
+            results = list(parse_register(self.register, workers=workers))
+            self.assertEqual([stub.employee for stub, _ in results], ["E000", "E001", "E002"])
+
+            for (stub, result), pages in zip(results, self.stubs):
+                path = os.path.join(self.tmpdir, f"{stub.employee}.pdf")
+                write_pdf(path, pages)
+                self.assertIsNone(result.error)
+                self.assertEqual(without_ids(result.transactions), without_ids(PayslipParser().parse_payslip(path)))
+                # Every stub has its own offset row
+                self.assertTrue(result.transactions[-1]["Memo"].startswith("Offset"))
+
+            import_ids = [txn["ImportId"] for _, result in results for txn in result.transactions]
+            self.assertEqual(len(import_ids), len(set(import_ids)))
+
+    def test_cli_writes_each_stub_before_parsing_the_next(self):
+        events = []
+        parse_one = register._parse_one
+
+        def parse_stub(path, pages):
+            events.append("parse")
+            return parse_one(path, pages)
+
+        class Recorder:
+            def write(self, rows, stream):
+                for _ in rows:
+                    if events[-1] != "written":
+                        events.append("written")
+
+        with mock.patch.object(register, "_parse_one", parse_stub), \
+             mock.patch.dict(cli.FORMATTERS, {"ynab": Recorder()}):
+            cli.main([self.register, os.path.join(self.tmpdir, "out.csv"), "--split-stubs", "--workers", "1",
+                      "--no-cache"])
+
+        self.assertEqual(events, ["parse", "written", "parse", "written", "parse", "written"])
+
+if __name__ == '__main__':
+    unittest.main()
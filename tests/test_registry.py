@@ -0,0 +1,81 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import date
+from unittest.mock import patch
+import PyPDF2
+from benchmarks.synthetic import generate_payslip
+from payslip2budget.batch import parse_batch
+from payslip2budget.parsers.adp import PayslipParser
+from payslip2budget.parsers.layout import LayoutFingerprint
+from payslip2budget.parsers import registry
+
+SAMPLE_PDF = "tests/fixtures/sample.pdf"
+
+class AcmeParser(PayslipParser):
+    name = "acme"
+    layout = LayoutFingerprint(producer=(r"Acme Payroll",))
+
+class TestRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        # The sample payslip again, but written by another payroll provider
+        self.acme_pdf = os.path.join(self.tmpdir, "acme.pdf")
+        writer = PyPDF2.PdfWriter()
+        writer.add_page(PyPDF2.PdfReader(SAMPLE_PDF).pages[0])
+        writer.add_metadata({"/Producer": "Acme Payroll 4.2"})
+        with open(self.acme_pdf, "wb") as f:
+            writer.write(f)
+
+        patcher = patch.dict(registry.PARSERS, {"acme": AcmeParser})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_detects_adp_header(self):
+        self.assertEqual(registry.detect_parser(SAMPLE_PDF), "adp")
+
+        synthetic = os.path.join(self.tmpdir, "synthetic.pdf")
+        generate_payslip(synthetic, pages=1, lines_per_page=20, keyword_density=0.5,
+                         check_date=date(2024, 7, 25), seed=1)
+        self.assertEqual(registry.detect_parser(synthetic), "adp")
+
+    def test_producer_wins_over_header(self):
+        # The copied page still says "Earnings Statement"
+        self.assertEqual(registry.detect_parser(self.acme_pdf), "acme")
+
+    def test_unreadable_file_uses_default(self):
+        broken = os.path.join(self.tmpdir, "broken.pdf")
+        with open(broken, "wb") as f:
+            f.write(b"not a pdf")
+
+        self.assertEqual(registry.detect_parser(broken), registry.DEFAULT_PARSER)
+
+    def test_dispatcher_reuses_parser_per_layout(self):
+        dispatcher = registry.ParserDispatcher()
+
+        adp = dispatcher.parser_for(SAMPLE_PDF)
+        acme = dispatcher.parser_for(self.acme_pdf)
+        self.assertIsInstance(acme, AcmeParser)
+        self.assertNotIsInstance(adp, AcmeParser)
+        self.assertIs(dispatcher.parser_for(SAMPLE_PDF), adp)
+
+    def test_named_parser_skips_detection(self):
+        dispatcher = registry.ParserDispatcher(parser="adp")
+
+        self.assertNotIsInstance(dispatcher.parser_for(self.acme_pdf), AcmeParser)
+        with self.assertRaises(ValueError):
+            registry.ParserDispatcher(parser="sage")
+
+    def test_batch_dispatches_each_file(self):
+        results = parse_batch([SAMPLE_PDF, self.acme_pdf], workers=1)
+
+        self.assertEqual([result.error for result in results], [None, None])
+        self.assertEqual(len(results[0].transactions), len(results[1].transactions))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from datetime import date
+from unittest import mock
+from benchmarks.synthetic import generate_payslip
+from payslip2budget import source as source_module
+from payslip2budget.cache import ParseCache, file_digest
+from payslip2budget.parsers.adp import PayslipParser
+from payslip2budget.source import PdfSource
+
+class TestPdfSource(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "payslip.pdf")
+        generate_payslip(self.path, pages=2, lines_per_page=15, keyword_density=0.4,
+                         check_date=date(2024, 1, 15), seed=7)
+        with open(self.path, "rb") as f:
+            self.data = f.read()
+        self.expected = [dict(txn) for txn in PayslipParser().parse_payslip(self.path)]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def parse(self, pdf, **options):
+        return [dict(txn) for txn in PayslipParser(**options).parse_payslip(pdf)]
+
+    def test_in_memory_input_matches_path(self):
+        # Import ids come from the content, so they match too
+        for pdf in [self.data, bytearray(self.data), memoryview(self.data), io.BytesIO(self.data)]:
+            self.assertEqual(self.parse(pdf), self.expected, type(pdf).__name__)
+
+    def test_file_object_matches_path(self):
+        with open(self.path, "rb") as f:
+            self.assertEqual(self.parse(f), self.expected)
+
+    def test_memory_mapped_file_matches_path(self):
+        with mock.patch.object(source_module, "MMAP_MIN_BYTES", 1):
+            with PdfSource(self.path).open() as stream:
+                self.assertNotIsInstance(stream, io.BufferedReader)
+            for options in [{"extractor": "pdfplumber"}, {"extractor": "pypdf2"}, {"extractor": "pdfminer"},
+                            {"prune": True}]:
+                self.assertEqual(self.parse(self.path, **options), self.parse(self.data, **options), options)
+            # Both learn their template afresh
+            self.assertEqual(self.parse(self.path, template_dir=os.path.join(self.tmpdir, "mapped")),
+                             self.parse(self.data, template_dir=os.path.join(self.tmpdir, "bytes")))
+
+    def test_streams_are_independent(self):
+        source = PdfSource(io.BytesIO(self.data))
+        with source.open() as first, source.open() as second:
+            first.read(100)
+            self.assertEqual(second.read(), self.data)
+
+    def test_views_are_not_copied(self):
+        data = bytearray(self.data)
+        for pdf in [data, memoryview(data)]:
+            source = PdfSource(pdf)
+            self.assertIs(source._view.obj, data)
+            self.assertEqual(source.digest(), file_digest(self.path))
+            with source.open() as stream:
+                stream.seek(-100, io.SEEK_END)
+                self.assertEqual(stream.read(), self.data[-100:])
+                stream.seek(0)
+                self.assertEqual(stream.readline(), self.data.split(b"\n", 1)[0] + b"\n")
+
+    def test_digest_matches_file_digest(self):
+        self.assertEqual(PdfSource(self.data).digest(), file_digest(self.path))
+
+    def test_cache_shared_across_input_kinds(self):
+        cache = ParseCache(os.path.join(self.tmpdir, "cache"))
+        PayslipParser(cache=cache).parse_payslip(self.path)
+        transactions = PayslipParser(cache=cache).parse_payslip(memoryview(self.data))
+
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual([dict(txn) for txn in transactions], self.expected)
+
+    def test_cli_reads_stdin(self):
+        def convert(args, **kwargs):
+            return subprocess.run(["python", "-m", "payslip2budget.cli", *args, "-", "--no-cache"],
+                                  capture_output=True, check=True, **kwargs).stdout
+
+        self.assertEqual(convert(["-"], input=self.data), convert([self.path]))
+
+if __name__ == '__main__':
+    unittest.main()
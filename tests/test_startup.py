@@ -0,0 +1,36 @@
+import subprocess
+import sys
+import unittest
+
+# Importing these up front used to cost over 250ms; the import time itself is
+# measured by benchmarks/run.py
+HEAVY_MODULES = ["pdfplumber", "PyPDF2", "pdfminer", "requests", "numpy"]
+
+def modules_loaded_by(module):
+    """Import module in a fresh interpreter and return the names in its sys.modules."""
+    result = subprocess.run(
+        [sys.executable, "-c", f"import sys, {module}; print('\\n'.join(sys.modules))"],
+        capture_output=True, text=True, check=True
+    )
+    return set(result.stdout.split())
+
+class TestStartup(unittest.TestCase):
+
+    def test_cli_import_skips_heavy_dependencies(self):
+        loaded = modules_loaded_by("payslip2budget.cli")
+
+        self.assertIn("payslip2budget.cli", loaded)
+        for module in HEAVY_MODULES:
+            self.assertNotIn(module, loaded)
+
+    def test_help_runs(self):
+        result = subprocess.run(
+            [sys.executable, "-m", "payslip2budget.cli", "--help"],
+            capture_output=True, text=True
+        )
+
+        assert result.returncode == 0
+        assert "--extractor" in result.stdout
+
+if __name__ == '__main__':
+    unittest.main()
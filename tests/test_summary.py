@@ -0,0 +1,74 @@
+import io
+import unittest
+from payslip2budget.models.transaction_base import Transaction
+
+# The summary report needs NumPy from the summary extra
+try:
+    from payslip2budget.summary import PayslipSummary, write_report
+    HAVE_NUMPY = True
+except ModuleNotFoundError as e:
+    if e.name != "numpy":
+        raise
+    HAVE_NUMPY = False
+
+def txn(date, category, memo, amount, ytd=None):
+    return Transaction(date=date, payee="Employer", category=category, memo=memo, amount=amount, ytd=ytd)
+
+@unittest.skipUnless(HAVE_NUMPY, "NumPy is not installed")
+class TestSummary(unittest.TestCase):
+
+    def setUp(self):
+        # Out of date order on purpose; the 2025-01 payslip restarts the year
+        self.summary = PayslipSummary([
+            txn("2024-12-15", "Taxes:Medicare", "Medicare Tax", 650, ytd=1300),
+            txn("2024-11-30", "Taxes:Medicare", "Medicare Tax", 650, ytd=650),
+            txn("2024-11-30", "Retirement", "401(k)", 2000, ytd=2000),
+            txn("2024-12-15", "Retirement", "401(k)", 2000, ytd=5000),
+            {"Date": "2025-01-15", "Payee": "Employer", "Category": "Taxes:Medicare",
+             "Memo": "Medicare Tax", "Amount": "6.75", "YTD": "6.75"},
+            txn("2025-01-15", None, "Offset", -5300),
+        ])
+
+    def test_totals(self):
+        self.assertEqual(list(self.summary.categories), ["", "Retirement", "Taxes:Medicare"])
+        self.assertEqual(list(self.summary.category_totals()), [-5300, 4000, 1975])
+
+        months, totals = self.summary.monthly_totals()
+        self.assertEqual([str(month) for month in months], ["2024-11", "2024-12", "2025-01"])
+        self.assertEqual(totals.tolist(), [[0, 2000, 650], [0, 2000, 650], [-5300, 0, 675]])
+
+    def test_running_totals_reset_each_year(self):
+        self.assertEqual(list(self.summary.running_totals()), [650, 2000, 1300, 4000, 675, -5300])
+
+    def test_ytd_mismatches(self):
+        mismatches, running = self.summary.ytd_mismatches()
+        self.assertEqual(list(mismatches), [3])
+
+        output = io.StringIO()
+        self.assertEqual(write_report(self.summary, output), 1)
+        self.assertTrue(output.getvalue().endswith("2024-12-15,Retirement,401(k),40.00,50.00,-10.00\n"))
+
+    def test_ytd_of_deductions_is_unsigned(self):
+        # Medical 50.00- 50.00, then 100.00, then 150.00
+        summary = PayslipSummary([
+            txn("2024-01-15", "Insurance:Medical", "Medical", -5000, ytd=5000),
+            txn("2024-01-31", "Insurance:Medical", "Medical", -5000, ytd=10000),
+            txn("2024-02-15", "Insurance:Medical", "Medical", -5000, ytd=15000),
+            txn("2024-02-29", "Insurance:Medical", "Medical", -5000, ytd=25000),
+        ])
+
+        mismatches, running = summary.ytd_mismatches()
+        self.assertEqual(list(mismatches), [3])
+
+        output = io.StringIO()
+        write_report(summary, output)
+        self.assertTrue(output.getvalue().endswith("2024-02-29,Insurance:Medical,Medical,-200.00,-250.00,50.00\n"))
+
+    def test_empty_history(self):
+        summary = PayslipSummary([])
+
+        self.assertEqual(len(summary.category_totals()), 0)
+        self.assertEqual(write_report(summary, io.StringIO()), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import date
+from unittest.mock import patch
+from benchmarks.synthetic import generate_payslip
+from payslip2budget.parsers import adp
+from payslip2budget.parsers.adp import PayslipParser
+from payslip2budget.parsers.templates import TemplateStore, group_rows, learn_template, apply_template
+
+SAMPLE_PDF = "tests/fixtures/sample.pdf"
+
+def word(text, x0, top):
+    return {"text": text, "x0": x0, "x1": x0 + 6 * len(text), "top": top}
+
+class TestTemplates(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.template_dir = os.path.join(self.tmpdir, "templates")
+        self.categorize = PayslipParser().categorize_line
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_learns_current_and_ytd_columns(self):
+        rows = group_rows([
+            word("Medical", 100, 10), word("-", 200, 10), word("5.00", 210, 10), word("120.00", 280, 10),
+            word("Dental", 100, 22.5), word("-", 200, 22), word("12.50", 204, 22), word("300.00", 280, 22),
+            # A margin note sharing one item's row
+            word("2001", 500, 21),
+        ])
+        template = learn_template(rows, self.categorize)
+
+        self.assertEqual(len(template["tables"]), 1)
+        self.assertIsNotNone(template["tables"][0]["ytd"])
+        self.assertEqual(apply_template(rows, template), [
+            [("Medical", -5.0, 120.0)],
+            [("Dental", -12.5, 300.0)],
+        ])
+
+    def test_unaligned_columns_learn_nothing(self):
+        rows = group_rows([
+            word("Dental", 36, 10), word("356.67", 78, 10), word("2,140.02", 120, 10),
+            word("401(k)", 36, 22), word("1,360.97", 78, 22), word("3,248.73", 132, 22),
+        ])
+
+        self.assertIsNone(learn_template(rows, self.categorize))
+
+    def test_parse_with_learned_template(self):
+        parser = PayslipParser(template_dir=self.template_dir)
+        transactions = parser.parse_payslip(SAMPLE_PDF)
+
+        by_memo = {txn["Memo"]: txn for txn in transactions}
+        # Signs printed apart from the amount are kept
+        self.assertEqual(by_memo["Social Security Tax"]["Amount"], "-28.05")
+        self.assertEqual(by_memo["401(k)"]["Amount"], "-28.85")
+        self.assertEqual(by_memo["401(k)"]["YTD"], "1500.20")
+        self.assertEqual(len(os.listdir(self.template_dir)), 1)
+
+        # The stored template is used as is for the next payslip of the layout
+        with patch.object(adp, "learn_template") as learn:
+            again = PayslipParser(template_dir=self.template_dir).parse_payslip(SAMPLE_PDF)
+        learn.assert_not_called()
+        self.assertEqual([dict(txn) for txn in again], [dict(txn) for txn in transactions])
+
+    def test_unaligned_layout_falls_back_to_text(self):
+        path = os.path.join(self.tmpdir, "synthetic.pdf")
+        generate_payslip(path, pages=2, lines_per_page=30, keyword_density=0.5,
+                         check_date=date(2024, 7, 25), seed=3)
+
+        transactions = PayslipParser(template_dir=self.template_dir).parse_payslip(path)
+        self.assertEqual([dict(txn) for txn in transactions],
+                         [dict(txn) for txn in PayslipParser().parse_payslip(path)])
+        self.assertEqual(os.listdir(self.template_dir), [])
+
+    def test_store_ignores_other_versions(self):
+        store = TemplateStore(self.template_dir)
+        store.put("adp-test", {"version": 0, "tables": []})
+
+        self.assertIsNone(store.get("adp-test"))
+        self.assertIsNone(store.get("adp-missing"))
+
+if __name__ == '__main__':
+    unittest.main()
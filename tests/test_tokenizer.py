@@ -0,0 +1,37 @@
+import unittest
+from payslip2budget.parsers.tokenizer import Token, first_amount, name_segments, parse_amount, tokenize, ytd_amount
+
+class TestTokenizer(unittest.TestCase):
+
+    def test_parse_amount(self):
+        self.assertEqual(parse_amount("$1,200.50"), 1200.50)
+        self.assertEqual(parse_amount("55.10-"), -55.10)
+        self.assertEqual(parse_amount(".5"), 0.5)
+        self.assertIsNone(parse_amount("401(k)"))
+        self.assertIsNone(parse_amount("-"))
+        self.assertIsNone(parse_amount("$"))
+
+    def test_tokenize_and_segments(self):
+        tokens = tokenize("Dental Pre Tax 12.34- 300.00 HSA* 50.00")
+
+        self.assertEqual(tokens[0], Token("Dental", None))
+        self.assertEqual(tokens[3], Token("12.34-", -12.34))
+        self.assertEqual(name_segments(tokens), [(0, 3), (5, 6)])
+
+    def test_first_amount_skips_zero_and_ytd_column(self):
+        tokens = tokenize("Medical 0.00 25.00 100.00")
+        self.assertEqual(first_amount(tokens, 1), 25.00)
+
+        # Only the year-to-date column is left
+        tokens = tokenize("Medical 0.00 100.00")
+        self.assertIsNone(first_amount(tokens, 1))
+
+    def test_ytd_amount_is_last_of_the_item_amounts(self):
+        tokens = tokenize("Dental 12.34- 300.00- HSA 50.00")
+        self.assertEqual(ytd_amount(tokens, 1), -300.00)
+
+        # A lone amount is the current period, with no YTD column
+        self.assertIsNone(ytd_amount(tokens, 4))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import pickle
+import unittest
+from payslip2budget.models.transaction_base import Transaction, to_cents, format_cents
+
+class TestTransaction(unittest.TestCase):
+
+    def setUp(self):
+        self.txn = Transaction(
+            date="2025-05-10",
+            payee="Acme Corp",
+            category="Taxes:Social Security",
+            memo="Social Security Tax",
+            amount=-15432,
+            import_id="P2B:abc",
+        )
+
+    def test_reads_as_transaction_dict(self):
+        expected = {
+            "Date": "2025-05-10",
+            "Payee": "Acme Corp",
+            "Category": "Taxes:Social Security",
+            "Memo": "Social Security Tax",
+            "Amount": "-154.32",
+            "ImportId": "P2B:abc",
+            "YTD": None,
+        }
+
+        self.assertEqual(self.txn.to_dict(), expected)
+        self.assertEqual(self.txn, expected)
+        self.assertEqual(self.txn.get("ImportId"), "P2B:abc")
+        with self.assertRaises(KeyError):
+            self.txn["Outflow"]
+
+    def test_round_trips_through_dict_and_pickle(self):
+        self.assertEqual(Transaction.from_dict(self.txn.to_dict()), self.txn)
+        self.assertEqual(pickle.loads(pickle.dumps(self.txn)), self.txn)
+        self.assertFalse(hasattr(self.txn, "__dict__"))
+
+    def test_cent_conversion_is_exact(self):
+        self.assertEqual(to_cents("0.29"), 29)
+        self.assertEqual(to_cents(1.15), 115)
+        self.assertEqual(to_cents(123456.00), 12345600)
+        self.assertEqual(to_cents("-1540.32"), -154032)
+        self.assertEqual(format_cents(-5), "-0.05")
+        self.assertEqual(format_cents(100), "1.00")
+
+    def test_interns_date_and_payee(self):
+        other = Transaction(date="".join(["2025-", "05-10"]), payee="".join(["Acme", " Corp"]), memo="", amount=0)
+
+        self.assertIs(other.date, self.txn.date)
+        self.assertIs(other.payee, self.txn.payee)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+import requests
+from payslip2budget.exporters.apihandlers.scheduler import TokenBucket, UploadScheduler, merge_responses
+
+def response(status_code, ids=None, headers=None):
+    mock_response = MagicMock()
+    mock_response.status_code = status_code
+    mock_response.headers = headers or {}
+    mock_response.json.return_value = {"data": {"transaction_ids": ids or [], "server_knowledge": 1}}
+    return mock_response
+
+def take_tokens(path, count):
+    # A separate run spending from the shared bucket
+    bucket = TokenBucket(path, capacity=40, period=1e9)
+    for _ in range(count):
+        bucket.acquire()
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+class TestUploadScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.clock = FakeClock()
+        self.bucket_path = os.path.join(self.tmpdir, "ratelimit.json")
+        self.progress_path = os.path.join(self.tmpdir, "uploads.json")
+        self.transactions = [{"memo": str(i)} for i in range(5)]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def scheduler(self, post, **options):
+        limiter = TokenBucket(self.bucket_path, capacity=100, clock=self.clock, sleep=self.clock.sleep)
+        return UploadScheduler(post, limiter, self.progress_path, sleep=self.clock.sleep, **options)
+
+    def test_chunks_and_merges_responses(self):
+        post = MagicMock(side_effect=lambda chunk: response(201, [t["memo"] for t in chunk]))
+
+        responses = self.scheduler(post, chunk_size=2).upload(self.transactions)
+
+        self.assertEqual([len(call.args[0]) for call in post.call_args_list], [2, 2, 1])
+        self.assertEqual(merge_responses(responses)["data"]["transaction_ids"], ["0", "1", "2", "3", "4"])
+        with open(self.progress_path) as f:
+            self.assertEqual(json.load(f), {})
+
+    def test_retries_rate_limits_and_server_errors(self):
+        post = MagicMock(side_effect=[response(429, headers={"Retry-After": "7"}), response(503), response(201)])
+
+        self.scheduler(post, chunk_size=10).upload(self.transactions)
+
+        self.assertEqual(post.call_count, 3)
+        self.assertEqual(self.clock.sleeps[0], 7.0)
+
+    def test_retries_dropped_connections_and_timeouts(self):
+        post = MagicMock(side_effect=[requests.ConnectionError(), requests.Timeout(), response(201)])
+
+        self.scheduler(post, chunk_size=10).upload(self.transactions)
+
+        self.assertEqual(post.call_count, 3)
+        self.assertEqual(len(self.clock.sleeps), 2)
+
+        post = MagicMock(side_effect=requests.ConnectionError())
+        with self.assertRaises(requests.ConnectionError):
+            self.scheduler(post, max_retries=2).upload(self.transactions)
+        self.assertEqual(post.call_count, 3)
+
+    def test_client_errors_and_exhausted_retries_raise(self):
+        with self.assertRaises(RuntimeError) as cm:
+            self.scheduler(MagicMock(return_value=response(401))).upload(self.transactions)
+        self.assertIn("YNAB API call failed: 401", str(cm.exception))
+
+        post = MagicMock(return_value=response(500))
+        with self.assertRaises(RuntimeError):
+            self.scheduler(post, max_retries=2).upload(self.transactions)
+        self.assertEqual(post.call_count, 3)
+
+    def test_resumes_from_last_acknowledged_chunk(self):
+        failing = MagicMock(side_effect=[response(201), response(400)])
+        with self.assertRaises(RuntimeError):
+            self.scheduler(failing, chunk_size=2).upload(self.transactions)
+
+        post = MagicMock(return_value=response(201))
+        self.scheduler(post, chunk_size=2).upload(self.transactions)
+
+        self.assertEqual([call.args[0] for call in post.call_args_list], [self.transactions[2:4], self.transactions[4:]])
+
+    def test_token_bucket_quota_persists_across_runs(self):
+        bucket = TokenBucket(self.bucket_path, capacity=2, period=60, clock=self.clock, sleep=self.clock.sleep)
+        bucket.acquire()
+        bucket.acquire()
+        self.assertEqual(self.clock.sleeps, [])
+
+        # A new process starts with the saved, empty bucket and waits for a refill
+        bucket = TokenBucket(self.bucket_path, capacity=2, period=60, clock=self.clock, sleep=self.clock.sleep)
+        bucket.acquire()
+        self.assertEqual(self.clock.sleeps, [30.0])
+
+    def test_token_bucket_sees_tokens_taken_by_concurrent_runs(self):
+        first = TokenBucket(self.bucket_path, capacity=2, period=60, clock=self.clock, sleep=self.clock.sleep)
+        second = TokenBucket(self.bucket_path, capacity=2, period=60, clock=self.clock, sleep=self.clock.sleep)
+        first.acquire()
+        second.acquire()
+
+        first.acquire()
+        self.assertEqual(self.clock.sleeps, [30.0])
+
+    def test_token_bucket_updates_are_not_lost_between_processes(self):
+        with multiprocessing.Pool(8) as pool:
+            pool.starmap(take_tokens, [(self.bucket_path, 5)] * 8)
+
+        with open(self.bucket_path) as f:
+            self.assertLess(json.load(f)["tokens"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from payslip2budget import watch
+from payslip2budget.cache import ParseCache
+from payslip2budget.watch import FolderWatcher, run_watch
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+class TestWatch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.inbox = os.path.join(self.tmpdir, "inbox")
+        os.mkdir(self.inbox)
+        self.state_path = os.path.join(self.tmpdir, "state.json")
+        self.clock = FakeClock()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, name, data):
+        path = os.path.join(self.inbox, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def watcher(self, use_inotify=False):
+        return FolderWatcher(self.inbox, self.state_path, debounce=2.0, use_inotify=use_inotify, clock=self.clock)
+
+    def test_default_state_survives_cache_eviction(self):
+        cache_dir = os.path.join(self.tmpdir, "cache")
+        os.mkdir(cache_dir)
+        with mock.patch.object(watch, "DEFAULT_CACHE_DIR", cache_dir), \
+             mock.patch.object(watch, "DEFAULT_STATE_DIR", os.path.join(cache_dir, "watch")):
+            # State left among the cache entries by an earlier version is moved out of them
+            state_path = watch.default_state_path(self.inbox)
+            legacy_path = os.path.join(cache_dir, "watch-" + os.path.basename(state_path))
+            with open(legacy_path, "w") as f:
+                f.write("{}")
+            self.assertEqual(watch.default_state_path(self.inbox), state_path)
+            self.assertTrue(os.path.exists(state_path))
+            self.assertFalse(os.path.exists(legacy_path))
+
+            watcher = FolderWatcher(self.inbox, debounce=0.0, use_inotify=False, clock=self.clock)
+            path = self.write("a.pdf", b"%PDF-1")
+            self.assertEqual(watcher.poll(), [path])
+            watcher.mark_processed(path)
+
+            ParseCache(cache_dir, max_bytes=0).evict()
+            self.assertTrue(os.path.exists(state_path))
+            restarted = FolderWatcher(self.inbox, debounce=0.0, use_inotify=False, clock=self.clock)
+            self.assertEqual(restarted.poll(), [])
+
+    def test_debounces_files_still_being_written(self):
+        watcher = self.watcher()
+        path = self.write("a.pdf", b"%PDF-partial")
+        self.write("notes.txt", b"ignored")
+
+        self.assertEqual(watcher.poll(), [])
+        self.clock.now += 1.5
+        self.write("a.pdf", b"%PDF-partial, now longer")
+        self.assertEqual(watcher.poll(), [])
+
+        # Settled only once it has been unchanged for the debounce interval
+        self.clock.now += 2.0
+        self.assertEqual(watcher.poll(), [path])
+
+    def test_restart_only_reports_the_delta(self):
+        unchanged = self.write("a.pdf", b"first")
+        changed = self.write("b.pdf", b"second")
+        watcher = self.watcher()
+        self.clock.now += 2
+        handled = []
+        run_watch(watcher, handled.append, once=True)
+        self.assertEqual(handled, [unchanged, changed])
+
+        self.write("b.pdf", b"second, corrected")
+        added = self.write("c.pdf", b"third")
+        watcher = self.watcher()
+        self.clock.now += 2
+        self.assertEqual(watcher.poll(), [changed, added])
+
+    def test_failures_are_reported_and_not_retried(self):
+        self.write("a.pdf", b"broken")
+        watcher = self.watcher()
+        self.clock.now += 2
+
+        def handle(path):
+            raise ValueError("not a PDF")
+        run_watch(watcher, handle, once=True)
+
+        self.assertEqual(watcher.poll(), [])
+
+    @unittest.skipUnless(os.path.exists("/proc/sys/fs/inotify"), "inotify is not available")
+    def test_inotify_reports_new_files(self):
+        watcher = self.watcher(use_inotify=True)
+        self.assertIsNotNone(watcher.inotify)
+        try:
+            path = self.write("a.pdf", b"content")
+            watcher.inotify.wait(1)
+            self.assertEqual(watcher.poll(), [])
+            self.clock.now += 2
+            self.assertEqual(watcher.poll(), [path])
+        finally:
+            watcher.close()
+
+if __name__ == '__main__':
+    unittest.main()
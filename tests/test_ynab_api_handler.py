@@ -1,18 +1,24 @@
 import unittest
 import io
+import shutil
 import sys
+import tempfile
+import threading
 from unittest.mock import patch, MagicMock
 from payslip2budget.exporters.apihandlers.ynab import YNABAPIHandler
+from payslip2budget.instrumentation import StageProfile, add_hook, remove_hook
 from payslip2budget.models.ynab_transaction import YNABTransaction
 from tests.utils.fixtures import load_json_fixture
 
 class TestYNABAPIHandler(unittest.TestCase):
 
     def setUp(self):
+        self.catalog_dir = tempfile.mkdtemp()
         self.config = {
             "api_key": "fake_token",
             "budget_id": "fake_budget_id",
-            "account_id": "3fa85f64-5717-4562-b3fc-2c963f66afa6"
+            "account_id": "3fa85f64-5717-4562-b3fc-2c963f66afa6",
+            "catalog_dir": self.catalog_dir
         }
         self.handler = YNABAPIHandler(self.config)
         
@@ -30,6 +36,9 @@ class TestYNABAPIHandler(unittest.TestCase):
             }
         }
 
+    def tearDown(self):
+        shutil.rmtree(self.catalog_dir)
+
     def test_init_sets_config_values(self):
         self.assertEqual(self.handler.api_key, "fake_token")
         self.assertEqual(self.handler.budget_id, "fake_budget_id")
@@ -56,8 +65,8 @@ class TestYNABAPIHandler(unittest.TestCase):
 
         return mock_response
 
-    @patch("payslip2budget.exporters.apihandlers.ynab.requests.post")
-    @patch("payslip2budget.exporters.apihandlers.ynab.requests.get", side_effect=mock_requests_get)
+    @patch("payslip2budget.exporters.apihandlers.ynab.requests.Session.post")
+    @patch("payslip2budget.exporters.apihandlers.ynab.requests.Session.get", side_effect=mock_requests_get)
     @patch('sys.stdout', new_callable=io.StringIO)
     def test_send_transactions_posts_expected_payload(self, stdout_mock, mock_get, mock_post):
         mock_post_response = MagicMock()
@@ -76,8 +85,31 @@ class TestYNABAPIHandler(unittest.TestCase):
         self.assertEqual(kwargs["json"]["transactions"][0]["amount"], 123456000)
         self.assertEqual(result, {"data": {"transaction_ids": ["123"]}})
 
-    @patch("payslip2budget.exporters.apihandlers.ynab.requests.post")
-    @patch("payslip2budget.exporters.apihandlers.ynab.requests.get", side_effect=mock_requests_get)
+    @patch("payslip2budget.exporters.apihandlers.ynab.requests.Session.post")
+    @patch("payslip2budget.exporters.apihandlers.ynab.requests.Session.get", side_effect=mock_requests_get)
+    @patch('sys.stdout', new_callable=io.StringIO)
+    def test_send_transactions_reports_http_spans(self, stdout_mock, mock_get, mock_post):
+        mock_post_response = MagicMock()
+        mock_post_response.status_code = 201
+        mock_post_response.content = b'{"data": {}}'
+        mock_post_response.request.body = b'{"transactions": []}'
+        mock_post.return_value = mock_post_response
+
+        profile = StageProfile()
+        add_hook(profile)
+        try:
+            self.handler.send_transactions(self.transactions)
+        finally:
+            remove_hook(profile)
+
+        snapshot = profile.to_dict()
+        self.assertEqual(set(snapshot["stages"]), {"ynab.categories", "ynab.account", "ynab.payees", "ynab.transactions"})
+        self.assertEqual(snapshot["counters"]["http.requests"], 4)
+        self.assertEqual(snapshot["counters"]["http.bytes_sent"], 20)
+        self.assertEqual(snapshot["counters"]["http.bytes_received"], 12)
+
+    @patch("payslip2budget.exporters.apihandlers.ynab.requests.Session.post")
+    @patch("payslip2budget.exporters.apihandlers.ynab.requests.Session.get", side_effect=mock_requests_get)
     @patch('sys.stdout', new_callable=io.StringIO)
     def test_send_transactions_posts_payee_dne_payload(self, stdout_mock, mock_get, mock_post):
         mock_post_response = MagicMock()
@@ -96,7 +128,28 @@ class TestYNABAPIHandler(unittest.TestCase):
         self.assertEqual(kwargs["json"]["transactions"][0]["amount"], 123456000)
         self.assertEqual(result, {"data": {"transaction_ids": ["123"]}})
 
-    @patch("payslip2budget.exporters.apihandlers.ynab.requests.post")
+    @patch("payslip2budget.exporters.apihandlers.ynab.requests.Session.post")
+    @patch("payslip2budget.exporters.apihandlers.ynab.requests.Session.get")
+    @patch('sys.stdout', new_callable=io.StringIO)
+    def test_send_transactions_fetches_metadata_concurrently(self, stdout_mock, mock_get, mock_post):
+        # Each GET waits for the other two, so this only completes if all three are in flight at once
+        barrier = threading.Barrier(3, timeout=5)
+
+        def concurrent_get(url, *args, **kwargs):
+            barrier.wait()
+            return TestYNABAPIHandler.mock_requests_get(url)
+
+        mock_get.side_effect = concurrent_get
+        mock_post.return_value.status_code = 201
+
+        handler = YNABAPIHandler({**self.config, "timeout": [2, 10]})
+        handler.send_transactions(self.transactions)
+
+        assert mock_get.call_count == 3
+        for call in mock_get.call_args_list + mock_post.call_args_list:
+            self.assertEqual(call.kwargs["timeout"], (2, 10))
+
+    @patch("payslip2budget.exporters.apihandlers.ynab.requests.Session.post")
     def test_send_transactions_raises_on_http_error(self, mock_post):
         mock_post.return_value.status_code = 401
         mock_post.return_value.text = "Unauthorized"
@@ -106,7 +159,7 @@ class TestYNABAPIHandler(unittest.TestCase):
 
         self.assertIn("YNAB API call failed", str(cm.exception))
 
-    @patch("payslip2budget.exporters.apihandlers.ynab.requests.get")
+    @patch("payslip2budget.exporters.apihandlers.ynab.requests.Session.get")
     def test_get_categories_request(self, mock_get):
         mock_response = MagicMock()
         mock_response.status_code = 200
@@ -121,7 +174,7 @@ class TestYNABAPIHandler(unittest.TestCase):
         # Confirm the API call was made correctly
         mock_get.assert_called_once()
 
-    @patch("payslip2budget.exporters.apihandlers.ynab.requests.get")
+    @patch("payslip2budget.exporters.apihandlers.ynab.requests.Session.get")
     def test_confirm_account_id_validity(self, mock_get):
         mock_response = MagicMock()
         mock_response.status_code = 200
@@ -136,6 +189,62 @@ class TestYNABAPIHandler(unittest.TestCase):
         # Confirm the API call was made correctly
         mock_get.assert_called_once()
 
+    @patch("payslip2budget.exporters.apihandlers.ynab.requests.Session.get")
+    def test_catalog_syncs_deltas_from_stored_copy(self, mock_get):
+        def respond(data):
+            response = MagicMock()
+            response.status_code = 200
+            response.json.return_value = {"data": data}
+            return response
+
+        mock_get.return_value = respond({"server_knowledge": 10, "category_groups": [
+            {"id": "g1", "name": "Insurance", "categories": [
+                {"id": "c1", "name": "Medical"}, {"id": "c2", "name": "Dental"}
+            ]},
+        ]})
+        self.handler.fetch_and_cache_categories()
+        self.assertIsNone(mock_get.call_args.kwargs["params"])
+
+        # A later run only asks for changes since server knowledge 10 and merges them
+        mock_get.return_value = respond({"server_knowledge": 12, "category_groups": [
+            {"id": "g1", "name": "Insurance", "categories": [
+                {"id": "c2", "name": "Dental", "deleted": True}, {"id": "c3", "name": "Vision"}
+            ]},
+        ]})
+        handler = YNABAPIHandler(self.config)
+        handler.fetch_and_cache_categories()
+
+        self.assertEqual(mock_get.call_args.kwargs["params"], {"last_knowledge_of_server": 10})
+        self.assertEqual(handler.cached_categories, {"Insurance": {"Medical": "c1", "Vision": "c3"}})
+
+        # Within the TTL the stored catalog is used without a request
+        mock_get.reset_mock()
+        handler = YNABAPIHandler({**self.config, "catalog_ttl": 3600})
+        handler.fetch_and_cache_categories()
+
+        mock_get.assert_not_called()
+        self.assertEqual(handler.cached_categories, {"Insurance": {"Medical": "c1", "Vision": "c3"}})
+
+        # A forced refresh downloads everything again
+        handler = YNABAPIHandler({**self.config, "catalog_ttl": 3600}, refresh_catalog=True)
+        handler.fetch_and_cache_categories()
+        self.assertIsNone(mock_get.call_args.kwargs["params"])
+
+    @patch("payslip2budget.exporters.apihandlers.ynab.requests.Session.get")
+    def test_payee_catalog_delta_removes_deleted(self, mock_get):
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.json.return_value = {"data": {"server_knowledge": 5, "payees": [
+            {"id": "p1", "name": "Employer"}, {"id": "p2", "name": "Old Employer"}
+        ]}}
+        self.handler.fetch_and_cache_payees()
+
+        mock_get.return_value.json.return_value = {"data": {"server_knowledge": 6, "payees": [
+            {"id": "p2", "name": "Old Employer", "deleted": True}
+        ]}}
+        self.handler.fetch_and_cache_payees()
+
+        self.assertEqual(self.handler.cached_payees, {"employer": "p1"})
+
     def test_get_cached_payee_id_case_insensitive(self):
         self.handler.cached_payees = {"test": "payee123"}
 
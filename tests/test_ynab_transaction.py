@@ -20,3 +20,12 @@ class TestYNABTransaction(unittest.TestCase):
         self.assertEqual(api_dict["account_id"], "abc123")
         self.assertEqual(api_dict["cleared"], "cleared")
         self.assertFalse(api_dict["approved"])
+
+    def test_dict_view_reads_milliunits(self):
+        txn = YNABTransaction(date="2025-05-10", payee="Acme Corp", memo="Dental", amount=-12340,
+                              account_id="abc123")
+
+        self.assertEqual(dict(txn)["Amount"], "-12.34")
+        self.assertEqual(txn.to_dict()["Amount"], "-12.34")
+        txn.amount = 1235
+        self.assertEqual(txn["Amount"], "1.235")